@@ -2,7 +2,7 @@ from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
-from decouple import config
+from decouple import Csv, config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -35,6 +35,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым: замеряет весь запрос, включая остальные middleware
+    'user_app.instrumentation.RequestMetricsMiddleware',
+    'user_app.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,17 +71,110 @@ WSGI_APPLICATION = 'delivery_api.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# DB_CONNECTION_MODE:
+#   per_request - новое соединение на каждый запрос;
+#   persistent  - соединение потока живёт DB_CONN_MAX_AGE сек, перед использованием проверяется;
+#   pooled      - общий пул процесса (user_app.db.backends.postgresql), статистика на /metrics
+DB_CONNECTION_MODE = config('DB_CONNECTION_MODE', default='persistent')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': (
+            'user_app.db.backends.postgresql' if DB_CONNECTION_MODE == 'pooled'
+            else 'django.db.backends.postgresql'
+        ),
         'NAME': config('PG_NAME'),
         'USER': config('PG_USER'),
         'PASSWORD': config('PG_PASSWORD'),
         'HOST': config('PG_HOST'),
         'PORT': config('PG_PORT'),
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int) if DB_CONNECTION_MODE == 'persistent' else 0,
+        'CONN_HEALTH_CHECKS': DB_CONNECTION_MODE == 'persistent',
+        'POOL': {
+            'MIN_SIZE': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'MAX_SIZE': config('DB_POOL_MAX_SIZE', default=20, cast=int),
+            'TIMEOUT': config('DB_POOL_TIMEOUT', default=10.0, cast=float),
+            'MAX_LIFETIME': config('DB_POOL_MAX_LIFETIME', default=1800, cast=int),
+            'HEALTH_CHECK': config('DB_POOL_HEALTH_CHECK', default='ping'),
+        },
     }
 }
 
+# Реплики для чтения: DB_REPLICA_HOSTS=host1:5432,host2 - алиасы replica_1, replica_2 ...
+# с остальными параметрами от default. В тестах реплики зеркалируют default
+DATABASE_REPLICAS = []
+for _index, _replica in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv())):
+    _host, _, _port = _replica.partition(':')
+    DATABASES[f'replica_{_index + 1}'] = dict(
+        DATABASES['default'], HOST=_host, PORT=_port or DATABASES['default']['PORT'], TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS.append(f'replica_{_index + 1}')
+
+DATABASE_ROUTERS = ['user_app.routers.ReplicaRouter']
+
+REPLICA_ROUTING = {
+    # Сколько секунд после записи читать данные пользователя из primary
+    'PIN_SECONDS': config('DB_REPLICA_PIN_SECONDS', default=5, cast=int),
+    'HEALTH_CHECK_INTERVAL': config('DB_REPLICA_HEALTH_CHECK_INTERVAL', default=5, cast=float),
+    'RETRY_INTERVAL': config('DB_REPLICA_RETRY_INTERVAL', default=30, cast=float),
+    # Отметки записи пользователя: с репликами кэш должен быть общим (проверка user_app.E002)
+    'CACHE_ALIAS': config('DB_REPLICA_PIN_CACHE', default='users'),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# При нескольких воркерах кэш пользователей должен быть общим (Redis/Memcached),
+# иначе сброс кэша в одном процессе не увидят остальные
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'users': {
+        'BACKEND': config('USER_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('USER_CACHE_LOCATION', default='users'),
+        'TIMEOUT': config('USER_CACHE_TIMEOUT', default=300, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('USER_CACHE_MAX_ENTRIES', default=10000, cast=int),
+        },
+    },
+}
+
+# Кэш пользователей для JWT-аутентификации: используется только с общим бэкендом,
+# с LocMemCache пользователь читается из БД на каждый запрос
+USER_AUTH_CACHE_ALIAS = 'users'
+# OpenAPI-схема: собирается manage.py build_schema и отдаётся из файла
+OPENAPI_SCHEMA_DIR = config('OPENAPI_SCHEMA_DIR', default=str(BASE_DIR / 'openapi'))
+OPENAPI_SCHEMA_CACHE_SECONDS = config('OPENAPI_SCHEMA_CACHE_SECONDS', default=3600, cast=int)
+# Без собранного файла сгенерировать схему в памяти при первом запросе (иначе 404)
+OPENAPI_SCHEMA_GENERATE_MISSING = config('OPENAPI_SCHEMA_GENERATE_MISSING', default=DEBUG, cast=bool)
+
+# Замеры запросов: Server-Timing и метрики Prometheus на /metrics
+REQUEST_METRICS = {
+    'ENABLED': config('REQUEST_METRICS_ENABLED', default=True, cast=bool),
+    'SERVER_TIMING': config('REQUEST_METRICS_SERVER_TIMING', default=True, cast=bool),
+    'TOKEN': config('METRICS_TOKEN', default=''),
+}
+
+# Метки версий данных пользователя для ETag/Last-Modified: хранятся в User.data_version,
+# кэшируются только в общем кэше (LocMemCache пропускается - версия читается из БД)
+USER_VERSION_CACHE_ALIAS = 'users'
+
+# Кэш ответов списка адресов по пользователю.
+# BACKEND: user_app.list_cache.LocMemListCacheBackend (использует max_entries)
+# или user_app.list_cache.DjangoListCacheBackend (использует cache_alias)
+ADDRESS_LIST_CACHE = {
+    'ENABLED': config('ADDRESS_LIST_CACHE_ENABLED', default=True, cast=bool),
+    'BACKEND': config('ADDRESS_LIST_CACHE_BACKEND', default='user_app.list_cache.LocMemListCacheBackend'),
+    'OPTIONS': {
+        'max_entries': config('ADDRESS_LIST_CACHE_MAX_ENTRIES', default=10000, cast=int),
+        'cache_alias': config('ADDRESS_LIST_CACHE_ALIAS', default='users'),
+    },
+    'TIMEOUT': config('ADDRESS_LIST_CACHE_TIMEOUT', default=300, cast=int),
+    'MAX_PAGES': config('ADDRESS_LIST_CACHE_MAX_PAGES', default=8, cast=int),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -127,10 +223,24 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user_app.authentication.CachedJWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'user_app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'user_app.pagination.KeysetPagination',
+    'PAGE_SIZE': config('API_PAGE_SIZE', default=50, cast=int),
 }
 
+# list/retrieve адресов и пользователей через .values() без сериализатора
+API_FAST_READ_PATH = config('API_FAST_READ_PATH', default=True, cast=bool)
+
+# Режим токенов: 'pair' - refresh/access, выпуск и обновление пишут строки token_blacklist;
+# 'sliding' - один sliding-токен, выпуск и обновление без записи в БД, отзыв через SLIDING_TOKEN_DENYLIST.
+# В режиме sliding access-токены (AUTH_TOKEN_CLASSES), выданные до переключения, принимаются до истечения
+AUTH_TOKEN_MODE = config('AUTH_TOKEN_MODE', default='pair')
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=14),
@@ -155,6 +265,128 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=5),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
+    "TOKEN_REFRESH_SERIALIZER": "user_app.serializers.UserTokenRefreshSerializer",
+    "SLIDING_TOKEN_REFRESH_SERIALIZER": "user_app.serializers.UserSlidingTokenRefreshSerializer",
+}
+
+# Отозванные sliding-токены: общий кэш (один на все воркеры) и копия в памяти процесса.
+# При AUTH_TOKEN_MODE=sliding кэш в памяти процесса не проходит проверку user_app.E001
+SLIDING_TOKEN_DENYLIST = {
+    'CACHE_ALIAS': config('SLIDING_TOKEN_DENYLIST_CACHE', default='users'),
+    'MAX_LOCAL_ENTRIES': config('SLIDING_TOKEN_DENYLIST_LOCAL_ENTRIES', default=100_000, cast=int),
+    'PRUNE_INTERVAL': config('SLIDING_TOKEN_DENYLIST_PRUNE_INTERVAL', default=60.0, cast=float),
+}
+
+# Кэш JTI заблокированных refresh-токенов перед таблицами token_blacklist
+TOKEN_BLACKLIST_CACHE = {
+    'BLOOM_CAPACITY': config('TOKEN_BLACKLIST_BLOOM_CAPACITY', default=1_000_000, cast=int),
+    'BLOOM_ERROR_RATE': config('TOKEN_BLACKLIST_BLOOM_ERROR_RATE', default=0.001, cast=float),
+    'LRU_SIZE': config('TOKEN_BLACKLIST_LRU_SIZE', default=100_000, cast=int),
+    'SYNC_INTERVAL': config('TOKEN_BLACKLIST_SYNC_INTERVAL', default=1.0, cast=float),
+}
+
+# Очистка истёкших токенов (manage.py purge_tokens): MODE 'delete' или 'archive' (перенос в ArchivedToken)
+TOKEN_LIFECYCLE = {
+    'MODE': config('TOKEN_LIFECYCLE_MODE', default='delete'),
+    'CHUNK_SIZE': config('TOKEN_PURGE_CHUNK_SIZE', default=5000, cast=int),
+    'CHUNK_PAUSE': config('TOKEN_PURGE_CHUNK_PAUSE', default=0.05, cast=float),
+    # Запас после expires_at на расхождение часов серверов
+    'GRACE_SECONDS': config('TOKEN_PURGE_GRACE_SECONDS', default=3600, cast=int),
+    'ARCHIVE_RETENTION_DAYS': config('TOKEN_ARCHIVE_RETENTION_DAYS', default=365, cast=int),
+    'INTERVAL': config('TOKEN_PURGE_INTERVAL', default=3600, cast=int),
+    'METRICS_TTL': config('TOKEN_METRICS_TTL', default=60, cast=int),
+    # Верхняя граница подсчёта истёкших токенов для метрик
+    'EXPIRED_COUNT_LIMIT': config('TOKEN_METRICS_EXPIRED_COUNT_LIMIT', default=100_000, cast=int),
 }
 
 AUTH_USER_MODEL = 'user_app.User'
+
+# Changelist админки: выше порога вместо точного COUNT(*) используется оценка планировщика
+ADMIN_CHANGELIST = {
+    'COUNT_THRESHOLD': config('ADMIN_CHANGELIST_COUNT_THRESHOLD', default=10000, cast=int),
+}
+
+# Массовый импорт адресов
+ADDRESS_BULK_CHUNK_SIZE = config('ADDRESS_BULK_CHUNK_SIZE', default=500, cast=int)
+ADDRESS_BULK_MAX_ROWS = config('ADDRESS_BULK_MAX_ROWS', default=50000, cast=int)
+
+# Поиск адресов (users/addresses/search) и поиск в админке
+ADDRESS_SEARCH = {
+    'MIN_LENGTH': config('ADDRESS_SEARCH_MIN_LENGTH', default=2, cast=int),
+    'MAX_RESULTS': config('ADDRESS_SEARCH_MAX_RESULTS', default=20, cast=int),
+}
+
+# Счётчики заказов по адресам: 'sync' - запись сразу, 'buffered' - накопление в памяти процесса
+# (меньше UPDATE, но при аварийном завершении воркера теряется до ORDER_COUNTER_FLUSH_INTERVAL секунд заказов)
+ORDER_COUNTER_MODE = config('ORDER_COUNTER_MODE', default='sync')
+ORDER_COUNTER_FLUSH_INTERVAL = config('ORDER_COUNTER_FLUSH_INTERVAL', default=5.0, cast=float)
+ORDER_COUNTER_MAX_PENDING = config('ORDER_COUNTER_MAX_PENDING', default=1000, cast=int)
+ORDER_COUNTER_BATCH_SIZE = config('ORDER_COUNTER_BATCH_SIZE', default=500, cast=int)
+
+# Приём событий заказов (/users/order-events, manage.py ingest_order_events)
+ORDER_EVENTS = {
+    'BATCH_SIZE': config('ORDER_EVENTS_BATCH_SIZE', default=5000, cast=int),
+    # Максимум событий в одном HTTP-запросе
+    'MAX_EVENTS': config('ORDER_EVENTS_MAX_EVENTS', default=100_000, cast=int),
+    # Сколько дней хранятся event_id принятых событий для отбрасывания повторов
+    'RETENTION_DAYS': config('ORDER_EVENTS_RETENTION_DAYS', default=30, cast=int),
+}
+
+# Рейтинг самых используемых адресов пользователя (/users/addresses/preferred)
+PREFERRED_ADDRESSES = {
+    'SIZE': config('PREFERRED_ADDRESSES_SIZE', default=5, cast=int),
+}
+
+# Пул потоков для хэширования паролей (PBKDF2 не должен занимать все воркеры)
+PASSWORD_HASHING_POOL = {
+    'ENABLED': config('PASSWORD_HASHING_POOL_ENABLED', default=True, cast=bool),
+    'MAX_WORKERS': config('PASSWORD_HASHING_MAX_WORKERS', default=4, cast=int),
+    'MAX_QUEUE': config('PASSWORD_HASHING_MAX_QUEUE', default=16, cast=int),
+    'TIMEOUT': config('PASSWORD_HASHING_TIMEOUT', default=5.0, cast=float),
+}
+
+# Лимиты login/register по IP и username, проверяются до хэширования пароля.
+# STORE: user_app.throttling.LocMemThrottleStore (в памяти воркера, max_entries),
+# SharedMemoryThrottleStore (общая память воркеров хоста, path/slots)
+# или CacheThrottleStore (кэш Django, cache_alias).
+# LocMemThrottleStore по умолчанию считает попытки в каждом воркере отдельно: при N воркерах
+# (и хостах) фактический лимит - N x RATES. Для точного лимита нужен SharedMemoryThrottleStore
+# (один хост) или CacheThrottleStore с общим кэшем (Redis/Memcached)
+AUTH_THROTTLE = {
+    'ENABLED': config('AUTH_THROTTLE_ENABLED', default=True, cast=bool),
+    'STORE': config('AUTH_THROTTLE_STORE', default='user_app.throttling.LocMemThrottleStore'),
+    'OPTIONS': {},
+    'RATES': {
+        'login': {
+            'ip': config('AUTH_THROTTLE_LOGIN_IP_RATE', default='30/min'),
+            'username': config('AUTH_THROTTLE_LOGIN_USERNAME_RATE', default='10/min'),
+        },
+        'register': {
+            'ip': config('AUTH_THROTTLE_REGISTER_IP_RATE', default='10/min'),
+        },
+    },
+}
+
+# Удаление пользователя (users/delete): 'soft' - деактивация и удаление данных фоновым воркером
+# (manage.py purge_users), 'hard' - каскадное удаление в запросе
+USER_DELETE_MODE = config('USER_DELETE_MODE', default='soft')
+USER_PURGE = {
+    'CHUNK_SIZE': config('USER_PURGE_CHUNK_SIZE', default=1000, cast=int),
+    'BATCH_SIZE': config('USER_PURGE_BATCH_SIZE', default=10, cast=int),
+    'MAX_ATTEMPTS': config('USER_PURGE_MAX_ATTEMPTS', default=5, cast=int),
+    'RETRY_DELAY': config('USER_PURGE_RETRY_DELAY', default=60, cast=int),
+    # Сколько секунд задача закреплена за воркером, взявшим её
+    'LEASE_SECONDS': config('USER_PURGE_LEASE_SECONDS', default=600, cast=int),
+    'POLL_INTERVAL': config('USER_PURGE_POLL_INTERVAL', default=5.0, cast=float),
+}
+
+# Async-версии endpoint'ов user_app для ASGI (delivery_api/asgi.py)
+USER_API_ASYNC_VIEWS = config('USER_API_ASYNC_VIEWS', default=False, cast=bool)
+
+# Массовое создание пользователей (users/provision и manage.py provision_users)
+USER_PROVISIONING = {
+    'CHUNK_SIZE': config('USER_PROVISIONING_CHUNK_SIZE', default=1000, cast=int),
+    'HASH_WORKERS': config('USER_PROVISIONING_HASH_WORKERS', default=4, cast=int),
+    # Максимум строк в одном запросе users/provision (хэши считает общий пул PASSWORD_HASHING_POOL)
+    'MAX_ROWS': config('USER_PROVISIONING_MAX_ROWS', default=1000, cast=int),
+}
@@ -0,0 +1,32 @@
+"""
+    Профиль настроек для офлайн-бенчмарков (manage.py bench_api): SQLite во временном
+    каталоге, без Postgres и сети. Переменные окружения основного профиля получают заглушки
+"""
+import os
+import tempfile
+
+os.environ.setdefault('DJANGO_SECRET_KEY', 'bench-insecure-secret-key-bench-insecure-secret-key')
+for name in ('PG_NAME', 'PG_USER', 'PG_PASSWORD', 'PG_HOST', 'PG_PORT'):
+    os.environ.setdefault(name, '')
+
+from .settings import *  # noqa: E402,F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver']
+
+# DB_CONNECTION_MODE=pooled проверяет пул соединений на SQLite вместо PostgreSQL
+DATABASES = {
+    'default': {
+        'ENGINE': 'user_app.db.backends.sqlite3' if DB_CONNECTION_MODE == 'pooled' else 'django.db.backends.sqlite3',  # noqa: F405
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],  # noqa: F405
+        'POOL': DATABASES['default']['POOL'],  # noqa: F405
+        'NAME': os.environ.get('BENCH_DB_PATH') or os.path.join(tempfile.mkdtemp(prefix='delivery-bench-'), 'db.sqlite3'),
+        # Параллельные клиенты пишут в один файл - ждём блокировку, а не падаем
+        # (WAL и BEGIN IMMEDIATE на время прогона включает user_app.benchmark.configure_sqlite)
+        'OPTIONS': {'timeout': 30},
+    }
+}
+DATABASE_REPLICAS = []
+
+# Все клиенты бенчмарка приходят с одного адреса - лимиты login/register исказили бы замеры
+AUTH_THROTTLE = dict(AUTH_THROTTLE, ENABLED=False)  # noqa: F405
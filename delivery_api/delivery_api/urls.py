@@ -1,28 +1,15 @@
 from django.contrib import admin
 from django.urls import path, include, re_path
-from rest_framework.permissions import AllowAny
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Snippets API",
-      default_version='v1',
-      description="Delivery API",
-      terms_of_service="https://www.google.com/policies/terms/",
-      contact=openapi.Contact(email="contact@snippets.local"),
-      license=openapi.License(name="BSD License"),
-   ),
-   public=True,
-   permission_classes=[AllowAny],
-)
+from user_app.schema import schema_file_view, schema_ui_view
+from user_app.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('users/', include('user_app.urls', namespace='users')),
+    path('metrics', metrics_view, name='metrics'),
 
-    # Swagger documentation endpoints
-    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    re_path(r'^swagger/$', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    re_path(r'^redoc/$', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    # Swagger documentation endpoints: схема собирается командой build_schema
+    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_file_view, name='schema-json'),
+    re_path(r'^swagger/$', schema_ui_view, {'ui': 'swagger'}, name='schema-swagger-ui'),
+    re_path(r'^redoc/$', schema_ui_view, {'ui': 'redoc'}, name='schema-redoc'),
 ]
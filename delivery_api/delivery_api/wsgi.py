@@ -5,3 +5,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'delivery_api.settings')
 
 application = get_wsgi_application()
+
+from user_app.token_cache import warm_token_blacklist_cache  # noqa: E402
+
+warm_token_blacklist_cache()
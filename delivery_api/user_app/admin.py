@@ -1,25 +1,221 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
 from django.contrib import admin
-from .models import User, UserAddresses
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .models import User, UserAddresses, UserPurge
+from .pagination import keyset_filter
+from .search import search
+
+CURSOR_VAR = 'after'
+
+
+def estimate_count(queryset):
+    """
+        Оценка числа строк планировщиком PostgreSQL (EXPLAIN), для остальных БД - None
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+        Точный COUNT(*) только до ADMIN_CHANGELIST['COUNT_THRESHOLD'] строк (подзапрос с LIMIT),
+        выше порога - оценка планировщика
+    """
+    estimated = False
+
+    @cached_property
+    def count(self):
+        threshold = settings.ADMIN_CHANGELIST['COUNT_THRESHOLD']
+        queryset = self.object_list.order_by()
+        bounded = queryset[:threshold + 1].count()
+        if bounded <= threshold:
+            return bounded
+        estimate = estimate_count(queryset)
+        if estimate is None:
+            return queryset.count()
+        self.estimated = True
+        return max(estimate, bounded)
+
+
+class KeysetChangeList(ChangeList):
+    """
+        Changelist с keyset-навигацией: при сортировке по умолчанию (ModelAdmin.ordering, последним - pk)
+        следующая страница выбирается условием по ключу последней строки (?after=...), а не OFFSET.
+        При сортировке по колонке (?o=...) остаётся обычная постраничная навигация
+    """
+    keyset = False
+    next_page_url = None
+    first_page_url = None
+
+    def get_queryset(self, request):
+        # Курсор не фильтр и не должен попадать в ссылки сортировки и форму поиска
+        self.params.pop(CURSOR_VAR, None)
+        queryset = super().get_queryset(request)
+        if self.model_admin.list_only:
+            queryset = queryset.only(*self.model_admin.list_only)
+        return queryset
+
+    def get_keyset_ordering(self, request):
+        ordering = tuple(self.model_admin.get_ordering(request))
+        if (
+            ORDER_VAR in self.params or self.show_all or self.list_editable or not ordering
+            or not all(isinstance(field, str) for field in ordering) or ordering[-1].lstrip('-') != 'pk'
+        ):
+            return None
+        return ordering
+
+    def get_results(self, request):
+        ordering = self.get_keyset_ordering(request)
+        if ordering is None:
+            return super().get_results(request)
+        self.keyset = True
+        position = self.decode_cursor(request.GET.get(CURSOR_VAR), ordering)
+        queryset = self.queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(ordering, position))
+        rows = list(queryset[:self.list_per_page + 1])
+        has_next = len(rows) > self.list_per_page
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.paginator = paginator
+        self.result_count = paginator.count
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.full_result_count = self.root_queryset.count() if self.show_full_result_count else None
+        self.show_admin_actions = not self.show_full_result_count or bool(self.full_result_count)
+        self.result_list = rows[:self.list_per_page]
+        self.can_show_all = False
+        self.multi_page = has_next or position is not None
+        if has_next:
+            last = self.result_list[-1]
+            values = [getattr(last, field.lstrip('-')) for field in ordering]
+            self.next_page_url = self.get_query_string({CURSOR_VAR: self.encode_cursor(values)})
+        if position is not None:
+            self.first_page_url = self.get_query_string()
+
+    @staticmethod
+    def encode_cursor(values):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        return urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, encoded, ordering):
+        if not encoded:
+            return None
+        opts = self.model._meta
+        try:
+            values = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            if len(values) != len(ordering):
+                raise ValueError
+            return tuple(
+                (opts.pk if name == 'pk' else opts.get_field(name)).to_python(value)
+                for name, value in zip((field.lstrip('-') for field in ordering), values)
+            )
+        except Exception:
+            raise IncorrectLookupParameters('Неверный курсор')
+
+
+class ScalableChangeListMixin:
+    """
+        Changelist для больших таблиц: keyset-навигация, оценка количества строк
+        и загрузка только колонок list_only
+    """
+    list_only = None
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+class IndexedSearchMixin:
+    """
+        Поиск в changelist через индексы user_app.search: trigram в PostgreSQL, префикс в SQLite.
+        search_related - поля связанных моделей, ищутся подзапросом без JOIN
+    """
+    search_related = {}
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        related = {
+            name: (model._default_manager.all(), fields) for name, (model, fields) in self.search_related.items()
+        }
+        return search(queryset, self.search_fields, search_term, related), False
+
+
+class OrderCountFilter(admin.SimpleListFilter):
+    """
+        Фиксированные диапазоны вместо DISTINCT order_count по всей таблице
+    """
+    title = 'Кол-во заказов'
+    parameter_name = 'orders'
+    ranges = {
+        '0': ('Нет заказов', 0, 0),
+        '1-5': ('1-5', 1, 5),
+        '6-20': ('6-20', 6, 20),
+        '21+': ('Больше 20', 21, None),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(value, label) for value, (label, _, _) in self.ranges.items()]
+
+    def queryset(self, request, queryset):
+        if self.value() not in self.ranges:
+            return queryset
+        _, low, high = self.ranges[self.value()]
+        queryset = queryset.filter(order_count__gte=low)
+        return queryset if high is None else queryset.filter(order_count__lte=high)
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(ScalableChangeListMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('pk', 'username', 'email', 'role', 'is_active', 'is_superuser', 'created_at')
     list_display_links = ('pk', 'username')
+    list_only = ('username', 'email', 'role', 'is_active', 'is_superuser', 'created_at')
+    ordering = ('-created_at', '-pk')
     search_fields = ('username', 'first_name', 'last_name')
     list_filter = ('role', 'is_superuser', 'is_active')
     save_as = True
 
 
 @admin.register(UserAddresses)
-class UserAddresses(admin.ModelAdmin):
+class UserAddressesAdmin(ScalableChangeListMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('pk', 'user', 'get_address', 'order_count', 'last_order')
     list_display_links = ('pk',)
-    search_fields = ('user__username',)
-    list_filter = ('order_count',)
+    list_select_related = ('user',)
+    list_only = (
+        'user__username', 'city', 'street', 'house', 'entrance', 'floor', 'flat', 'order_count', 'last_order'
+    )
+    ordering = ('-pk',)
+    search_fields = ('city', 'street')
+    search_related = {'user': (User, ('username',))}
+    list_filter = (OrderCountFilter,)
+    raw_id_fields = ('user',)
     save_as = True
 
     def get_address(self, instance):
         return instance.get_full_address()
 
     get_address.short_description = 'Адрес'
+
+
+@admin.register(UserPurge)
+class UserPurgeAdmin(admin.ModelAdmin):
+    list_display = ('user_id', 'status', 'step', 'attempts', 'requested_at', 'next_attempt_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('user_id', 'step', 'deleted_rows', 'requested_at', 'finished_at')
@@ -0,0 +1,304 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import global_settings, settings
+from django.contrib.auth import _clean_credentials, authenticate, user_login_failed
+from django.contrib.auth.models import update_last_login
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import (
+    APIException, AuthenticationFailed, MethodNotAllowed, NotAuthenticated, NotFound, ParseError, Throttled,
+    ValidationError
+)
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .authentication import CachedJWTAuthentication
+from .conditional import get_validators, set_validators
+from .list_cache import address_list_cache
+from .models import User, UserAddresses
+from .pagination import UserAddressKeysetPagination
+from .projections import ValuesProjection
+from .renderers import FastJSONRenderer
+from .serializers import (
+    UserRegistrationSerializer, UserLoginSerializer, UserSerializer, UserResetPasswordSerializer,
+    UserAddressCUDSerializer, UserAddressSerializer
+)
+from .throttling import auth_throttle, get_identities
+from .tokens import get_logout_token, issue_tokens as issue_tokens_sync
+
+
+async def aauthenticate(username, password):
+    """
+        Асинхронный аналог django.contrib.auth.authenticate для ModelBackend: хэш считается в пуле,
+        event loop не блокируется. Неудачная попытка, как и в синхронном authenticate, отправляет user_login_failed.
+        С другими бэкендами аутентификации вызывается синхронный authenticate
+    """
+    if list(settings.AUTHENTICATION_BACKENDS) != global_settings.AUTHENTICATION_BACKENDS:
+        return await sync_to_async(authenticate)(username=username, password=password)
+    try:
+        user = await User.objects.aget(**{User.USERNAME_FIELD: username})
+    except User.DoesNotExist:
+        # Выравниваем время ответа для несуществующего пользователя
+        await User().aset_password(password)
+        user = None
+    else:
+        if not (await user.acheck_password(password) and user.is_active):
+            user = None
+    if user is None:
+        # Приёмники сигнала могут обращаться к БД
+        await sync_to_async(user_login_failed.send)(
+            sender='django.contrib.auth',
+            credentials=_clean_credentials({'username': username, 'password': password}),
+            request=None
+        )
+    return user
+
+
+async def issue_tokens(user):
+    # В режиме пары токенов выпуск пишет OutstandingToken
+    return await sync_to_async(issue_tokens_sync)(user)
+
+
+class AsyncAPIView(View):
+    """
+        Базовый async-view для ASGI: JSON на входе и выходе,
+        JWT-аутентификация и формат ошибок как у DRF
+    """
+    authentication_required = False
+    throttle_scope = None
+    renderer = FastJSONRenderer()
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if self.authentication_required:
+                request.user = await self.authenticate(request)
+            request.data = self.parse(request)
+            request.query_params = request.GET
+            if self.throttle_scope is not None:
+                await self.check_throttle(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.handle_exception(exc)
+
+    async def authenticate(self, request):
+        result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+        if result is None:
+            raise NotAuthenticated()
+        user, request.auth = result
+        return user
+
+    async def check_throttle(self, request):
+        # Хранилище счётчиков может быть сетевым (CacheThrottleStore)
+        wait = await sync_to_async(auth_throttle.check)(self.throttle_scope, get_identities(request, request.data))
+        if wait is not None:
+            raise Throttled(wait)
+
+    def parse(self, request):
+        if request.method in ('GET', 'HEAD', 'OPTIONS', 'DELETE'):
+            return {}
+        if request.content_type == 'application/json':
+            try:
+                return json.loads(request.body or b'{}')
+            except ValueError as error:
+                raise ParseError(f'JSON parse error - {error}')
+        return request.POST
+
+    def render(self, data=None, status=200, headers=None):
+        content = self.renderer.render(data) if data is not None else b''
+        return HttpResponse(content, status=status, content_type=self.renderer.media_type, headers=headers)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            exc.auth_header = CachedJWTAuthentication().authenticate_header(self.request)
+        response = exception_handler(exc, {'view': self, 'request': self.request})
+        headers = {key: value for key, value in response.items() if key.lower() != 'content-type'}
+        return self.render(response.data, status=response.status_code, headers=headers)
+
+
+class AsyncUserRegistrationAPIView(AsyncAPIView):
+    """
+        Async-endpoint для регистрации пользователя
+    """
+    http_method_names = ('post',)
+    throttle_scope = 'register'
+
+    async def post(self, request, *args, **kwargs):
+        serializer = UserRegistrationSerializer(data=request.data)
+        # Проверка уникальности username/email обращается к БД
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        validated_data = dict(serializer.validated_data)
+        password = validated_data.pop('password')
+        user = User(**validated_data)
+        await user.aset_password(password)
+        await sync_to_async(user.save)()
+        serializer.instance = user
+        resp_data = serializer.data
+        resp_data['tokens'] = await issue_tokens(user)
+        return self.render(resp_data, status=201)
+
+
+class AsyncUserLoginAPIView(AsyncAPIView):
+    """
+        Async-endpoint для авторизации пользователя
+    """
+    http_method_names = ('post',)
+    throttle_scope = 'login'
+
+    async def post(self, request, *args, **kwargs):
+        # Проверяем только поля: validate() сериализатора вызывает синхронный authenticate()
+        attrs = UserLoginSerializer().to_internal_value(request.data)
+        user = await aauthenticate(**attrs)
+        if user is None:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['Неверный логин или пароль']})
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            await sync_to_async(update_last_login)(None, user)
+        resp_data = UserSerializer(user).data
+        resp_data['tokens'] = await issue_tokens(user)
+        return self.render(resp_data, status=200)
+
+
+class AsyncUserResetPasswordAPIView(AsyncAPIView):
+    """
+        Async-endpoint для смены пароля пользователя
+    """
+    authentication_required = True
+    http_method_names = ('put',)
+
+    async def put(self, request, *args, **kwargs):
+        user = request.user
+        serializer = UserResetPasswordSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        await user.aset_password(serializer.validated_data.get('password1'))
+        await sync_to_async(user.save)()
+        return self.render(status=200)
+
+
+class AsyncUserLogoutAPIView(AsyncAPIView):
+    """
+        Async-endpoint для выхода из аккаунта пользователя
+    """
+    authentication_required = True
+    http_method_names = ('post',)
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            token = await sync_to_async(get_logout_token)(request.data, request.auth)
+            await sync_to_async(token.blacklist)()
+            return self.render(status=205)
+        except Exception as error:
+            print(f'Error while user logout: {error}')
+            return self.render(status=400)
+
+
+class AsyncUserUpdateAPIView(AsyncAPIView):
+    """
+        Async-endpoint для редактирования данных пользователя
+    """
+    authentication_required = True
+    http_method_names = ('put',)
+
+    async def put(self, request, *args, **kwargs):
+        serializer = UserSerializer(instance=request.user, data=request.data, partial=True)
+        # Валидаторы уникальности username/email обращаются к БД
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        await sync_to_async(serializer.save)()
+        return self.render(serializer.data, status=200)
+
+
+class AsyncUserAddressAPIView(AsyncAPIView):
+    """
+        Async-endpoint для адресов пользователя: список/создание без address_id,
+        получение/изменение/удаление с ним. Ответы совпадают с UserAddressAPIViewSet
+    """
+    authentication_required = True
+    http_method_names = ('get', 'post', 'put', 'patch', 'delete')
+    pagination_class = UserAddressKeysetPagination
+    projection = ValuesProjection(UserAddressSerializer)
+
+    def get_queryset(self):
+        user_id = self.request.user.pk
+        if (address_id := self.kwargs.get('address_id')) is not None:
+            return UserAddresses.objects.filter(user_id=user_id, pk=address_id)
+        return UserAddresses.objects.filter(user_id=user_id)
+
+    async def get_object(self):
+        try:
+            return await self.get_queryset().aget()
+        except UserAddresses.DoesNotExist:
+            raise NotFound()
+
+    def get_serializer_context(self):
+        return {'request': self.request, 'view': self}
+
+    async def get(self, request, *args, **kwargs):
+        # Метка версии читается до данных: при совпадении - 304 без загрузки адресов
+        etag, last_modified = await sync_to_async(get_validators)(request, 'addresses', request.user.pk)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await self.get_data(request, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    async def get_data(self, request, **kwargs):
+        if settings.API_FAST_READ_PATH:
+            return await self.get_projected(request, **kwargs)
+        if 'address_id' in kwargs:
+            serializer = UserAddressSerializer(await self.get_object(), context=self.get_serializer_context())
+            return self.render(serializer.data)
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(self.get_queryset(), request, view=self)
+        serializer = UserAddressSerializer(page, many=True, context=self.get_serializer_context())
+        return self.render(paginator.get_paginated_response(serializer.data).data)
+
+    async def get_projected(self, request, **kwargs):
+        projection = self.projection
+        if 'address_id' in kwargs:
+            try:
+                return self.render(projection.represent(await projection.values(self.get_queryset()).aget()))
+            except UserAddresses.DoesNotExist:
+                raise NotFound()
+        paginator = self.pagination_class()
+        queryset = self.get_queryset()
+        ordering = paginator.get_ordering(request, queryset, self)
+        queryset = projection.values(queryset, *(field.lstrip('-') for field in ordering))
+        page = await paginator.apaginate_queryset(queryset, request, view=self)
+        return self.render(paginator.get_paginated_response(projection.represent_many(page)).data)
+
+    async def post(self, request, *args, **kwargs):
+        if 'address_id' in kwargs:
+            raise MethodNotAllowed(request.method)
+        serializer = UserAddressCUDSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        serializer.instance = await UserAddresses.objects.acreate(**serializer.validated_data)
+        await sync_to_async(address_list_cache.invalidate)(request.user.pk)
+        return self.render(serializer.data, status=201)
+
+    async def put(self, request, *args, partial=False, **kwargs):
+        if 'address_id' not in kwargs:
+            raise MethodNotAllowed(request.method)
+        serializer = UserAddressCUDSerializer(
+            await self.get_object(), data=request.data, partial=partial, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(serializer.save)()
+        await sync_to_async(address_list_cache.invalidate)(request.user.pk)
+        return self.render(serializer.data)
+
+    async def patch(self, request, *args, **kwargs):
+        return await self.put(request, *args, partial=True, **kwargs)
+
+    async def delete(self, request, *args, **kwargs):
+        if 'address_id' not in kwargs:
+            raise MethodNotAllowed(request.method)
+        instance = await self.get_object()
+        await sync_to_async(instance.delete)()
+        await sync_to_async(address_list_cache.invalidate)(request.user.pk)
+        return self.render(status=204)
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .checks import cache_is_shared
+from .instrumentation import timer
+from .routers import set_current_user
+from .tokens import SlidingToken
+
+
+# Поля пользователя в кэше аутентификации: без хэша пароля и часто меняющихся служебных полей,
+# остальные поля экземпляра отложены и догружаются из БД при обращении
+AUTH_USER_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'birthday', 'role',
+    'is_active', 'is_staff', 'is_superuser', 'created_at', 'deleted_at',
+)
+
+
+def _user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def _get_auth_cache():
+    """
+        Кэш аутентификации, если он общий для воркеров: кэш в памяти процесса не сбросить
+        из других воркеров, и деактивированный пользователь продолжил бы проходить аутентификацию
+    """
+    if cache_is_shared(settings.USER_AUTH_CACHE_ALIAS):
+        return caches[settings.USER_AUTH_CACHE_ALIAS]
+    return None
+
+
+def invalidate_cached_user(user_id) -> None:
+    """
+        Удалить пользователя из кэша аутентификации.
+        Повторное удаление после коммита закрывает окно, в котором параллельный запрос
+        успел прочитать из БД ещё не закоммиченную старую версию и положить её в кэш
+    """
+    cache = _get_auth_cache()
+    if cache is None:
+        return
+    key = _user_cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+        JWT-аутентификация, берущая пользователя из кэша по claim user_id вместо SELECT на каждый запрос.
+        Кэшируются только AUTH_USER_FIELDS и только в общем кэше (без него - SELECT этих полей).
+        Кэш сбрасывается сигналами при любом сохранении или удалении пользователя.
+        При AUTH_TOKEN_MODE='sliding' сначала проверяется sliding-токен
+    """
+    def get_validated_token(self, raw_token):
+        with timer('jwt'):
+            if settings.AUTH_TOKEN_MODE == 'sliding':
+                try:
+                    return SlidingToken(raw_token)
+                except TokenError:
+                    pass
+            return super().get_validated_token(raw_token)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        # Роутер должен знать пользователя до чтения, чтобы соблюсти read-your-writes
+        set_current_user(user_id)
+
+        # from_db ожидает значения в порядке полей модели
+        field_names = [
+            field.attname for field in self.user_model._meta.concrete_fields if field.attname in AUTH_USER_FIELDS
+        ]
+        cache = _get_auth_cache()
+        key = _user_cache_key(user_id)
+        values = cache.get(key) if cache is not None else None
+        if values is None:
+            values = self.user_model.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values_list(*field_names).first()
+            if values is None:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            if cache is not None:
+                cache.set(key, values)
+        # Незагруженные поля отложены: save() такого экземпляра обновит только загруженные поля
+        user = self.user_model.from_db(self.user_model.objects.db, field_names, values)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
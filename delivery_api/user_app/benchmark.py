@@ -0,0 +1,281 @@
+import math
+import platform
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import User, UserAddresses
+from .tokens import RefreshToken, SlidingToken, issue_tokens
+
+PASSWORD = 'bench-Password-1'
+ADDRESS_DATA = dict(city='Москва', street='Тверская', house='1', entrance=1, floor=1, flat='1')
+
+# Метрика -> True, если рост значения означает регрессию
+COMPARED_METRICS = {'p95_ms': True, 'p99_ms': True, 'throughput_rps': False, 'queries_per_request': True}
+
+
+def percentile(sorted_values, percent):
+    """
+        Перцентиль методом ближайшего ранга по отсортированному списку
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+        Обработчик connection_created на время прогона: WAL - чтение не ждёт записи,
+        BEGIN IMMEDIATE - транзакция сразу берёт блокировку записи и ждёт её до OPTIONS['timeout'].
+        Транзакция с обычным BEGIN, начавшаяся с чтения, получает "database is locked" без ожидания,
+        если другой клиент успел записать
+    """
+    if connection.vendor != 'sqlite':
+        return
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+    finally:
+        cursor.close()
+    connection._start_transaction_under_autocommit = lambda: connection.cursor().execute('BEGIN IMMEDIATE')
+
+
+class ClientState:
+    """
+        Состояние одного клиента бенчмарка: пользователь, токены и его адреса
+    """
+    def __init__(self, number, run_id):
+        self.number = number
+        self.run_id = run_id
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username=f'bench-{run_id}-{number}', password=PASSWORD, email=f'bench-{run_id}-{number}@bench.local',
+            first_name='bench', last_name='bench', birthday='2000-01-01'
+        )
+        # В режиме sliding один токен и для запросов, и для обновления
+        tokens = issue_tokens(self.user)
+        self.refresh = tokens.get('refresh', tokens.get('token'))
+        self.headers = {'HTTP_AUTHORIZATION': f'Token {tokens.get("access", self.refresh)}'}
+        self.address_ids = [
+            address.pk for address in UserAddresses.objects.bulk_create(
+                UserAddresses(user=self.user, **ADDRESS_DATA) for _ in range(5)
+            )
+        ]
+
+
+class Scenario:
+    """
+        Один сценарий нагрузки. prepare() выполняется вне замера и возвращает параметры запроса,
+        handle() обновляет состояние клиента по ответу
+    """
+    name = None
+    method = 'get'
+    expected_status = 200
+
+    def prepare(self, state, index):
+        raise NotImplementedError
+
+    def handle(self, state, response) -> None:
+        pass
+
+
+class RegisterScenario(Scenario):
+    name = 'register'
+    method = 'post'
+    expected_status = 201
+
+    def prepare(self, state, index):
+        username = f'bench-reg-{state.run_id}-{state.number}-{index}'
+        return '/users/register', {
+            'username': username, 'password': PASSWORD, 'email': f'{username}@bench.local',
+            'first_name': 'bench', 'last_name': 'bench', 'birthday': '2000-01-01'
+        }, {}
+
+
+class LoginScenario(Scenario):
+    name = 'login'
+    method = 'post'
+
+    def prepare(self, state, index):
+        return '/users/login', {'username': state.user.username, 'password': PASSWORD}, {}
+
+
+class TokenRefreshScenario(Scenario):
+    name = 'token_refresh'
+    method = 'post'
+
+    def prepare(self, state, index):
+        field = 'token' if settings.AUTH_TOKEN_MODE == 'sliding' else 'refresh'
+        return '/users/token/refresh', {field: state.refresh}, {}
+
+    def handle(self, state, response) -> None:
+        if response.status_code == 200:
+            data = response.json()
+            state.refresh = data.get('refresh', data.get('token'))
+
+
+class LogoutScenario(Scenario):
+    name = 'logout'
+    method = 'post'
+    expected_status = 205
+
+    def prepare(self, state, index):
+        if settings.AUTH_TOKEN_MODE == 'sliding':
+            return '/users/logout', {'token': str(SlidingToken.for_user(state.user))}, state.headers
+        return '/users/logout', {'refresh': str(RefreshToken.for_user(user=state.user))}, state.headers
+
+
+class AddressListScenario(Scenario):
+    name = 'address_list'
+
+    def prepare(self, state, index):
+        return '/users/addresses', None, state.headers
+
+
+class AddressCreateScenario(Scenario):
+    name = 'address_create'
+    method = 'post'
+    expected_status = 201
+
+    def prepare(self, state, index):
+        return '/users/addresses', dict(ADDRESS_DATA, flat=str(index)), state.headers
+
+
+class AddressUpdateScenario(Scenario):
+    name = 'address_update'
+    method = 'patch'
+
+    def prepare(self, state, index):
+        address_id = state.address_ids[index % len(state.address_ids)]
+        return f'/users/addresses/{address_id}', {'flat': str(index)}, state.headers
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in (
+        RegisterScenario, LoginScenario, TokenRefreshScenario, LogoutScenario,
+        AddressListScenario, AddressCreateScenario, AddressUpdateScenario
+    )
+}
+
+
+class BenchmarkRunner:
+    """
+        Прогон сценариев через тестовый клиент Django (WSGI в процессе, без сети):
+        clients потоков, по requests запросов на поток после warmup прогревочных
+    """
+    def __init__(self, clients=4, requests=50, warmup=5):
+        self.clients = clients
+        self.requests = requests
+        self.warmup = warmup
+        self.run_id = secrets.token_hex(4)
+
+    def run(self, scenario_names):
+        connection_created.connect(configure_sqlite, dispatch_uid='user_app_bench_sqlite')
+        # Уже открытое соединение (migrate) создано без настроек
+        connections.close_all()
+        try:
+            states = [ClientState(number, self.run_id) for number in range(self.clients)]
+            results = {name: self.run_scenario(SCENARIOS[name](), states) for name in scenario_names}
+        finally:
+            connection_created.disconnect(dispatch_uid='user_app_bench_sqlite')
+        return {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'clients': self.clients,
+                'requests': self.requests,
+                'warmup': self.warmup,
+            },
+            'scenarios': results,
+        }
+
+    def run_scenario(self, scenario, states):
+        lock = threading.Lock()
+        samples, queries, errors = [], [], []
+
+        def worker(state):
+            try:
+                for index in range(self.warmup + self.requests):
+                    try:
+                        path, data, headers = scenario.prepare(state, index)
+                        request = getattr(state.client, scenario.method)
+                        with CaptureQueriesContext(connection) as captured:
+                            started = time.perf_counter()
+                            response = request(path, data=data, content_type='application/json', **headers)
+                            elapsed = time.perf_counter() - started
+                        scenario.handle(state, response)
+                    except Exception as error:
+                        # Ошибка одного запроса (например, блокировка БД) не прерывает прогон
+                        print(f'Error while bench request {scenario.name}: {error}')
+                        if index >= self.warmup:
+                            with lock:
+                                errors.append(type(error).__name__)
+                        continue
+                    if index < self.warmup:
+                        continue
+                    with lock:
+                        samples.append(elapsed)
+                        queries.append(len(captured))
+                        if response.status_code != scenario.expected_status:
+                            errors.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(states)) as executor:
+            list(executor.map(worker, states))
+        wall_time = time.perf_counter() - started
+
+        samples.sort()
+        return {
+            'count': len(samples),
+            'errors': len(errors),
+            # Коды ответов и имена исключений запросов, завершившихся ошибкой
+            'error_statuses': sorted(set(errors), key=str),
+            'mean_ms': round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0,
+            'p50_ms': round(percentile(samples, 50) * 1000, 3),
+            'p95_ms': round(percentile(samples, 95) * 1000, 3),
+            'p99_ms': round(percentile(samples, 99) * 1000, 3),
+            'throughput_rps': round(len(samples) / wall_time, 2) if wall_time else 0.0,
+            'queries_per_request': round(sum(queries) / len(queries), 2) if queries else 0.0,
+        }
+
+
+def compare(results, baseline, threshold):
+    """
+        Сравнить результаты с сохранённым baseline.
+        Возвращает строки {scenario, metric, baseline, current, change, regression}
+    """
+    rows = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if old is None or new is None:
+                continue
+            if old == 0:
+                # Например, запросы к БД появились там, где их не было
+                change = 0.0 if new == 0 else math.inf
+            else:
+                change = (new - old) / old
+            regression = change > threshold if higher_is_worse else change < -threshold
+            rows.append(dict(
+                scenario=name, metric=metric, baseline=old, current=new,
+                change=round(change, 4) if math.isfinite(change) else change, regression=regression
+            ))
+    return rows
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+def cache_is_shared(alias) -> bool:
+    """
+        Кэш виден всем воркерам: LocMemCache живёт в памяти процесса, DummyCache ничего не хранит
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+@register()
+def check_sliding_token_denylist(app_configs, **kwargs):
+    """
+        Отзыв sliding-токена хранится только в кэше: с кэшем в памяти процесса
+        токен, отозванный в одном воркере, продолжит работать в остальных
+    """
+    if settings.AUTH_TOKEN_MODE != 'sliding':
+        return []
+    alias = settings.SLIDING_TOKEN_DENYLIST['CACHE_ALIAS']
+    if cache_is_shared(alias):
+        return []
+    return [Error(
+        f"SLIDING_TOKEN_DENYLIST['CACHE_ALIAS'] = '{alias}' не общий для воркеров кэш",
+        hint='Для AUTH_TOKEN_MODE=sliding укажите кэш Redis/Memcached/БД (SLIDING_TOKEN_DENYLIST_CACHE)',
+        id='user_app.E001',
+    )]
+
+
+@register()
+def check_replica_pin_cache(app_configs, **kwargs):
+    """
+        Закрепление чтений за primary после записи (read-your-writes) хранится в кэше:
+        с кэшем в памяти процесса следующий запрос в другом воркере прочитает реплику
+    """
+    if not settings.DATABASE_REPLICAS:
+        return []
+    alias = settings.REPLICA_ROUTING['CACHE_ALIAS']
+    if cache_is_shared(alias):
+        return []
+    return [Error(
+        f"REPLICA_ROUTING['CACHE_ALIAS'] = '{alias}' не общий для воркеров кэш",
+        hint='С DB_REPLICA_HOSTS укажите кэш Redis/Memcached/БД (DB_REPLICA_PIN_CACHE)',
+        id='user_app.E002',
+    )]
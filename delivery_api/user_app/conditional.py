@@ -0,0 +1,49 @@
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .versioning import get_user_version
+
+
+def get_validators(request, scope, user_id):
+    """
+        ETag и Last-Modified ответа по версии данных пользователя (с общим кэшем - без обращения к БД).
+        Формат ответа входит в ETag: JSON и browsable API - разные представления
+    """
+    version, modified = get_user_version(user_id)
+    renderer = getattr(request, 'accepted_renderer', None)
+    fmt = renderer.format if renderer is not None else 'json'
+    return f'"{scope}-{user_id}-{version}-{fmt}"', int(modified)
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    # Данные пользователя: только приватный кэш и обязательная перепроверка
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+class ConditionalGetMixin:
+    """
+        Conditional GET для list/retrieve: метка версии читается до запроса данных,
+        при совпадении If-None-Match/If-Modified-Since возвращается 304 без загрузки строк
+    """
+    conditional_scope = None
+
+    def get_conditional_user_id(self):
+        return self.request.user.pk
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = get_validators(request, self.conditional_scope, self.get_conditional_user_id())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,145 @@
+import atexit
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+
+class OrderCountBuffer:
+    """
+        Буфер счётчиков заказов по адресам.
+        Инкременты копятся в памяти по address_id и сбрасываются в БД одним
+        UPDATE на пачку: по таймеру, при достижении порога или при завершении процесса.
+        Буфер не переживает аварийного завершения процесса (kill -9, OOM): теряется до
+        flush_interval секунд инкрементов, поэтому режим 'buffered' включается явно
+    """
+    def __init__(self, flush_interval=None, max_pending=None, batch_size=None):
+        self.flush_interval = flush_interval or settings.ORDER_COUNTER_FLUSH_INTERVAL
+        self.max_pending = max_pending or settings.ORDER_COUNTER_MAX_PENDING
+        self.batch_size = batch_size or settings.ORDER_COUNTER_BATCH_SIZE
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        self._atexit_registered = False
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def add(self, address_id, ordered_at=None, count=1) -> None:
+        """
+            Учесть заказ по адресу. В синхронном режиме изменение сразу пишется в БД
+        """
+        ordered_at = ordered_at or timezone.now()
+        if settings.ORDER_COUNTER_MODE == 'sync' or self._stop.is_set():
+            # После shutdown сбрасывать буфер некому - пишем сразу
+            self.apply({address_id: (count, ordered_at)})
+            return
+        self._register_atexit()
+        with self._lock:
+            cur_count, last_order = self._pending.get(address_id, (0, ordered_at))
+            self._pending[address_id] = (cur_count + count, max(last_order, ordered_at))
+            overflow = len(self._pending) >= self.max_pending
+        self._ensure_worker()
+        if overflow:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+            Сбросить накопленные инкременты в БД, возвращает количество обновлённых адресов
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            try:
+                return self.apply(pending)
+            except Exception as error:
+                print(f'Error while flush order counters: {error}')
+                self._restore(pending)
+                raise
+
+    def apply(self, increments) -> int:
+        """
+            Применить инкременты вида {address_id: (count, last_order)} set-based UPDATE'ами
+        """
+        from .list_cache import address_list_cache
+        from .models import UserAddresses
+        from .ranking import update_rankings
+        from .versioning import bump_user_version
+
+        updated = 0
+        items = list(increments.items())
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            count_case = Case(
+                *(When(pk=address_id, then=Value(count)) for address_id, (count, _) in batch),
+                default=Value(0)
+            )
+            # События могут приходить не по порядку - last_order не сдвигается назад
+            last_order_case = Case(
+                *(
+                    When(pk=address_id, then=Greatest(F('last_order'), Value(last_order)))
+                    for address_id, (_, last_order) in batch
+                ),
+                default=F('last_order')
+            )
+            queryset = UserAddresses.objects.filter(pk__in=[address_id for address_id, _ in batch])
+            with transaction.atomic():
+                updated += queryset.update(order_count=F('order_count') + count_case, last_order=last_order_case)
+                # Порядок и order_count в списке адресов изменились - рейтинги, ETag и кэш списка владельцев
+                user_ids = update_rankings(queryset)
+                bump_user_version(*user_ids)
+                address_list_cache.invalidate(*user_ids)
+        return updated
+
+    def shutdown(self) -> None:
+        """
+            Остановить фоновый сброс и записать всё, что осталось в буфере
+        """
+        self._stop.set()
+        if self._worker is not None and self._worker is not threading.current_thread():
+            self._worker.join(timeout=self.flush_interval)
+        self.flush()
+
+    def _restore(self, pending) -> None:
+        with self._lock:
+            for address_id, (count, last_order) in pending.items():
+                cur_count, cur_last_order = self._pending.get(address_id, (0, last_order))
+                self._pending[address_id] = (cur_count + count, max(cur_last_order, last_order))
+
+    def _register_atexit(self) -> None:
+        # До первого инкремента в буфере: остаток сбрасывается при выходе, даже если поток не запустился
+        if self._atexit_registered:
+            return
+        with self._lock:
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='order-counter-flush', daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as error:
+                # Инкременты возвращены в буфер, следующая попытка - через flush_interval
+                print(f'Error while background flush order counters: {error}')
+            finally:
+                connections.close_all()
+
+
+order_counter = OrderCountBuffer()
@@ -0,0 +1,12 @@
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+
+from ...pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, PostgresDatabaseWrapper):
+    """
+        PostgreSQL (psycopg2) с пулом соединений
+    """
+    @staticmethod
+    def is_connection_closed(conn):
+        return bool(conn.closed)
@@ -0,0 +1,9 @@
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+
+from ...pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, SQLiteDatabaseWrapper):
+    """
+        SQLite с пулом соединений - замена PostgreSQL для локальной проверки пула
+    """
@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_POOL_CONFIG = {
+    'MIN_SIZE': 0,
+    'MAX_SIZE': 10,
+    # Сколько ждать свободное соединение, сек
+    'TIMEOUT': 10.0,
+    # Максимальное время жизни соединения, сек (None - без ограничения)
+    'MAX_LIFETIME': 1800,
+    # Проверка соединения при выдаче: 'ping' - SELECT 1, 'none' - только признак закрытия
+    'HEALTH_CHECK': 'ping',
+}
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+        Пул DB-API соединений процесса.
+        connect() открывает новое соединение, ping(conn) проверяет его, is_closed(conn) - признак закрытия.
+        При выдаче соединение проверяется и заменяется, если сломано или старше MAX_LIFETIME.
+        Больше MAX_SIZE соединений не открывается - запрос ждёт возврата не дольше TIMEOUT
+    """
+    def __init__(self, connect, ping=None, is_closed=None, **config):
+        self.config = dict(DEFAULT_POOL_CONFIG, **config)
+        self._connect = connect
+        self._ping = ping
+        self._is_closed = is_closed
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._condition = threading.Condition()
+        self.stats = dict(checkouts=0, waits=0, timeouts=0, created=0, discarded=0, health_check_failures=0)
+        self.prefill()
+
+    def prefill(self) -> None:
+        while self._size < self.config['MIN_SIZE']:
+            conn = self._open()
+            with self._condition:
+                self._idle.append(conn)
+
+    def getconn(self):
+        deadline = time.monotonic() + self.config['TIMEOUT']
+        while True:
+            with self._condition:
+                conn = self._idle.pop() if self._idle else None
+                if conn is None and self._size >= self.config['MAX_SIZE']:
+                    self.stats['waits'] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        self.stats['timeouts'] += 1
+                        raise PoolTimeout(f'Нет свободных соединений в пуле за {self.config["TIMEOUT"]} сек')
+                    continue
+                if conn is None:
+                    # Резервируем место до открытия соединения вне блокировки
+                    self._size += 1
+            if conn is None:
+                try:
+                    conn = self._open(reserved=True)
+                except Exception:
+                    self._release_slot()
+                    raise
+            elif not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+            self.stats['checkouts'] += 1
+            return conn
+
+    def putconn(self, conn, discard=False) -> None:
+        if discard or self._expired(conn) or self._closed(conn):
+            self._discard(conn)
+            return
+        try:
+            # Незавершённая транзакция не должна достаться следующему запросу
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._condition:
+            self._idle.append(conn)
+            self._condition.notify()
+
+    def close(self) -> None:
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            self._discard(conn)
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            stats = dict(self.stats, size=self._size, idle=len(self._idle))
+        stats['in_use'] = stats['size'] - stats['idle']
+        return stats
+
+    def _open(self, reserved=False):
+        if not reserved:
+            with self._condition:
+                self._size += 1
+        try:
+            conn = self._connect()
+        except Exception:
+            if not reserved:
+                self._release_slot()
+            raise
+        self._created_at[id(conn)] = time.monotonic()
+        self.stats['created'] += 1
+        return conn
+
+    def _discard(self, conn) -> None:
+        self._created_at.pop(id(conn), None)
+        self.stats['discarded'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _expired(self, conn):
+        max_lifetime = self.config['MAX_LIFETIME']
+        created_at = self._created_at.get(id(conn))
+        return max_lifetime is not None and created_at is not None and time.monotonic() - created_at > max_lifetime
+
+    def _closed(self, conn):
+        return self._is_closed is not None and self._is_closed(conn)
+
+    def _is_healthy(self, conn):
+        if self._expired(conn) or self._closed(conn):
+            return False
+        if self.config['HEALTH_CHECK'] != 'ping' or self._ping is None:
+            return True
+        try:
+            self._ping(conn)
+            return True
+        except Exception:
+            self.stats['health_check_failures'] += 1
+            return False
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, factory):
+    """
+        Пул для alias в текущем процессе; после fork создаётся новый
+    """
+    pid = os.getpid()
+    pool = _pools.get(alias)
+    if pool is None or pool[0] != pid:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None or pool[0] != pid:
+                pool = _pools[alias] = (pid, factory())
+    return pool[1]
+
+
+def get_all_stats() -> dict:
+    pid = os.getpid()
+    return {alias: pool.get_stats() for alias, (pool_pid, pool) in list(_pools.items()) if pool_pid == pid}
+
+
+def close_all() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for _, pool in pools:
+        pool.close()
+
+
+class PooledDatabaseWrapperMixin:
+    """
+        Подмешивается к DatabaseWrapper бэкенда: соединение берётся из пула процесса,
+        а close() возвращает его в пул. Настройки - в DATABASES[alias]['POOL'] (см. DEFAULT_POOL_CONFIG);
+        CONN_MAX_AGE должен быть 0, чтобы соединение возвращалось в пул в конце запроса
+    """
+    pool = None
+
+    def get_pool(self, conn_params):
+        return get_pool(self.alias, lambda: ConnectionPool(
+            connect=lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params),
+            ping=self.ping_connection,
+            is_closed=self.is_connection_closed,
+            **self.settings_dict.get('POOL', {})
+        ))
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        try:
+            return self.pool.getconn()
+        except PoolTimeout as error:
+            raise self.Database.OperationalError(str(error)) from error
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # После ошибки соединение может быть сломано - не возвращаем его в пул
+                self.pool.putconn(self.connection, discard=self.errors_occurred)
+
+    @staticmethod
+    def ping_connection(conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def is_connection_closed(conn):
+        return False
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from rest_framework.exceptions import APIException
+
+from .instrumentation import timer
+
+
+class PasswordHashingUnavailable(APIException):
+    status_code = 503
+    default_detail = 'Сервер перегружен, повторите попытку позже'
+    default_code = 'password_hashing_unavailable'
+
+
+class PasswordHashingPool:
+    """
+        Ограниченный пул потоков для хэширования и проверки паролей.
+        PBKDF2 из hashlib отпускает GIL, поэтому потоки считают хэши параллельно.
+        Одновременно принимается не больше MAX_WORKERS + MAX_QUEUE задач,
+        сверх этого запрос сразу отклоняется с 503, а не занимает воркер
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+        self.stats = dict(submitted=0, rejected=0, timeouts=0)
+
+    @property
+    def config(self):
+        return settings.PASSWORD_HASHING_POOL
+
+    def _get_executor(self):
+        # Пул создаётся лениво и заново после fork (gunicorn --preload)
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    config = self.config
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=config['MAX_WORKERS'], thread_name_prefix='password-hashing'
+                    )
+                    self._slots = threading.BoundedSemaphore(config['MAX_WORKERS'] + config['MAX_QUEUE'])
+                    self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        return self._submit(fn, args, kwargs)
+
+    def _submit(self, fn, args, kwargs, timeout=None):
+        executor = self._get_executor()
+        acquired = self._slots.acquire(timeout=timeout) if timeout else self._slots.acquire(blocking=False)
+        if not acquired:
+            self.stats['rejected'] += 1
+            raise PasswordHashingUnavailable()
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        self.stats['submitted'] += 1
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """
+            Выполнить fn в пуле и дождаться результата
+        """
+        with timer('hash'):
+            if not self.config['ENABLED']:
+                return fn(*args, **kwargs)
+            future = self.submit(fn, *args, **kwargs)
+            try:
+                return future.result(timeout=self.config['TIMEOUT'])
+            except TimeoutError:
+                self.stats['timeouts'] += 1
+                raise PasswordHashingUnavailable()
+
+    def map(self, fn, items) -> list:
+        """
+            Выполнить fn для каждого элемента (массовые операции в запросе). В пуле одновременно
+            не больше MAX_WORKERS задач пачки, место в очереди ждётся до TIMEOUT: пачка не отбирает
+            очередь у одиночных логинов и регистраций и не создаёт собственных процессов
+        """
+        with timer('hash'):
+            config = self.config
+            if not config['ENABLED']:
+                return [fn(item) for item in items]
+            items, results = list(items), []
+            for start in range(0, len(items), config['MAX_WORKERS']):
+                futures = [
+                    self._submit(fn, (item,), {}, timeout=config['TIMEOUT'])
+                    for item in items[start:start + config['MAX_WORKERS']]
+                ]
+                try:
+                    results.extend(future.result(timeout=config['TIMEOUT']) for future in futures)
+                except TimeoutError:
+                    self.stats['timeouts'] += 1
+                    raise PasswordHashingUnavailable()
+            return results
+
+    async def arun(self, fn, *args, **kwargs):
+        """
+            Выполнить fn в пуле, не блокируя event loop
+        """
+        with timer('hash'):
+            if not self.config['ENABLED']:
+                return fn(*args, **kwargs)
+            future = asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+            try:
+                return await asyncio.wait_for(future, timeout=self.config['TIMEOUT'])
+            except asyncio.TimeoutError:
+                self.stats['timeouts'] += 1
+                raise PasswordHashingUnavailable()
+
+
+password_hashing_pool = PasswordHashingPool()
@@ -0,0 +1,321 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# Границы бакетов гистограмм: длительности в секундах и количество запросов к БД
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+        Замеры одного запроса: суммарное время по фазам (db, serialize, render, hash, jwt) и число запросов к БД
+    """
+    __slots__ = ('phases', 'queries', '_active')
+
+    def __init__(self):
+        self.phases = {}
+        self.queries = 0
+        self._active = set()
+
+    def add(self, phase, seconds) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+def current_metrics():
+    return _current.get()
+
+
+@contextmanager
+def timer(phase):
+    """
+        Учесть время блока в фазе текущего запроса. Вложенные замеры той же фазы не суммируются повторно
+    """
+    metrics = _current.get()
+    if metrics is None or phase in metrics._active:
+        yield
+        return
+    metrics._active.add(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(phase, time.perf_counter() - started)
+        metrics._active.discard(phase)
+
+
+def timed(phase):
+    """
+        Декоратор: учесть время вызова функции в фазе текущего запроса
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.add('db', time.perf_counter() - started)
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """
+        Обработчик connection_created: обёртка ставится один раз на соединение
+        и вне запроса (воркеры, команды) ничего не делает
+    """
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    return ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels)
+
+
+class MetricsRegistry:
+    """
+        Метрики процесса в формате Prometheus text exposition.
+        Счётчики и гистограммы живут в памяти процесса: при нескольких воркерах каждый отдаёт свои,
+        агрегацию делает Prometheus. Коллекторы отдают текущие значения сторонних счётчиков (кэши, пулы)
+    """
+    def __init__(self, prefix='delivery_api'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, metric_type, help_text) -> None:
+        self._help[name] = (metric_type, help_text)
+
+    def observe(self, name, labels, value, buckets=SECONDS_BUCKETS) -> None:
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, labels, value=1) -> None:
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_collector(self, collector) -> None:
+        """
+            collector() -> iterable of (name, type, help, [(labels, value), ...])
+        """
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+        described = set()
+
+        def header(name):
+            if name in described:
+                return
+            described.add(name)
+            metric_type, help_text = self._help.get(name, ('untyped', ''))
+            lines.append(f'# HELP {self.prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {self.prefix}_{name} {metric_type}')
+
+        for (name, labels), value in counters:
+            header(name)
+            lines.append(f'{self.prefix}_{name}{{{_format_labels(labels)}}} {value}')
+        for (name, labels), histogram in histograms:
+            header(name)
+            label_text = _format_labels(labels)
+            cumulative = 0
+            for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+                cumulative += count
+                lines.append(f'{self.prefix}_{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.prefix}_{name}_sum{{{label_text}}} {histogram.sum}')
+            lines.append(f'{self.prefix}_{name}_count{{{label_text}}} {histogram.count}')
+        for collector in self._collectors:
+            try:
+                for name, metric_type, help_text, samples in collector():
+                    lines.append(f'# HELP {self.prefix}_{name} {help_text}')
+                    lines.append(f'# TYPE {self.prefix}_{name} {metric_type}')
+                    for labels, value in samples:
+                        label_text = f'{{{_format_labels(labels)}}}' if labels else ''
+                        lines.append(f'{self.prefix}_{name}{label_text} {value}')
+            except Exception as error:
+                print(f'Error while collect metrics: {error}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+registry.describe('request_phase_seconds', 'histogram', 'Время запроса по фазам (total, db, serialize, render, hash, jwt)')
+registry.describe('request_db_queries', 'histogram', 'Количество SQL-запросов на HTTP-запрос')
+registry.describe('requests_total', 'counter', 'HTTP-запросы по view, методу и классу статуса')
+
+
+def collect_app_stats():
+    """
+        Счётчики кэшей и пулов приложения
+    """
+    from django.db import router
+
+    from .counters import order_counter
+    from .routers import ReplicaRouter
+    from .db.pool import get_all_stats as get_pool_stats
+    from .hashing import password_hashing_pool
+    from .list_cache import address_list_cache
+    from .throttling import auth_throttle
+    from .token_cache import sliding_token_denylist, token_blacklist_cache
+
+    yield 'token_blacklist_cache', 'gauge', 'Кэш чёрного списка refresh-токенов', [
+        ((('stat', name),), value) for name, value in token_blacklist_cache.get_stats().items()
+    ]
+    yield 'sliding_token_denylist', 'gauge', 'Отозванные sliding-токены', [
+        ((('stat', name),), value) for name, value in sliding_token_denylist.get_stats().items()
+    ]
+    yield 'address_list_cache', 'gauge', 'Кэш списков адресов', [
+        ((('stat', name),), value) for name, value in address_list_cache.get_stats().items()
+    ]
+    yield 'password_hashing_pool', 'gauge', 'Пул хэширования паролей', [
+        ((('stat', name),), value) for name, value in password_hashing_pool.stats.items()
+    ]
+    yield 'db_pool', 'gauge', 'Пулы соединений с БД', [
+        ((('alias', alias), ('stat', name)), value)
+        for alias, stats in get_pool_stats().items() for name, value in stats.items()
+    ]
+    for db_router in router.routers:
+        if isinstance(db_router, ReplicaRouter) and db_router.replicas:
+            yield 'db_replica_router', 'gauge', 'Маршрутизация чтений в реплики', [
+                ((('stat', name),), value) for name, value in db_router.get_stats().items()
+            ]
+    yield 'auth_throttle', 'gauge', 'Лимиты login/register', [
+        ((('stat', name),), value) for name, value in auth_throttle.get_stats().items()
+    ]
+    yield 'order_counter_pending', 'gauge', 'Адреса с несброшенными счётчиками заказов', [((), order_counter.pending)]
+
+
+registry.register_collector(collect_app_stats)
+
+
+def collect_token_stats():
+    """
+        Размеры таблиц токенов (отдельный коллектор: недоступная БД не скрывает остальные метрики)
+    """
+    from .token_lifecycle import purge_stats, token_table_stats
+
+    yield 'token_tables', 'gauge', 'Таблицы refresh-токенов: строки, размер, истёкшие строки', [
+        ((('table', table), ('stat', name)), value)
+        for table, stats in token_table_stats.get().items() for name, value in stats.items()
+    ]
+    yield 'token_purge', 'gauge', 'Очистка истёкших токенов в этом процессе', [
+        ((('stat', name),), value) for name, value in purge_stats.items()
+    ]
+
+
+registry.register_collector(collect_token_stats)
+
+
+class RequestMetricsMiddleware:
+    """
+        Замеры запроса по имени URL (users:addresses-list, users:login ...):
+        общее время, БД (время и число запросов), сериализация, рендеринг, хэширование, JWT.
+        Пишет Server-Timing и гистограммы в registry (см. metrics_view).
+        Работает и в синхронной, и в асинхронной цепочке: под ASGI не переключает запрос в поток
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.REQUEST_METRICS['ENABLED']:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.record(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not settings.REQUEST_METRICS['ENABLED']:
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.record(request, response, metrics, time.perf_counter() - started)
+
+    @staticmethod
+    def record(request, response, metrics, total):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match is not None else '<unresolved>'
+        if view_name == 'metrics':
+            return response
+        phases = dict(metrics.phases, total=total)
+        for phase, seconds in phases.items():
+            registry.observe('request_phase_seconds', (('view', view_name), ('phase', phase)), seconds)
+        registry.observe('request_db_queries', (('view', view_name),), metrics.queries, QUERIES_BUCKETS)
+        registry.inc('requests_total', (
+            ('view', view_name), ('method', request.method), ('status', f'{response.status_code // 100}xx')
+        ))
+        if settings.REQUEST_METRICS['SERVER_TIMING']:
+            entries = [
+                f'{phase};dur={seconds * 1000:.2f}' + (f';desc="{metrics.queries} queries"' if phase == 'db' else '')
+                for phase, seconds in phases.items()
+            ]
+            response['Server-Timing'] = ', '.join(entries)
+        return response
@@ -0,0 +1,217 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework.response import Response
+
+from .versioning import get_user_version
+
+
+class LocMemListCacheBackend:
+    """
+        LRU-кэш в памяти процесса. Значения хранятся без копирования - их нельзя изменять
+    """
+    def __init__(self, max_entries=10000, **kwargs):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout) -> None:
+        expires_at = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoListCacheBackend:
+    """
+        Хранение в кэше Django (Redis/Memcached): один кэш на все процессы.
+        Вытеснения считает сам кэш, здесь они не видны
+    """
+    def __init__(self, cache_alias='default', **kwargs):
+        self.cache_alias = cache_alias
+        self.evictions = 0
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout) -> None:
+        self.cache.set(key, value, timeout=timeout)
+
+    def delete(self, key) -> None:
+        self.cache.delete(key)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+class ListCache:
+    """
+        Кэш готовых ответов списка по пользователю: одна запись на пользователя,
+        внутри - страницы по URL запроса (не больше MAX_PAGES).
+        Запись помечена версией данных пользователя и при её смене считается устаревшей,
+        поэтому записи, не прошедшие через invalidate (async-view, bulk_create), не отдаются.
+        Одновременные промахи по одной записи в процессе собирают данные один раз (single-flight)
+    """
+    def __init__(self, prefix, settings_name):
+        self.prefix = prefix
+        self.settings_name = settings_name
+        self._backend = None
+        self._backend_config = None
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self.stats = dict(hits=0, misses=0, coalesced=0, stale=0, invalidations=0)
+
+    @property
+    def config(self):
+        return getattr(settings, self.settings_name)
+
+    @property
+    def backend(self):
+        config = self.config
+        if self._backend is None or self._backend_config is not config:
+            self._backend = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+            self._backend_config = config
+        return self._backend
+
+    def _key(self, user_id):
+        return f'{self.prefix}:{user_id}'
+
+    def _lookup(self, key, version, page_key, count_stale=True):
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        if entry['version'] != version:
+            if count_stale:
+                self.stats['stale'] += 1
+            return None
+        return entry['pages'].get(page_key)
+
+    def get_or_set(self, user_id, page_key, builder):
+        """
+            Вернуть страницу из кэша или собрать её builder() и сохранить
+        """
+        if not self.config['ENABLED']:
+            return builder()
+        key = self._key(user_id)
+        # Версия читается до сборки: если данные изменятся во время сборки, запись сразу устареет
+        version, _ = get_user_version(user_id)
+        data = self._lookup(key, version, page_key)
+        if data is not None:
+            self.stats['hits'] += 1
+            return data
+
+        lock = self._acquire_lock(key)
+        try:
+            data = self._lookup(key, version, page_key, count_stale=False)
+            if data is not None:
+                self.stats['coalesced'] += 1
+                return data
+            self.stats['misses'] += 1
+            data = builder()
+            self._store(key, version, page_key, data)
+            return data
+        finally:
+            self._release_lock(key, lock)
+
+    def invalidate(self, *user_ids) -> None:
+        """
+            Удалить записи пользователей сейчас и повторно после коммита транзакции
+        """
+        if not user_ids or not self.config['ENABLED']:
+            return
+        keys = [self._key(user_id) for user_id in user_ids]
+
+        def delete():
+            for key in keys:
+                self.backend.delete(key)
+
+        delete()
+        transaction.on_commit(delete)
+        self.stats['invalidations'] += len(keys)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats['evictions'] = self.backend.evictions
+        return stats
+
+    def _store(self, key, version, page_key, data) -> None:
+        entry = self.backend.get(key)
+        if entry is None or entry['version'] != version:
+            entry = {'version': version, 'pages': {}}
+        pages = dict(entry['pages'])
+        if page_key not in pages and len(pages) >= self.config['MAX_PAGES']:
+            pages.pop(next(iter(pages)))
+        pages[page_key] = data
+        self.backend.set(key, {'version': version, 'pages': pages}, self.config['TIMEOUT'])
+
+    def _acquire_lock(self, key):
+        with self._locks_lock:
+            lock, waiters = self._locks.get(key, (None, 0))
+            if lock is None:
+                lock = threading.Lock()
+            self._locks[key] = (lock, waiters + 1)
+        lock.acquire()
+        return lock
+
+    def _release_lock(self, key, lock) -> None:
+        lock.release()
+        with self._locks_lock:
+            _, waiters = self._locks[key]
+            if waiters <= 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, waiters - 1)
+
+
+class CachedListMixin:
+    """
+        Кэширование ответа list() по пользователю в list_cache
+    """
+    list_cache = None
+
+    def list(self, request, *args, **kwargs):
+        data = self.list_cache.get_or_set(
+            request.user.pk, request.build_absolute_uri(),
+            lambda: super(CachedListMixin, self).list(request, *args, **kwargs).data
+        )
+        return Response(data)
+
+
+address_list_cache = ListCache('address-list', 'ADDRESS_LIST_CACHE')
@@ -0,0 +1,65 @@
+import json
+import sys
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ...benchmark import SCENARIOS, BenchmarkRunner, compare
+
+
+class Command(BaseCommand):
+    help = (
+        'Офлайн-бенчмарк API: p50/p95/p99, пропускная способность и запросы к БД на запрос. '
+        'Запуск: DJANGO_SETTINGS_MODULE=delivery_api.settings_bench python manage.py bench_api'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=4, help='Количество параллельных клиентов')
+        parser.add_argument('--requests', type=int, default=50, help='Запросов на клиента в каждом сценарии')
+        parser.add_argument('--warmup', type=int, default=5, help='Прогревочных запросов на клиента (не учитываются)')
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS.keys(), default=list(SCENARIOS.keys()))
+        parser.add_argument('--output', help='Записать результаты в JSON-файл ("-" - в stdout)')
+        parser.add_argument('--baseline', help='JSON-файл с результатами предыдущего прогона для сравнения')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Допустимое ухудшение метрики (доля)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Завершиться с ошибкой при регрессии')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Бенчмарк создаёт тестовые данные и запускается только с профилем '
+                               'delivery_api.settings_bench (SQLite)')
+        call_command('migrate', verbosity=0, interactive=False)
+
+        runner = BenchmarkRunner(clients=options['clients'], requests=options['requests'], warmup=options['warmup'])
+        results = runner.run(options['scenarios'])
+
+        self.stdout.write(f'{"scenario":<16}{"p50":>10}{"p95":>10}{"p99":>10}{"rps":>10}{"queries":>9}{"errors":>8}')
+        for name, result in results['scenarios'].items():
+            self.stdout.write(
+                f'{name:<16}{result["p50_ms"]:>10.2f}{result["p95_ms"]:>10.2f}{result["p99_ms"]:>10.2f}'
+                f'{result["throughput_rps"]:>10.1f}{result["queries_per_request"]:>9.2f}{result["errors"]:>8}'
+            )
+
+        if options['output'] == '-':
+            json.dump(results, sys.stdout, indent=2)
+            sys.stdout.write('\n')
+        elif options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                json.dump(results, output_file, indent=2)
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as baseline_file:
+                baseline = json.load(baseline_file)
+            for key in ('clients', 'requests', 'database'):
+                if baseline.get('meta', {}).get(key) != results['meta'][key]:
+                    self.stderr.write(f'Параметр {key} отличается от baseline - сравнение может быть некорректным')
+            rows = compare(results, baseline, options['threshold'])
+            regressions = [row for row in rows if row['regression']]
+            for row in rows:
+                mark = 'REGRESSION' if row['regression'] else 'ok'
+                self.stdout.write(
+                    f'{row["scenario"]:<16}{row["metric"]:<22}{row["baseline"]:>10}{row["current"]:>10}'
+                    f'{row["change"] * 100:>+9.1f}%  {mark}'
+                )
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f'Регрессий: {len(regressions)}')
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from ...models import User, UserAddresses
+from ...projections import ValuesProjection
+from ...renderers import FastJSONRenderer
+from ...serializers import UserAddressSerializer
+
+
+class Command(BaseCommand):
+    help = 'Сравнение сериализатора + JSONRenderer с ValuesProjection + FastJSONRenderer на списке адресов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='Размеры списка')
+        parser.add_argument('--repeat', type=int, default=20, help='Количество повторов на размер')
+
+    def handle(self, *args, **options):
+        projection = ValuesProjection(UserAddressSerializer)
+        # Тестовые строки создаются в транзакции и откатываются в конце
+        with transaction.atomic():
+            user = User.objects.create(
+                username='bench_serializers', email='bench_serializers@mail.ru', first_name='bench',
+                last_name='bench', birthday='2023-02-23'
+            )
+            UserAddresses.objects.bulk_create(
+                UserAddresses(user=user, city='Москва', street='Тверская', house=str(index), entrance=1, floor=1,
+                              flat=str(index), order_count=index % 10)
+                for index in range(max(options['sizes']))
+            )
+            queryset = UserAddresses.objects.filter(user=user).order_by('pk')
+            for size in options['sizes']:
+                page = queryset[:size]
+                baseline = self.measure(
+                    lambda: JSONRenderer().render(UserAddressSerializer(page, many=True).data), options['repeat']
+                )
+                fast = self.measure(
+                    lambda: FastJSONRenderer().render(projection.represent_many(projection.values(page))),
+                    options['repeat']
+                )
+                self.stdout.write(
+                    f'{size:>6} строк: serializer {baseline * 1000:.2f} мс, projection {fast * 1000:.2f} мс, '
+                    f'ускорение x{baseline / fast:.1f}'
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def measure(func, repeat):
+        func()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ...schema import write_schema
+
+
+class Command(BaseCommand):
+    help = 'Сгенерировать OpenAPI-схему (swagger.json/swagger.yaml) в OPENAPI_SCHEMA_DIR'
+
+    def handle(self, *args, **options):
+        for path in write_schema():
+            self.stdout.write(f'Схема записана: {path}')
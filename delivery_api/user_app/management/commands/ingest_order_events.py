@@ -0,0 +1,59 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ParseError
+
+from ...order_events import OrderEventIngestor
+from ...parsers import JSONArrayStreamParser, NDJSONParser, CSVParser
+
+PARSERS = {'json': JSONArrayStreamParser, 'ndjson': NDJSONParser, 'csv': CSVParser}
+
+
+class Command(BaseCommand):
+    help = 'Приём событий заказов (event_id, address_id, ordered_at) из CSV/NDJSON/JSON-файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='Путь к файлу или "-" для stdin')
+        parser.add_argument('--format', choices=PARSERS.keys(), help='Формат файла (по умолчанию по расширению)')
+        parser.add_argument('--batch-size', type=int, help='Событий в одной транзакции')
+        parser.add_argument(
+            '--purge', action='store_true', help='Удалить event_id старше ORDER_EVENTS["RETENTION_DAYS"]'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if path is None and not options['purge']:
+            raise CommandError('Укажите файл с событиями или --purge')
+        ingestor = OrderEventIngestor(batch_size=options['batch_size'])
+        if path is not None:
+            self.ingest(ingestor, path, options['format'])
+        if options['purge']:
+            self.stdout.write(f'Удалено старых событий: {ingestor.purge_expired()}')
+
+    def ingest(self, ingestor, path, file_format):
+        file_format = file_format or path.rsplit('.', 1)[-1].lower()
+        if file_format not in PARSERS:
+            raise CommandError(f'Неизвестный формат файла: {file_format}')
+
+        stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        parse_error = None
+        try:
+            rows = PARSERS[file_format]().parse(stream, parser_context={'encoding': 'utf-8'})
+            report = ingestor.run(rows)
+        except ParseError as error:
+            # Применённые пачки остаются в БД - выводим отчёт по ним
+            report, parse_error = ingestor.report(), error.detail
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        for error in report['errors']:
+            self.stderr.write(f'Строка {error["row"]}: {json.dumps(error["errors"], ensure_ascii=False)}')
+        self.stdout.write(
+            f'Событий: {report["received"]}, применено: {report["applied"]}, повторов: {report["duplicates"]}, '
+            f'ошибок: {len(report["errors"])}, адресов: {report["addresses"]}, '
+            f'{report["events_per_second"]} событий/с за {report["seconds"]} с'
+        )
+        if parse_error is not None:
+            raise CommandError(f'Ошибка разбора файла: {parse_error}')
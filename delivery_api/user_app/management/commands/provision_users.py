@@ -0,0 +1,52 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ParseError
+
+from ...parsers import JSONArrayStreamParser, NDJSONParser, CSVParser
+from ...provisioning import UserProvisioner
+
+PARSERS = {'json': JSONArrayStreamParser, 'ndjson': NDJSONParser, 'csv': CSVParser}
+
+
+class Command(BaseCommand):
+    help = 'Массовое создание пользователей из CSV/NDJSON/JSON-файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу или "-" для stdin')
+        parser.add_argument('--format', choices=PARSERS.keys(), help='Формат файла (по умолчанию по расширению)')
+        parser.add_argument('--tokens', help='Выпустить токены и записать их в этот файл (NDJSON)')
+        parser.add_argument('--chunk-size', type=int, help='Размер пачки для вставки')
+        parser.add_argument('--workers', type=int, help='Количество процессов для хэширования паролей')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or path.rsplit('.', 1)[-1].lower()
+        if file_format not in PARSERS:
+            raise CommandError(f'Неизвестный формат файла: {file_format}')
+
+        provisioner = UserProvisioner(
+            issue_tokens=bool(options['tokens']), chunk_size=options['chunk_size'], workers=options['workers']
+        )
+        stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        parse_error = None
+        try:
+            rows = PARSERS[file_format]().parse(stream, parser_context={'encoding': 'utf-8'})
+            report = provisioner.run(rows)
+        except ParseError as error:
+            # Уже вставленные пачки остаются в БД - выводим отчёт по ним
+            report, parse_error = provisioner.report(), error.detail
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        if options['tokens']:
+            with open(options['tokens'], 'w', encoding='utf-8') as tokens_file:
+                for token in report.pop('tokens'):
+                    tokens_file.write(json.dumps(token) + '\n')
+        for error in report['errors']:
+            self.stderr.write(f'Строка {error["row"]}: {json.dumps(error["errors"], ensure_ascii=False)}')
+        self.stdout.write(f'Создано пользователей: {report["created"]}, ошибок: {len(report["errors"])}')
+        if parse_error is not None:
+            raise CommandError(f'Ошибка разбора файла: {parse_error}')
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ...token_lifecycle import TokenPurger
+
+
+class Command(BaseCommand):
+    help = 'Удаление (или архивация) истёкших refresh-токенов пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=('delete', 'archive'), help='Удалять или переносить в архив')
+        parser.add_argument('--chunk-size', type=int, help='Размер пачки')
+        parser.add_argument('--max-chunks', type=int, help='Не больше стольких пачек за запуск')
+        parser.add_argument('--loop', action='store_true', help='Повторять каждые --interval секунд')
+        parser.add_argument('--interval', type=int, help='Интервал между запусками, сек')
+
+    def handle(self, *args, **options):
+        purger = TokenPurger(chunk_size=options['chunk_size'], mode=options['mode'])
+        interval = options['interval'] or settings.TOKEN_LIFECYCLE['INTERVAL']
+        while True:
+            result = purger.run(max_chunks=options['max_chunks'])
+            self.stdout.write(
+                f'Удалено токенов: {result["deleted"]}, удалено из архива: {result["archive_deleted"]}'
+            )
+            if not options['loop']:
+                break
+            connections.close_all()
+            try:
+                time.sleep(interval)
+            except KeyboardInterrupt:
+                break
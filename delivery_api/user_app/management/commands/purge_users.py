@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from ...purge import UserPurger
+
+
+class Command(BaseCommand):
+    help = 'Удаление данных пользователей, удалённых в режиме soft-delete'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Работать постоянно, опрашивая очередь')
+        parser.add_argument('--interval', type=float, help='Пауза между опросами пустой очереди, сек')
+        parser.add_argument('--limit', type=int, help='Сколько пользователей обработать за проход')
+        parser.add_argument('--chunk-size', type=int, help='Размер пачки удаляемых строк')
+
+    def handle(self, *args, **options):
+        purger = UserPurger(chunk_size=options['chunk_size'])
+        if options['loop']:
+            try:
+                purger.run_forever(interval=options['interval'])
+            except KeyboardInterrupt:
+                pass
+        else:
+            purger.run_once(limit=options['limit'])
+        stats = purger.stats
+        self.stdout.write(
+            f'Удалено пользователей: {stats["purged"]}, ошибок: {stats["failed"]}, удалено строк: {stats["rows"]}'
+        )
@@ -0,0 +1,35 @@
+# Generated by Django 4.1.6 on 2026-10-18 19:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAddresses',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=255, verbose_name='Город')),
+                ('street', models.CharField(max_length=255, verbose_name='Улица')),
+                ('house', models.CharField(max_length=255, verbose_name='Номер дома')),
+                ('entrance', models.PositiveIntegerField(verbose_name='Номер подъезда')),
+                ('floor', models.PositiveIntegerField(verbose_name='Этаж')),
+                ('flat', models.CharField(max_length=255, verbose_name='Квартира')),
+                ('order_count', models.IntegerField(default=0, verbose_name='Кол-во заказов')),
+                ('last_order', models.DateTimeField(auto_now=True, verbose_name='Последний заказ')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='addresses', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Адреса пользователя',
+                'verbose_name_plural': 'Адреса пользователей',
+                'ordering': ['order_count', '-last_order'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.6 on 2026-10-18 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0002_useraddresses'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at', '-id'], name='user_created_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useraddresses',
+            index=models.Index(fields=['user', 'order_count', '-last_order', 'id'], name='address_user_ordering_idx'),
+        ),
+    ]
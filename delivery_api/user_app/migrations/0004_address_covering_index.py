@@ -0,0 +1,21 @@
+# Generated by Django 4.1.6 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='useraddresses',
+            index=models.Index(fields=['user', 'order_count', '-last_order', 'id'], include=('city', 'street', 'house', 'entrance', 'floor', 'flat'), name='address_user_list_covering_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='useraddresses',
+            name='address_user_ordering_idx',
+        ),
+    ]
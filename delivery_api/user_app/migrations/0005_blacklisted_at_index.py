@@ -0,0 +1,29 @@
+from django.db import migrations
+
+# Индекс по blacklisted_at для инкрементальной синхронизации TokenBlacklistCache (таблица simplejwt)
+BLACKLISTED_AT_INDEX = 'token_blacklisted_at_idx'
+
+
+def create_blacklisted_at_index(apps, schema_editor):
+    BlacklistedToken = apps.get_model('token_blacklist', 'BlacklistedToken')
+    quote_name = schema_editor.connection.ops.quote_name
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {quote_name(BLACKLISTED_AT_INDEX)} '
+        f'ON {quote_name(BlacklistedToken._meta.db_table)} ({quote_name("blacklisted_at")})'
+    )
+
+
+def drop_blacklisted_at_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.connection.ops.quote_name(BLACKLISTED_AT_INDEX)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0004_address_covering_index'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_blacklisted_at_index, drop_blacklisted_at_index),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.1.6 on 2026-10-18 20:37
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0005_blacklisted_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='data_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата изменения данных'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='data_version',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Версия данных'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+# Индексы поиска зависят от БД, поэтому создаются SQL, а не через Meta.indexes:
+# PostgreSQL - GIN с gin_trgm_ops по UPPER(поле) под icontains (в т.ч. поиск в админке).
+# В SQLite индекс не создаётся: индекс по SEARCH_FOLD(поле) требует функцию, которую регистрирует
+# только приложение, и любой другой клиент (sqlite3, скрипты, бэкапы) не смог бы писать в эти таблицы
+SEARCH_INDEXES = (
+    ('user', 'username'),
+    ('user', 'first_name'),
+    ('user', 'last_name'),
+    ('useraddresses', 'city'),
+    ('useraddresses', 'street'),
+)
+
+
+def index_name(model_name, field):
+    return f'{model_name}_{field}_search_idx'
+
+
+def create_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    template = 'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}) gin_trgm_ops)'
+    for model_name, field in SEARCH_INDEXES:
+        model = apps.get_model('user_app', model_name)
+        schema_editor.execute(template.format(
+            name=connection.ops.quote_name(index_name(model_name, field)),
+            table=connection.ops.quote_name(model._meta.db_table),
+            column=connection.ops.quote_name(model._meta.get_field(field).column),
+        ))
+
+
+def drop_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    for model_name, field in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {connection.ops.quote_name(index_name(model_name, field))}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0006_user_data_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
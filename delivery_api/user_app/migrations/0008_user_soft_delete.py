@@ -0,0 +1,42 @@
+# Generated by Django 4.1.6 on 2026-10-18 20:18
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0007_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPurge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(unique=True, verbose_name='ID пользователя')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('done', 'Завершено'), ('failed', 'Ошибка')], default='pending', max_length=16, verbose_name='Статус')),
+                ('step', models.CharField(blank=True, default='', max_length=32, verbose_name='Текущий шаг')),
+                ('deleted_rows', models.JSONField(default=dict, verbose_name='Удалено строк')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Последняя ошибка')),
+                ('requested_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата запроса')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Следующая попытка')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+            ],
+            options={
+                'verbose_name': 'Удаление пользователя',
+                'verbose_name_plural': 'Удаление пользователей',
+            },
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddIndex(
+            model_name='userpurge',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='user_purge_due_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.1.6 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+# Таблицы token_blacklist принадлежат simplejwt - индекс по expires_at для очистки истёкших токенов
+# создаётся SQL (CREATE INDEX IF NOT EXISTS поддерживают PostgreSQL и SQLite)
+EXPIRES_INDEX = 'token_outstanding_expires_idx'
+
+
+def create_expires_index(apps, schema_editor):
+    OutstandingToken = apps.get_model('token_blacklist', 'OutstandingToken')
+    quote_name = schema_editor.connection.ops.quote_name
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {quote_name(EXPIRES_INDEX)} '
+        f'ON {quote_name(OutstandingToken._meta.db_table)} ({quote_name("expires_at")})'
+    )
+
+
+def drop_expires_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.connection.ops.quote_name(EXPIRES_INDEX)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0008_user_soft_delete'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=255, verbose_name='JTI')),
+                ('user_id', models.BigIntegerField(blank=True, null=True, verbose_name='ID пользователя')),
+                ('created_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата выпуска')),
+                ('expires_at', models.DateTimeField(verbose_name='Дата истечения')),
+                ('blacklisted_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата блокировки')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+            ],
+            options={
+                'verbose_name': 'Архивный токен',
+                'verbose_name_plural': 'Архивные токены',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedtoken',
+            index=models.Index(fields=['expires_at'], name='archived_token_expires_idx'),
+        ),
+        migrations.RunPython(create_expires_index, drop_expires_index),
+    ]
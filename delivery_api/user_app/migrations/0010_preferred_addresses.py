@@ -0,0 +1,27 @@
+# Generated by Django 4.1.6 on 2026-10-18 20:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0009_token_lifecycle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PreferredAddresses',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='preferred_addresses', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('addresses', models.JSONField(default=list, verbose_name='Адреса')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Предпочитаемые адреса',
+                'verbose_name_plural': 'Предпочитаемые адреса',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.6 on 2026-10-18 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0010_preferred_addresses'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=64, unique=True, verbose_name='ID события')),
+                ('address_id', models.BigIntegerField(verbose_name='ID адреса')),
+                ('ordered_at', models.DateTimeField(verbose_name='Дата заказа')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата приёма')),
+            ],
+            options={
+                'verbose_name': 'Событие заказа',
+                'verbose_name_plural': 'События заказов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='orderevent',
+            index=models.Index(fields=['received_at'], name='order_event_received_idx'),
+        ),
+    ]
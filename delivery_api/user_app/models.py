@@ -1,7 +1,13 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth.base_user import BaseUserManager
+from django.contrib.auth.hashers import check_password, make_password
 from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
-from django.db.models import F
+
+from .counters import order_counter
+from .hashing import password_hashing_pool
+from .versioning import invalidate_user_version, next_user_version
 
 
 class UserManager(BaseUserManager):
@@ -68,9 +74,25 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name='Дата регистрации',
         auto_now_add=True
     )
+    deleted_at = models.DateTimeField(
+        verbose_name='Дата удаления',
+        null=True,
+        blank=True
+    )
+    # Версия профиля и адресов для ETag/Last-Modified и кэша списков (см. user_app.versioning)
+    data_version = models.PositiveBigIntegerField(
+        verbose_name='Версия данных',
+        default=0
+    )
+    data_updated_at = models.DateTimeField(
+        verbose_name='Дата изменения данных',
+        default=timezone.now
+    )
 
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['first_name', 'last_name', 'birthday']
+    # Поля вне профиля: их запись (вход, смена хэша пароля) не меняет версию данных
+    UNVERSIONED_FIELDS = frozenset({'password', 'last_login', 'data_version', 'data_updated_at'})
 
     objects = UserManager()
 
@@ -78,14 +100,75 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='user_created_at_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+            Версия данных меняется в том же UPDATE, если сохраняются поля профиля
+        """
+        update_fields = kwargs.get('update_fields')
+        bump = update_fields is None or not self.UNVERSIONED_FIELDS.issuperset(update_fields)
+        if bump:
+            self.data_version, self.data_updated_at = next_user_version(self.data_version)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'data_version', 'data_updated_at'}
+        super().save(*args, **kwargs)
+        if bump:
+            invalidate_user_version(self.pk)
 
     def get_full_name(self):
         return f'{self.first_name} {self.last_name}'
 
+    def soft_delete(self) -> None:
+        """
+            Деактивировать пользователя и поставить удаление связанных данных в очередь UserPurge
+        """
+        with transaction.atomic():
+            self.is_active = False
+            self.deleted_at = timezone.now()
+            self.save(update_fields=['is_active', 'deleted_at'])
+            UserPurge.objects.get_or_create(user_id=self.pk)
+
+    def set_password(self, raw_password):
+        self.password = password_hashing_pool.run(make_password, raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        valid, must_update = password_hashing_pool.run(_check_password, raw_password, self.password)
+        if must_update:
+            self.set_password(raw_password)
+            # Обновление алгоритма хэширования не считается сменой пароля
+            self._password = None
+            self.save(update_fields=['password'])
+        return valid
+
+    async def aset_password(self, raw_password):
+        self.password = await password_hashing_pool.arun(make_password, raw_password)
+        self._password = raw_password
+
+    async def acheck_password(self, raw_password):
+        valid, must_update = await password_hashing_pool.arun(_check_password, raw_password, self.password)
+        if must_update:
+            await self.aset_password(raw_password)
+            self._password = None
+            await sync_to_async(self.save)(update_fields=['password'])
+        return valid
+
     def __str__(self):
         return self.username
 
 
+def _check_password(raw_password, encoded):
+    """
+        Проверка пароля без записи в БД: обновление хэша выполняется в потоке запроса
+    """
+    must_update = []
+    valid = check_password(raw_password, encoded, setter=must_update.append)
+    return valid, bool(must_update)
+
+
 class UserAddresses(models.Model):
     user = models.ForeignKey(
         verbose_name='Пользователь',
@@ -128,14 +211,183 @@ class UserAddresses(models.Model):
         verbose_name = 'Адреса пользователя'
         verbose_name_plural = 'Адреса пользователей'
         ordering = ['order_count', '-last_order']
+        indexes = [
+            # Фильтр по user_id + сортировка списка; INCLUDE позволяет отдавать список index-only сканом
+            models.Index(
+                fields=['user', 'order_count', '-last_order', 'id'],
+                include=['city', 'street', 'house', 'entrance', 'floor', 'flat'],
+                name='address_user_list_covering_idx'
+            ),
+        ]
 
     def update_order_count(self) -> None:
-        with transaction.atomic():
-            self.order_count = F('order_count') + 1
-            self.save()
+        order_counter.add(self.pk)
 
     def get_full_address(self):
         return f'{self.city}, {self.street}, {self.house}, подъезд {self.entrance}, этаж {self.floor}, кв. {self.flat}'
 
     def __str__(self):
         return f'{self.user}: {self.get_full_address()}'
+
+
+class PreferredAddresses(models.Model):
+    """
+        Самые используемые адреса пользователя (top-N по order_count) в одной строке,
+        обновляются при применении счётчиков заказов (см. user_app.ranking)
+    """
+    user = models.OneToOneField(
+        verbose_name='Пользователь',
+        to=User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='preferred_addresses'
+    )
+    addresses = models.JSONField(
+        verbose_name='Адреса',
+        default=list
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата обновления',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Предпочитаемые адреса'
+        verbose_name_plural = 'Предпочитаемые адреса'
+
+    def __str__(self):
+        return f'{self.user_id}: {len(self.addresses)}'
+
+
+class OrderEvent(models.Model):
+    """
+        Принятое событие заказа. event_id хранится ORDER_EVENTS['RETENTION_DAYS'] дней,
+        повторная доставка события не меняет счётчики (см. user_app.order_events)
+    """
+    event_id = models.CharField(
+        verbose_name='ID события',
+        max_length=64,
+        unique=True
+    )
+    address_id = models.BigIntegerField(
+        verbose_name='ID адреса'
+    )
+    ordered_at = models.DateTimeField(
+        verbose_name='Дата заказа'
+    )
+    received_at = models.DateTimeField(
+        verbose_name='Дата приёма',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'Событие заказа'
+        verbose_name_plural = 'События заказов'
+        indexes = [
+            models.Index(fields=['received_at'], name='order_event_received_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.event_id}: {self.address_id}'
+
+
+class UserPurge(models.Model):
+    """
+        Задача фонового удаления пользователя после soft-delete (см. user_app.purge)
+    """
+    STATUSES = [('pending', 'Ожидает'), ('done', 'Завершено'), ('failed', 'Ошибка')]
+
+    user_id = models.BigIntegerField(
+        verbose_name='ID пользователя',
+        unique=True
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=16,
+        choices=STATUSES,
+        default='pending'
+    )
+    step = models.CharField(
+        verbose_name='Текущий шаг',
+        max_length=32,
+        blank=True,
+        default=''
+    )
+    deleted_rows = models.JSONField(
+        verbose_name='Удалено строк',
+        default=dict
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Попыток',
+        default=0
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+        default=''
+    )
+    requested_at = models.DateTimeField(
+        verbose_name='Дата запроса',
+        auto_now_add=True
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        default=timezone.now
+    )
+    finished_at = models.DateTimeField(
+        verbose_name='Дата завершения',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Удаление пользователя'
+        verbose_name_plural = 'Удаление пользователей'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='user_purge_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.status}'
+
+
+class ArchivedToken(models.Model):
+    """
+        Истёкший refresh-токен, перенесённый из таблиц token_blacklist (TOKEN_LIFECYCLE['MODE'] = 'archive')
+    """
+    jti = models.CharField(
+        verbose_name='JTI',
+        max_length=255
+    )
+    user_id = models.BigIntegerField(
+        verbose_name='ID пользователя',
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата выпуска',
+        null=True,
+        blank=True
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='Дата истечения'
+    )
+    blacklisted_at = models.DateTimeField(
+        verbose_name='Дата блокировки',
+        null=True,
+        blank=True
+    )
+    archived_at = models.DateTimeField(
+        verbose_name='Дата архивации',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'Архивный токен'
+        verbose_name_plural = 'Архивные токены'
+        indexes = [
+            models.Index(fields=['expires_at'], name='archived_token_expires_idx'),
+        ]
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,133 @@
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from .counters import order_counter
+from .instrumentation import registry
+from .models import OrderEvent, UserAddresses
+from .serializers import OrderEventSerializer
+
+registry.describe('order_events_total', 'counter', 'События заказов по результату приёма')
+
+
+class OrderEventIngestor:
+    """
+        Приём потока событий заказов (event_id, address_id, ordered_at) пачками по BATCH_SIZE.
+        В пачке отбрасываются повторы event_id (внутри пачки и уже принятые), события несуществующих
+        адресов возвращаются ошибками строк, новые события записываются в OrderEvent и сворачиваются
+        по адресу в {address_id: (count, last_order)}, которое применяется OrderCountBuffer.apply -
+        один UPDATE на пачку адресов в той же транзакции
+    """
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or settings.ORDER_EVENTS['BATCH_SIZE']
+        self.serializer = OrderEventSerializer()
+        self.received, self.applied, self.duplicates, self.addresses = 0, 0, 0, 0
+        self.errors = []
+        self.seconds = 0.0
+
+    def run(self, rows) -> dict:
+        started = time.perf_counter()
+        try:
+            rows = iter(rows)
+            while batch := list(islice(rows, self.batch_size)):
+                self._process_batch(batch)
+        finally:
+            self.seconds += time.perf_counter() - started
+        return self.report()
+
+    def report(self) -> dict:
+        return {
+            'received': self.received,
+            'applied': self.applied,
+            'duplicates': self.duplicates,
+            'addresses': self.addresses,
+            'errors': self.errors,
+            'seconds': round(self.seconds, 3),
+            'events_per_second': round(self.received / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+    def _process_batch(self, batch) -> None:
+        events, rows, duplicates = {}, {}, 0
+        for row in batch:
+            self.received += 1
+            try:
+                event = self.serializer.run_validation(row)
+            except ValidationError as error:
+                self.errors.append({'row': self.received, 'errors': error.detail})
+                registry.inc('order_events_total', (('result', 'invalid'),))
+                continue
+            if event['event_id'] in events:
+                duplicates += 1
+                continue
+            events[event['event_id']] = event
+            rows[event['event_id']] = self.received
+        events = self._drop_unknown_addresses(events, rows)
+        if events:
+            try:
+                applied, addresses = self._apply(events)
+            except IntegrityError:
+                # Те же event_id одновременно принял другой процесс - повторяем с учётом его записей
+                applied, addresses = self._apply(events)
+            duplicates += len(events) - applied
+            self.applied += applied
+            self.addresses += addresses
+            registry.inc('order_events_total', (('result', 'applied'),), applied)
+        self.duplicates += duplicates
+        registry.inc('order_events_total', (('result', 'duplicate'),), duplicates)
+
+    def _drop_unknown_addresses(self, events, rows) -> dict:
+        """
+            Убрать события адресов, которых нет в UserAddresses, и вернуть их ошибками строк
+        """
+        address_ids = {event['address_id'] for event in events.values()}
+        known = set(UserAddresses.objects.filter(pk__in=address_ids).values_list('pk', flat=True))
+        if len(known) == len(address_ids):
+            return events
+        message = PrimaryKeyRelatedField.default_error_messages['does_not_exist']
+        for event_id, event in events.items():
+            if event['address_id'] not in known:
+                error = ValidationError({'address_id': [message.format(pk_value=event['address_id'])]})
+                self.errors.append({'row': rows[event_id], 'errors': error.detail})
+        unknown = sum(event['address_id'] not in known for event in events.values())
+        registry.inc('order_events_total', (('result', 'unknown_address'),), unknown)
+        return {event_id: event for event_id, event in events.items() if event['address_id'] in known}
+
+    def _apply(self, events):
+        """
+            Записать новые события пачки и применить их счётчики, возвращает (событий, адресов)
+        """
+        with transaction.atomic():
+            accepted = set(OrderEvent.objects.filter(event_id__in=events).values_list('event_id', flat=True))
+            fresh = [event for event_id, event in events.items() if event_id not in accepted]
+            if not fresh:
+                return 0, 0
+            OrderEvent.objects.bulk_create([OrderEvent(**event) for event in fresh])
+            increments = {}
+            for event in fresh:
+                count, last_order = increments.get(event['address_id'], (0, event['ordered_at']))
+                increments[event['address_id']] = (count + 1, max(last_order, event['ordered_at']))
+            return len(fresh), order_counter.apply(increments)
+
+    def purge_expired(self, now=None) -> int:
+        """
+            Удалить event_id старше RETENTION_DAYS пачками по BATCH_SIZE
+        """
+        cutoff = (now or timezone.now()) - timedelta(days=settings.ORDER_EVENTS['RETENTION_DAYS'])
+        deleted = 0
+        while True:
+            ids = list(
+                OrderEvent.objects.filter(received_at__lte=cutoff).order_by('received_at')
+                .values_list('pk', flat=True)[:self.batch_size]
+            )
+            if not ids:
+                break
+            deleted += OrderEvent.objects.filter(pk__in=ids)._raw_delete(OrderEvent.objects.db)
+            if len(ids) < self.batch_size:
+                break
+        return deleted
@@ -0,0 +1,204 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import BooleanField, Expression, F, Q, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+        Keyset-пагинация: курсор хранит значения полей сортировки последней записи,
+        следующая страница выбирается условием по ним, а не OFFSET.
+        Сортировка берётся из Meta.ordering модели, первичный ключ добавляется
+        как последний ключ для однозначности
+    """
+    ordering = None
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        ordering = self.ordering or queryset.model._meta.ordering
+        fields = [field.lstrip('-') for field in ordering]
+        if 'pk' not in fields and queryset.model._meta.pk.name not in fields:
+            ordering = (*ordering, 'pk')
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.prepare_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+            Вариант paginate_queryset для async-view: страница читается асинхронной итерацией
+        """
+        queryset = self.prepare_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([obj async for obj in queryset])
+
+    def prepare_queryset(self, queryset, request, view=None):
+        """
+            Queryset одной страницы (+1 запись для проверки наличия следующей)
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+        self.cursor = self.decode_cursor(request)
+        reverse, position = self.cursor if self.cursor is not None else (False, None)
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self._keyset_filter(position, reverse))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        reverse, position = self.cursor if self.cursor is not None else (False, None)
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor((False, self._get_position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor((True, self._get_position(self.page[0])))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            reverse, values = bool(data['r']), data['p']
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = tuple(
+                self._get_field(name).to_python(value) for name, value in zip(self._field_names, values)
+            )
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+    def encode_cursor(self, cursor):
+        reverse, position = cursor
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        data = json.dumps({'r': int(reverse), 'p': values}, separators=(',', ':'))
+        encoded = urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @property
+    def _field_names(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def _get_field(self, name):
+        opts = self.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def _get_position(self, instance):
+        # Строки .values() (быстрый путь чтения) приходят словарями
+        if isinstance(instance, dict):
+            return tuple(instance[name] for name in self._field_names)
+        return tuple(getattr(instance, name) for name in self._field_names)
+
+    def _keyset_filter(self, position, reverse):
+        return keyset_filter(self.ordering, position, reverse)
+
+
+class RowValueCompare(Expression):
+    """
+        Сравнение кортежей (a, b, c) > (x, y, z) одним условием - индекс (a, b, c) читается
+        с позиции курсора. Значения приводятся к типам полей модели
+    """
+    conditional = True
+    output_field = BooleanField()
+
+    def __init__(self, names, values, operator):
+        super().__init__()
+        self.names, self.values, self.operator = names, values, operator
+        self.columns = []
+
+    def get_source_expressions(self):
+        return self.columns
+
+    def set_source_expressions(self, exprs):
+        self.columns = list(exprs)
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        resolved = self.copy()
+        resolved.columns = [F(name).resolve_expression(query, allow_joins, reuse, summarize) for name in self.names]
+        return resolved
+
+    def as_sql(self, compiler, connection):
+        columns, values, params = [], [], []
+        for column in self.columns:
+            sql, column_params = compiler.compile(column)
+            columns.append(sql)
+            params.extend(column_params)
+        for column, value in zip(self.columns, self.values):
+            sql, value_params = compiler.compile(Value(value, output_field=column.output_field))
+            values.append(sql)
+            params.extend(value_params)
+        return f'({", ".join(columns)}) {self.operator} ({", ".join(values)})', params
+
+
+def keyset_filter(ordering, position, reverse=False):
+    """
+        (a, b, c) > (x, y, z) с учётом направления каждого поля.
+        Одно направление у всех полей - сравнение кортежей, иначе
+        a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z).
+        Избыточная граница a >= x по первому полю даёт планировщику диапазон по индексу
+    """
+    fields = [(field.lstrip('-'), field.startswith('-') != reverse) for field in ordering][:len(position)]
+    first_name, first_descending = fields[0]
+    bound = Q(**{f'{first_name}__{"lte" if first_descending else "gte"}': position[0]})
+    directions = {descending for _, descending in fields}
+    if len(fields) > 1 and len(directions) == 1:
+        return bound & RowValueCompare([name for name, _ in fields], list(position), '<' if first_descending else '>')
+
+    condition = Q()
+    equal = {}
+    for (name, descending), value in zip(fields, position):
+        condition |= Q(**equal, **{f'{name}__{"lt" if descending else "gt"}': value})
+        equal[name] = value
+    return bound & condition
+
+
+def _reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+class UserKeysetPagination(KeysetPagination):
+    """
+        Пагинация списка пользователей по дате регистрации
+    """
+    ordering = ('-created_at', '-pk')
+
+
+class UserAddressKeysetPagination(KeysetPagination):
+    """
+        Пагинация адресов пользователя в порядке UserAddresses.Meta.ordering
+    """
+    ordering = ('order_count', '-last_order', 'pk')
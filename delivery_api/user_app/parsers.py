@@ -0,0 +1,113 @@
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+STREAM_READ_SIZE = 64 * 1024
+
+
+def iter_json_array(stream, encoding):
+    """
+        Потоковый разбор JSON-массива: объекты отдаются по одному,
+        не дожидаясь загрузки всего тела запроса
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    buf, pos, eof, started = '', 0, False, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = stream.read(STREAM_READ_SIZE)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + text_decoder.decode(chunk or b'', final=not chunk)
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    skip_ws()
+    if pos >= len(buf) or buf[pos] != '[':
+        raise ParseError('Ожидался JSON-массив')
+    pos += 1
+    while True:
+        skip_ws()
+        if pos >= len(buf):
+            raise ParseError('Неожиданный конец JSON-массива')
+        if buf[pos] == ']':
+            return
+        if started:
+            if buf[pos] != ',':
+                raise ParseError('Ожидалась запятая между элементами JSON-массива')
+            pos += 1
+            skip_ws()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as error:
+                if eof:
+                    raise ParseError(f'JSON parse error - {error}')
+                fill()
+                continue
+            # Число на границе буфера может быть прочитано не полностью
+            if end == len(buf) and not eof:
+                fill()
+                continue
+            break
+        pos = end
+        started = True
+        yield item
+
+
+class JSONArrayStreamParser(BaseParser):
+    """
+        Парсер JSON-массива, возвращающий ленивый итератор по элементам
+    """
+    media_type = 'application/json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        return iter_json_array(stream, encoding)
+
+
+class NDJSONParser(BaseParser):
+    """
+        Парсер NDJSON (один JSON-объект на строку)
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        return self._iter_rows(stream, encoding)
+
+    @staticmethod
+    def _iter_rows(stream, encoding):
+        for line_number, line in enumerate(stream, start=1):
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise ParseError(f'NDJSON parse error on line {line_number} - {error}')
+
+
+class CSVParser(BaseParser):
+    """
+        Парсер CSV с заголовком в первой строке
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        lines = (line.decode(encoding) for line in stream)
+        return csv.DictReader(lines)
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.shortcuts import get_object_or_404
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .instrumentation import timed
+
+# Поля, у которых to_representation не меняет значение из .values() (кроме дат - см. ниже)
+PLAIN_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField)
+
+
+class ValuesProjection:
+    """
+        Быстрый read-only путь для сериализатора: строки читаются через .values()
+        только нужных колонок и собираются в dict в порядке полей сериализатора,
+        без создания экземпляров модели и вызова to_representation на каждое поле.
+        Поддерживаются только простые поля модели, иначе ImproperlyConfigured
+    """
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.fields = []
+        self.date_fields = set()
+        serializer = serializer_class(context={'request': None})
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            model_field = self.model._meta.get_field(field.source)
+            if isinstance(field, serializers.DateField) and not isinstance(field, serializers.DateTimeField):
+                output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+                if output_format is not None and output_format.lower() != ISO_8601:
+                    raise ImproperlyConfigured(f'{serializer_class.__name__}.{name}: нестандартный формат даты')
+                self.date_fields.add(name)
+            elif not isinstance(field, PLAIN_FIELDS) or isinstance(model_field, models.ForeignKey):
+                raise ImproperlyConfigured(
+                    f'{serializer_class.__name__}.{name}: поле {type(field).__name__} не поддерживается проекцией'
+                )
+            self.fields.append((name, model_field.attname))
+
+    @property
+    def columns(self):
+        return [column for _, column in self.fields]
+
+    def values(self, queryset, *extra):
+        return queryset.values(*dict.fromkeys((*self.columns, *extra)))
+
+    def represent(self, row):
+        data = {name: row[column] for name, column in self.fields}
+        for name in self.date_fields:
+            if data[name] is not None:
+                data[name] = data[name].isoformat()
+        return data
+
+    @timed('serialize')
+    def represent_many(self, rows):
+        return [self.represent(row) for row in rows]
+
+
+class ProjectionReadMixin:
+    """
+        list/retrieve через ValuesProjection для generic view/viewset.
+        Выключается настройкой API_FAST_READ_PATH - тогда работает обычный сериализатор
+    """
+    projection_serializer_class = None
+    _projection = None
+
+    @classmethod
+    def get_projection(cls):
+        if cls.__dict__.get('_projection') is None:
+            cls._projection = ValuesProjection(cls.projection_serializer_class)
+        return cls._projection
+
+    def list(self, request, *args, **kwargs):
+        if not settings.API_FAST_READ_PATH:
+            return super().list(request, *args, **kwargs)
+        projection = self.get_projection()
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is not None:
+            ordering = self.paginator.get_ordering(request, queryset, self)
+            rows = self.paginate_queryset(projection.values(queryset, *(field.lstrip('-') for field in ordering)))
+            return self.get_paginated_response(projection.represent_many(rows))
+        return Response(projection.represent_many(projection.values(queryset)))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.API_FAST_READ_PATH:
+            return super().retrieve(request, *args, **kwargs)
+        projection = self.get_projection()
+        queryset = projection.values(self.filter_queryset(self.get_queryset()))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        return Response(projection.represent(row))
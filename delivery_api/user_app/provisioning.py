@@ -0,0 +1,149 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import User
+from .serializers import UserProvisionSerializer
+from .tokens import RefreshToken, SlidingToken
+
+
+def _init_hashing_worker(settings_module):
+    # При spawn дочерний процесс стартует без настроенного Django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def _unique_message(field_name):
+    # То же сообщение, что выдаёт UniqueValidator сериализатора регистрации
+    field = User._meta.get_field(field_name)
+    return field.error_messages['unique'] % {
+        'model_name': User._meta.verbose_name, 'field_label': field.verbose_name
+    }
+
+
+class UserProvisioner:
+    """
+        Массовое создание пользователей: проверка уникальности username/email
+        set-based запросами, хэширование паролей и bulk_create пачками.
+        Команда хэширует в собственном пуле процессов, HTTP-запрос передаёт hashing_pool -
+        общий пул потоков процесса (password_hashing_pool)
+    """
+    def __init__(self, issue_tokens=False, chunk_size=None, workers=None, hashing_pool=None):
+        self.issue_tokens = issue_tokens
+        self.chunk_size = chunk_size or settings.USER_PROVISIONING['CHUNK_SIZE']
+        self.workers = workers or settings.USER_PROVISIONING['HASH_WORKERS']
+        self.hashing_pool = hashing_pool
+        self.serializer = UserProvisionSerializer()
+        self.created_ids, self.errors, self.tokens = [], [], []
+        self._seen_usernames, self._seen_emails = set(), set()
+        self._row_number = 0
+
+    def run(self, rows):
+        if self.hashing_pool is not None:
+            self._process_rows(rows, self.hashing_pool.map)
+            return self.report()
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_hashing_worker,
+            initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'delivery_api.settings'),)
+        ) as executor:
+            self._process_rows(rows, lambda fn, items: list(
+                executor.map(fn, items, chunksize=max(len(items) // (self.workers * 4), 1))
+            ))
+        return self.report()
+
+    def _process_rows(self, rows, hash_map) -> None:
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            self._process_chunk(chunk, hash_map)
+
+    def report(self) -> dict:
+        report = {'created': len(self.created_ids), 'ids': self.created_ids, 'errors': self.errors}
+        if self.issue_tokens:
+            report['tokens'] = self.tokens
+        return report
+
+    def _process_chunk(self, chunk, hash_map) -> None:
+        candidates = []
+        for row in chunk:
+            self._row_number += 1
+            try:
+                candidates.append((self._row_number, self.serializer.run_validation(row)))
+            except ValidationError as error:
+                self._add_error(self._row_number, error.detail)
+        candidates = self._check_unique(candidates)
+        if not candidates:
+            return
+
+        passwords = [data.pop('password') for _, data in candidates]
+        hashes = hash_map(make_password, passwords)
+        users = []
+        for (row_number, data), password in zip(candidates, hashes):
+            users.append((row_number, User(password=password, **data)))
+
+        created = self._insert(users)
+        self.created_ids.extend(user.pk for user in created)
+        if self.issue_tokens and created:
+            if settings.AUTH_TOKEN_MODE == 'sliding':
+                self.tokens.extend(
+                    {'id': user.pk, 'username': user.username, 'token': str(SlidingToken.for_user(user))}
+                    for user in created
+                )
+                return
+            for user, token in zip(created, RefreshToken.for_users(created)):
+                self.tokens.append({
+                    'id': user.pk, 'username': user.username,
+                    'refresh': str(token), 'access': str(token.access_token)
+                })
+
+    def _check_unique(self, candidates):
+        """
+            Один запрос на username и один на email для всей пачки + дубликаты внутри импорта
+        """
+        usernames = {data['username'] for _, data in candidates}
+        emails = {data['email'] for _, data in candidates}
+        taken_usernames = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        taken_emails = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        unique = []
+        for row_number, data in candidates:
+            errors = {}
+            if data['username'] in taken_usernames or data['username'] in self._seen_usernames:
+                errors['username'] = [_unique_message('username')]
+            if data['email'] in taken_emails or data['email'] in self._seen_emails:
+                errors['email'] = [_unique_message('email')]
+            if errors:
+                self._add_error(row_number, errors)
+                continue
+            # Отклонённая строка не занимает username/email для следующих строк импорта
+            self._seen_usernames.add(data['username'])
+            self._seen_emails.add(data['email'])
+            unique.append((row_number, data))
+        return unique
+
+    def _insert(self, users):
+        try:
+            with transaction.atomic():
+                return User.objects.bulk_create([user for _, user in users], batch_size=self.chunk_size)
+        except IntegrityError:
+            # Параллельная регистрация заняла username/email между проверкой и вставкой - вставляем построчно
+            pass
+        created = []
+        for row_number, user in users:
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                created.append(user)
+            except IntegrityError as error:
+                user.pk = None
+                self._add_error(row_number, {'non_field_errors': [str(error)]})
+        return created
+
+    def _add_error(self, row_number, errors) -> None:
+        self.errors.append({'row': row_number, 'errors': errors})
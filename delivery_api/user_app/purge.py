@@ -0,0 +1,146 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.db import connections, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .list_cache import address_list_cache
+from .models import User, UserAddresses, UserPurge
+from .token_cache import token_blacklist_cache
+from .versioning import bump_user_version
+
+
+def _delete_chunk(queryset, chunk_size):
+    """
+        Удалить до chunk_size строк одним DELETE ... WHERE id IN (...) без загрузки объектов и сигналов
+    """
+    ids = list(queryset.order_by().values_list('pk', flat=True)[:chunk_size])
+    if not ids:
+        return 0
+    model = queryset.model
+    return model._base_manager.filter(pk__in=ids)._raw_delete(model._base_manager.db)
+
+
+def _delete_tokens_chunk(user_id, chunk_size):
+    ids = list(
+        OutstandingToken.objects.filter(user_id=user_id).order_by().values_list('pk', flat=True)[:chunk_size]
+    )
+    if not ids:
+        return 0
+    BlacklistedToken.objects.filter(token_id__in=ids)._raw_delete(BlacklistedToken.objects.db)
+    return OutstandingToken.objects.filter(pk__in=ids)._raw_delete(OutstandingToken.objects.db)
+
+
+# Шаги удаления по порядку: имя -> функция (user_id, chunk_size) -> удалено строк
+PURGE_STEPS = {
+    'addresses': lambda user_id, size: _delete_chunk(UserAddresses.objects.filter(user_id=user_id), size),
+    'tokens': _delete_tokens_chunk,
+    'groups': lambda user_id, size: _delete_chunk(User.groups.through.objects.filter(user_id=user_id), size),
+    'permissions': lambda user_id, size: _delete_chunk(
+        User.user_permissions.through.objects.filter(user_id=user_id), size
+    ),
+    'admin_log': lambda user_id, size: _delete_chunk(LogEntry.objects.filter(user_id=user_id), size),
+}
+
+
+class UserPurger:
+    """
+        Фоновое удаление пользователей после soft-delete.
+        Связанные строки удаляются пачками по CHUNK_SIZE, каждая пачка - отдельная короткая транзакция,
+        прогресс (шаг и счётчики) сохраняется в UserPurge после каждой пачки.
+        При ошибке задача повторяется через RETRY_DELAY * 2^попытка секунд, после MAX_ATTEMPTS - failed
+    """
+    def __init__(self, chunk_size=None):
+        self.config = settings.USER_PURGE
+        self.chunk_size = chunk_size or self.config['CHUNK_SIZE']
+        self.stats = dict(purged=0, failed=0, rows=0)
+
+    def due(self, limit):
+        return list(
+            UserPurge.objects.filter(status='pending', next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at')[:limit]
+        )
+
+    def run_once(self, limit=None) -> int:
+        """
+            Обработать задачи, у которых подошло время, возвращает количество завершённых
+        """
+        done = 0
+        for task in self.due(limit or self.config['BATCH_SIZE']):
+            if self.claim(task) and self.purge(task):
+                done += 1
+        return done
+
+    def claim(self, task) -> bool:
+        """
+            Сдвинуть next_attempt_at вперёд, чтобы задачу не взял параллельный воркер
+        """
+        lease = timezone.now() + timedelta(seconds=self.config['LEASE_SECONDS'])
+        claimed = UserPurge.objects.filter(
+            pk=task.pk, status='pending', next_attempt_at=task.next_attempt_at
+        ).update(next_attempt_at=lease)
+        task.next_attempt_at = lease
+        return bool(claimed)
+
+    def purge(self, task) -> bool:
+        if User.objects.filter(pk=task.user_id, deleted_at__isnull=True).exists():
+            # Пользователь восстановлен до удаления данных
+            task.delete()
+            return False
+        try:
+            for step, delete_chunk in PURGE_STEPS.items():
+                task.step = step
+                UserPurge.objects.filter(pk=task.pk).update(step=step)
+                while True:
+                    with transaction.atomic():
+                        deleted = delete_chunk(task.user_id, self.chunk_size)
+                        deleted_rows = dict(task.deleted_rows, **{step: task.deleted_rows.get(step, 0) + deleted})
+                        UserPurge.objects.filter(pk=task.pk).update(deleted_rows=deleted_rows)
+                    task.deleted_rows = deleted_rows
+                    self.stats['rows'] += deleted
+                    if deleted < self.chunk_size:
+                        break
+            self.finish(task)
+            return True
+        except Exception as error:
+            print(f'Error while purge user {task.user_id}: {error}')
+            self.retry(task, error)
+            return False
+
+    def finish(self, task) -> None:
+        with transaction.atomic():
+            # Связанных строк не осталось - каскад Django только проверит пустые таблицы
+            User.objects.filter(pk=task.user_id, deleted_at__isnull=False).delete()
+            task.status, task.step, task.finished_at = 'done', '', timezone.now()
+            task.save(update_fields=['status', 'step', 'finished_at'])
+        # Удаление шло в обход сигналов - сбрасываем кэши сами
+        bump_user_version(task.user_id)
+        address_list_cache.invalidate(task.user_id)
+        token_blacklist_cache.reset()
+        self.stats['purged'] += 1
+
+    def retry(self, task, error) -> None:
+        task.attempts += 1
+        task.last_error = str(error)
+        if task.attempts >= self.config['MAX_ATTEMPTS']:
+            task.status = 'failed'
+            self.stats['failed'] += 1
+        else:
+            task.next_attempt_at = timezone.now() + timedelta(
+                seconds=self.config['RETRY_DELAY'] * 2 ** (task.attempts - 1)
+            )
+        UserPurge.objects.filter(pk=task.pk).update(
+            attempts=task.attempts, last_error=task.last_error, status=task.status, next_attempt_at=task.next_attempt_at
+        )
+
+    def run_forever(self, interval=None, stop=None) -> None:
+        interval = interval or self.config['POLL_INTERVAL']
+        while stop is None or not stop.is_set():
+            try:
+                if not self.run_once():
+                    time.sleep(interval)
+            finally:
+                connections.close_all()
@@ -0,0 +1,98 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from .models import PreferredAddresses, UserAddresses
+from .projections import ValuesProjection
+from .serializers import UserAddressSerializer
+
+_projection = None
+
+
+def get_projection():
+    global _projection
+    if _projection is None:
+        _projection = ValuesProjection(UserAddressSerializer)
+    return _projection
+
+
+def _entry(row):
+    entry = get_projection().represent(row)
+    entry['last_order'] = row['last_order'].isoformat()
+    return entry
+
+
+def _rank_key(entry):
+    return entry['order_count'], parse_datetime(entry['last_order']), entry['id']
+
+
+def _top(entries):
+    return sorted(entries, key=_rank_key, reverse=True)[:settings.PREFERRED_ADDRESSES['SIZE']]
+
+
+def _save(rankings) -> None:
+    PreferredAddresses.objects.bulk_create(
+        [PreferredAddresses(user_id=user_id, addresses=addresses) for user_id, addresses in rankings.items()],
+        update_conflicts=True, unique_fields=['user'], update_fields=['addresses', 'updated_at']
+    )
+
+
+def rebuild_rankings(*user_ids) -> dict:
+    """
+        Пересчитать рейтинги пользователей по всем их адресам, возвращает {user_id: адреса}
+    """
+    if not user_ids:
+        return {}
+    rankings = {user_id: [] for user_id in user_ids}
+    queryset = UserAddresses.objects.filter(user_id__in=user_ids).order_by()
+    for row in get_projection().values(queryset, 'user_id', 'last_order').iterator():
+        rankings[row['user_id']].append(_entry(row))
+    rankings = {user_id: _top(entries) for user_id, entries in rankings.items()}
+    _save(rankings)
+    return rankings
+
+
+def update_rankings(queryset) -> set:
+    """
+        Внести новые order_count/last_order адресов queryset в рейтинги их владельцев.
+        Вызывается после UPDATE счётчиков в той же транзакции. Счётчики только растут,
+        поэтому адрес вне рейтинга может попасть в него, только если его счётчик изменился:
+        достаточно слить изменённые адреса с сохранённым top-N. Возвращает id владельцев
+    """
+    changed = defaultdict(dict)
+    for row in get_projection().values(queryset.order_by(), 'user_id', 'last_order'):
+        changed[row['user_id']][row['id']] = _entry(row)
+    if not changed:
+        return set()
+
+    stored = dict(
+        PreferredAddresses.objects.select_for_update().filter(user_id__in=changed).order_by('user_id')
+        .values_list('user_id', 'addresses')
+    )
+    merged = {
+        user_id: _top([
+            *(entry for entry in stored[user_id] if entry['id'] not in entries), *entries.values()
+        ])
+        for user_id, entries in changed.items() if user_id in stored
+    }
+    if merged:
+        _save(merged)
+    # Рейтинга ещё нет или он сброшен изменением адресов - строим по всем адресам
+    rebuild_rankings(*(user_id for user_id in changed if user_id not in stored))
+    return set(changed)
+
+
+def invalidate_rankings(*user_ids) -> None:
+    """
+        Сбросить рейтинги после изменения состава или данных адресов, пересчёт - при следующем обращении
+    """
+    if user_ids:
+        PreferredAddresses.objects.filter(user_id__in=user_ids).delete()
+
+
+def get_preferred_addresses(user_id) -> list:
+    addresses = PreferredAddresses.objects.filter(user_id=user_id).values_list('addresses', flat=True).first()
+    if addresses is None:
+        addresses = rebuild_rankings(user_id)[user_id]
+    return addresses
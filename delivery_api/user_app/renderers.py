@@ -0,0 +1,47 @@
+from rest_framework.renderers import JSONRenderer
+
+from .instrumentation import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _has_float(data) -> bool:
+    """
+        Есть ли в данных float: orjson пишет NaN/Infinity как null (JSONRenderer отказывает)
+        и форматирует экспоненту иначе (1e16 вместо 1e+16)
+    """
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, float):
+            return True
+        if isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+        JSONRenderer на orjson (если установлен). Вывод побайтово совпадает с JSONRenderer
+        в компактном режиме с UNICODE_JSON; для отступов, ensure_ascii, float и неподдерживаемых
+        orjson типов используется стандартный рендерер
+    """
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None or _has_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            # Даты DRF форматирует по-своему - такие данные отдаём стандартному рендереру
+            ret = orjson.dumps(data, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -0,0 +1,233 @@
+import contextvars
+import itertools
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections as default_connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+class RoutingState:
+    """
+        Состояние маршрутизации текущего запроса
+    """
+    __slots__ = ('safe', 'user_id', 'pinned', 'wrote', 'replicas', 'failed')
+
+    def __init__(self, safe):
+        self.safe = safe
+        self.user_id = None
+        self.pinned = None
+        self.wrote = False
+        # Реплики, из которых читал запрос: {алиас: роутер}
+        self.replicas = {}
+        self.failed = False
+
+
+def set_current_user(user_id) -> None:
+    """
+        Запомнить пользователя запроса (вызывается аутентификацией до чтения из БД)
+    """
+    state = _state.get()
+    if state is not None and state.user_id != user_id:
+        state.user_id = user_id
+        state.pinned = None
+
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def pin_user(user_id) -> None:
+    """
+        После записи чтения пользователя идут в primary PIN_SECONDS секунд (read-your-writes).
+        Отметка хранится в общем кэше REPLICA_ROUTING['CACHE_ALIAS'], чтобы её видели все воркеры
+    """
+    if user_id is None or not settings.DATABASE_REPLICAS:
+        return
+    config = settings.REPLICA_ROUTING
+    caches[config['CACHE_ALIAS']].set(_pin_key(user_id), 1, timeout=config['PIN_SECONDS'])
+    state = _state.get()
+    if state is not None and state.user_id == user_id:
+        state.pinned = True
+
+
+class ReplicaRouter:
+    """
+        Чтения User и UserAddresses в безопасных (GET/HEAD/OPTIONS) запросах уходят в реплики
+        settings.DATABASE_REPLICAS по кругу. В primary остаются: записи и всё после них в этом же запросе,
+        чтения внутри транзакции, чтения пользователя в течение PIN_SECONDS после его записи,
+        а также всё вне HTTP-запроса. Недоступная реплика исключается на RETRY_INTERVAL секунд
+    """
+    def __init__(self, replicas=None, connections=None):
+        self._replicas = replicas
+        self.connections = connections or default_connections
+        self._health = {}
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self.stats = dict(replica_reads=0, primary_reads=0, pinned_reads=0, failovers=0, health_check_failures=0)
+
+    @property
+    def replicas(self):
+        return settings.DATABASE_REPLICAS if self._replicas is None else self._replicas
+
+    @staticmethod
+    def routed_models():
+        from .models import User, UserAddresses
+        return User, UserAddresses
+
+    def db_for_read(self, model, **hints):
+        replicas = self.replicas
+        if not replicas or model not in self.routed_models():
+            return None
+        state = _state.get()
+        if state is None or not state.safe or state.wrote or self.connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            self.stats['primary_reads'] += 1
+            return DEFAULT_DB_ALIAS
+        if self._is_pinned(state):
+            self.stats['pinned_reads'] += 1
+            return DEFAULT_DB_ALIAS
+        start = next(self._counter)
+        for offset in range(len(replicas)):
+            alias = replicas[(start + offset) % len(replicas)]
+            if self.is_healthy(alias):
+                self.stats['replica_reads'] += 1
+                state.replicas[alias] = self
+                return alias
+        self.stats['failovers'] += 1
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            if state.user_id is not None and model in self.routed_models():
+                pin_user(state.user_id)
+        return DEFAULT_DB_ALIAS if self.replicas else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *self.replicas}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему репликацией с primary
+        if db in self.replicas:
+            return False
+        return None
+
+    def is_healthy(self, alias):
+        config = settings.REPLICA_ROUTING
+        now = time.monotonic()
+        healthy, checked_at = self._health.get(alias, (True, None))
+        interval = config['HEALTH_CHECK_INTERVAL'] if healthy else config['RETRY_INTERVAL']
+        if checked_at is not None and now - checked_at < interval:
+            return healthy
+        healthy = self.check(alias)
+        with self._lock:
+            self._health[alias] = (healthy, now)
+            if not healthy:
+                self.stats['health_check_failures'] += 1
+        return healthy
+
+    def check(self, alias):
+        connection = self.connections[alias]
+        try:
+            connection.ensure_connection()
+            return connection.is_usable()
+        except Exception as error:
+            print(f'Error while check replica {alias}: {error}')
+            connection.close()
+            return False
+
+    def mark_unhealthy(self, alias) -> None:
+        with self._lock:
+            self._health[alias] = (False, time.monotonic())
+            self.stats['health_check_failures'] += 1
+        self.connections[alias].close()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats['healthy_replicas'] = sum(self._health.get(alias, (True, None))[0] for alias in self.replicas)
+        return stats
+
+    def _is_pinned(self, state):
+        if state.user_id is None:
+            return False
+        if state.pinned is None:
+            cache = caches[settings.REPLICA_ROUTING['CACHE_ALIAS']]
+            state.pinned = cache.get(_pin_key(state.user_id)) is not None
+        return state.pinned
+
+
+class ReplicaRoutingMiddleware:
+    """
+        Открывает состояние маршрутизации на время запроса.
+        OperationalError в безопасном запросе, читавшем из реплик, исключает эти реплики
+        на RETRY_INTERVAL секунд, и запрос повторяется с чтением из primary.
+        Работает и в синхронной, и в асинхронной цепочке
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = RoutingState(safe=request.method in SAFE_METHODS)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.failed:
+            token = _state.set(self.failover_state(state))
+            try:
+                response = self.get_response(request)
+            finally:
+                _state.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState(safe=request.method in SAFE_METHODS)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.failed:
+            token = _state.set(self.failover_state(state))
+            try:
+                response = await self.get_response(request)
+            finally:
+                _state.reset(token)
+        return response
+
+    def process_exception(self, request, exception):
+        state = _state.get()
+        if state is None or not state.safe or not state.replicas or not isinstance(exception, OperationalError):
+            return None
+        for alias, replica_router in state.replicas.items():
+            print(f'Error while read from replica {alias}: {exception}')
+            replica_router.mark_unhealthy(alias)
+            replica_router.stats['failovers'] += 1
+        state.failed = True
+        return None
+
+    @staticmethod
+    def failover_state(state):
+        # Повтор безопасного запроса: все чтения в primary
+        retry = RoutingState(safe=False)
+        retry.user_id = state.user_id
+        return retry
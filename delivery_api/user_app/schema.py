@@ -0,0 +1,137 @@
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotFound
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+# Описание API для генератора; drf_yasg импортируется только при генерации схемы
+SCHEMA_INFO = dict(
+    title='Snippets API',
+    default_version='v1',
+    description='Delivery API',
+    terms_of_service='https://www.google.com/policies/terms/',
+    contact_email='contact@snippets.local',
+    license_name='BSD License',
+)
+
+FORMATS = {
+    '.json': 'application/json; charset=utf-8',
+    '.yaml': 'application/yaml; charset=utf-8',
+}
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def generate_schema():
+    """
+        Сгенерировать OpenAPI-схему всех endpoint'ов: {'.json': bytes, '.yaml': bytes}
+    """
+    from drf_yasg import openapi
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    info = openapi.Info(
+        title=SCHEMA_INFO['title'],
+        default_version=SCHEMA_INFO['default_version'],
+        description=SCHEMA_INFO['description'],
+        terms_of_service=SCHEMA_INFO['terms_of_service'],
+        contact=openapi.Contact(email=SCHEMA_INFO['contact_email']),
+        license=openapi.License(name=SCHEMA_INFO['license_name']),
+    )
+    schema = OpenAPISchemaGenerator(info=info).get_schema(request=None, public=True)
+    result = {'.json': OpenAPICodecJson(validators=[]).encode(schema)}
+    try:
+        result['.yaml'] = OpenAPICodecYaml(validators=[]).encode(schema)
+    except Exception as error:
+        # YAML-кодек drf_yasg зависит от версии ruamel.yaml - без него отдаём только JSON
+        print(f'Error while generate yaml schema: {error!r}')
+    return result
+
+
+def schema_path(fmt):
+    return os.path.join(settings.OPENAPI_SCHEMA_DIR, f'swagger{fmt}')
+
+
+def write_schema():
+    """
+        Сгенерировать схему и записать файлы в OPENAPI_SCHEMA_DIR, возвращает пути
+    """
+    os.makedirs(settings.OPENAPI_SCHEMA_DIR, exist_ok=True)
+    paths = []
+    for fmt, content in generate_schema().items():
+        path = schema_path(fmt)
+        # Пишем через временный файл, чтобы воркеры не прочитали файл наполовину
+        with open(f'{path}.tmp', 'wb') as schema_file:
+            schema_file.write(content)
+        os.replace(f'{path}.tmp', path)
+        paths.append(path)
+    with _lock:
+        _loaded.clear()
+    return paths
+
+
+def load_schema(fmt):
+    """
+        Содержимое и ETag схемы. Файл перечитывается только при смене mtime.
+        Если файла нет и разрешено OPENAPI_SCHEMA_GENERATE_MISSING, схема один раз генерируется в памяти
+    """
+    path = schema_path(fmt)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    cached = _loaded.get(fmt)
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2]
+    with _lock:
+        cached = _loaded.get(fmt)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+        if mtime is not None:
+            with open(path, 'rb') as schema_file:
+                content = schema_file.read()
+        elif settings.OPENAPI_SCHEMA_GENERATE_MISSING:
+            print(f'Error while load schema: файл {path} не найден, схема сгенерирована в памяти')
+            content = generate_schema().get(fmt)
+            if content is None:
+                _loaded[fmt] = (mtime, None, None)
+                return None, None
+        else:
+            return None, None
+        etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+        _loaded[fmt] = (mtime, content, etag)
+    return content, etag
+
+
+def _cached_response(response, etag):
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.OPENAPI_SCHEMA_CACHE_SECONDS)
+    return response
+
+
+def schema_file_view(request, format):
+    """
+        Готовая схема из файла, собранного командой build_schema
+    """
+    content, etag = load_schema(format)
+    if content is None:
+        return HttpResponseNotFound('Схема не собрана: выполните manage.py build_schema')
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return _cached_response(not_modified, etag)
+    return _cached_response(HttpResponse(content, content_type=FORMATS[format]), etag)
+
+
+def schema_ui_view(request, ui):
+    """
+        Swagger UI / ReDoc поверх готовой схемы
+    """
+    spec_url = reverse('schema-json', kwargs={'format': '.json'})
+    response = render(request, f'user_app/{ui}.html', {'title': SCHEMA_INFO['title'], 'spec_url': spec_url})
+    patch_cache_control(response, public=True, max_age=settings.OPENAPI_SCHEMA_CACHE_SECONDS)
+    return response
@@ -0,0 +1,85 @@
+from functools import reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import CharField, Func, Q
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+
+# Верхняя граница диапазона префикса: больше любого символа в UTF-8
+PREFIX_UPPER_BOUND = '\U0010ffff'
+
+
+def fold(value):
+    """
+        Приведение строки для поиска без учёта регистра (функция SEARCH_FOLD в SQLite)
+    """
+    return value.lower() if value is not None else None
+
+
+class Fold(Func):
+    """
+        LOWER(поле). Встроенный LOWER в SQLite понимает только ASCII, поэтому там
+        используется SEARCH_FOLD - Python-функция, которую регистрирует register_sqlite_functions
+    """
+    function = 'LOWER'
+    output_field = CharField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, function='SEARCH_FOLD', **extra_context)
+
+
+def register_sqlite_functions(sender, connection, **kwargs):
+    """
+        Обработчик connection_created: SEARCH_FOLD используется в условиях поиска в SQLite
+    """
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function('SEARCH_FOLD', 1, fold, deterministic=True)
+
+
+def get_terms(search_term):
+    return [term for term in search_term.split() if term]
+
+
+def field_filter(field, term, vendor):
+    """
+        Условие по одному полю. PostgreSQL: icontains (UPPER(поле) LIKE UPPER('%term%')) по GIN-индексу
+        с gin_trgm_ops. Остальные БД: префикс, диапазоном по Fold(поле) (в SQLite без индекса,
+        см. миграцию 0007_search_indexes)
+    """
+    if vendor == 'postgresql':
+        return Q(**{f'{field}__icontains': term})
+    term = fold(term)
+    return Q(GreaterThanOrEqual(Fold(field), term)) & Q(LessThan(Fold(field), term + PREFIX_UPPER_BOUND))
+
+
+def search_filter(fields, search_term, using='default', related=None):
+    """
+        Каждое слово запроса должно найтись хотя бы в одном из полей.
+        related: {'user': (queryset, fields)} - поиск по связанной модели подзапросом user_id IN (...),
+        без JOIN и дублей строк
+    """
+    vendor = connections[using].vendor
+    conditions = []
+    for term in get_terms(search_term):
+        condition = [field_filter(field, term, vendor) for field in fields]
+        for name, (queryset, related_fields) in (related or {}).items():
+            matched = queryset.filter(reduce(or_, (field_filter(field, term, vendor) for field in related_fields)))
+            condition.append(Q(**{f'{name}__in': matched.values('pk')}))
+        conditions.append(reduce(or_, condition))
+    return reduce(and_, conditions) if conditions else Q()
+
+
+def search(queryset, fields, search_term, related=None):
+    return queryset.filter(search_filter(fields, search_term, queryset.db, related))
+
+
+def get_limit(value, max_results=None):
+    """
+        Количество результатов из параметра запроса, не больше max_results (ADDRESS_SEARCH['MAX_RESULTS'])
+    """
+    max_results = max_results or settings.ADDRESS_SEARCH['MAX_RESULTS']
+    try:
+        return min(max(int(value), 1), max_results)
+    except (TypeError, ValueError):
+        return max_results
@@ -1,9 +1,23 @@
 from django.contrib.auth import authenticate
+from django.contrib.auth.models import update_last_login
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer, TokenRefreshSlidingSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .instrumentation import timer
 from .models import User, UserAddresses
+from .tokens import RefreshToken, SlidingToken
 
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    """
+        Учитывает to_representation в фазе serialize метрик запроса
+    """
+    def to_representation(self, instance):
+        with timer('serialize'):
+            return super().to_representation(instance)
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
         Сериализатор пользователя
     """
@@ -12,7 +26,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'birthday')
 
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
         Сериализатор для регистрации пользователя
     """
@@ -27,6 +41,30 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return User.objects.create_user(**validated_data)
 
 
+class UserProvisionSerializer(serializers.ModelSerializer):
+    """
+        Сериализатор строки массового создания пользователей.
+        Уникальность username/email проверяется пачкой в UserProvisioner, а не запросом на строку
+    """
+    class Meta:
+        model = User
+        fields = ('username', 'password', 'email', 'first_name', 'last_name', 'birthday', 'role')
+        extra_kwargs = {
+            'password': {'write_only': True},
+            'username': {'validators': []},
+            'email': {'validators': []},
+        }
+
+
+class OrderEventSerializer(serializers.Serializer):
+    """
+        Сериализатор события заказа от сервиса заказов
+    """
+    event_id = serializers.CharField(max_length=64)
+    address_id = serializers.IntegerField(min_value=1)
+    ordered_at = serializers.DateTimeField()
+
+
 class UserLoginSerializer(serializers.Serializer):
     """
         Сериализатор для авторизации пользователя
@@ -37,11 +75,13 @@ class UserLoginSerializer(serializers.Serializer):
     def validate(self, data):
         user = authenticate(**data)
         if user and user.is_active:
+            if api_settings.UPDATE_LAST_LOGIN:
+                update_last_login(None, user)
             return user
         raise serializers.ValidationError('Неверный логин или пароль')
 
 
-class UserAddressCUDSerializer(serializers.ModelSerializer):
+class UserAddressCUDSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
         Сериализатор для создания, обновления и удаления адреса пользователя
     """
@@ -52,7 +92,7 @@ class UserAddressCUDSerializer(serializers.ModelSerializer):
         fields = ('id', 'user', 'city', 'street', 'house', 'entrance', 'floor', 'flat',)
 
 
-class UserAddressSerializer(serializers.ModelSerializer):
+class UserAddressSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
         Сериализатор для адресов пользователя
     """
@@ -76,3 +116,17 @@ class UserResetPasswordSerializer(serializers.Serializer):
         if password1 != password2:
             raise serializers.ValidationError('Пароли не совпадают')
         return data
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+        Сериализатор обновления токенов с проверкой чёрного списка через кэш
+    """
+    token_class = RefreshToken
+
+
+class UserSlidingTokenRefreshSerializer(TokenRefreshSlidingSerializer):
+    """
+        Сериализатор обновления sliding-токена: без запросов к БД, отозванные - через denylist
+    """
+    token_class = SlidingToken
@@ -0,0 +1,50 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, m2m_changed
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import invalidate_cached_user
+from .instrumentation import install_db_wrapper
+from .models import User, UserAddresses
+from .routers import pin_user
+from .ranking import invalidate_rankings
+from .search import register_sqlite_functions
+from .token_cache import token_blacklist_cache
+from .versioning import bump_user_version, invalidate_user_version
+
+connection_created.connect(install_db_wrapper, dispatch_uid='user_app_request_metrics')
+connection_created.connect(register_sqlite_functions, dispatch_uid='user_app_search_functions')
+
+
+@receiver(post_delete, sender=BlacklistedToken)
+def reset_token_blacklist_cache(sender, **kwargs):
+    # Bloom-фильтр не умеет удалять элементы - пересобираем кэш при следующем обращении
+    token_blacklist_cache.reset()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    # Версию данных при сохранении меняет User.save
+    invalidate_cached_user(instance.pk)
+    pin_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_version(sender, instance, **kwargs):
+    invalidate_user_version(instance.pk)
+
+
+@receiver(post_save, sender=UserAddresses)
+@receiver(post_delete, sender=UserAddresses)
+def bump_addresses_version(sender, instance, **kwargs):
+    bump_user_version(instance.user_id)
+    invalidate_rankings(instance.user_id)
+    pin_user(instance.user_id)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_cache_on_m2m(sender, instance, **kwargs):
+    if isinstance(instance, User):
+        invalidate_cached_user(instance.pk)
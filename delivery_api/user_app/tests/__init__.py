@@ -0,0 +1,9 @@
+import tempfile
+
+from django.conf import settings
+
+# Кэш 'users', общий для процессов (файловый): версии данных и кэш аутентификации работают через него
+SHARED_CACHES = dict(settings.CACHES, users={
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': tempfile.mkdtemp(prefix='delivery-api-users-'),
+})
@@ -0,0 +1,87 @@
+import re
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..admin import EstimatedCountPaginator, UserAddressesAdmin
+from ..models import User, UserAddresses
+
+CHANGELIST_URL = '/admin/user_app/useraddresses/'
+
+
+class UserAddressesAdminTestCase(TestCase):
+    """
+        Тесты для changelist адресов в админке
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='test_admin', password='test_admin', email='test_admin@mail.ru',
+            first_name='test_admin', last_name='test_admin', birthday='2000-01-01'
+        )
+        for number in range(5):
+            user = User.objects.create_user(
+                username=f'test_admin_{number}', password='test_admin', email=f'test_admin_{number}@mail.ru',
+                first_name='test_admin', last_name='test_admin', birthday='2000-01-01'
+            )
+            UserAddresses.objects.create(
+                user=user, city='Москва', street='Тверская', house='1', entrance=1, floor=1, flat='1',
+                order_count=number * 5
+            )
+
+    def setUp(self) -> None:
+        self.client.force_login(self.admin)
+
+    def get_ids(self, resp):
+        return [int(pk) for pk in re.findall(r'name="_selected_action" value="(\d+)"', resp.content.decode())]
+
+    def test_no_n_plus_one(self):
+        with CaptureQueriesContext(connection) as five_rows:
+            self.client.get(CHANGELIST_URL)
+        UserAddresses.objects.filter(pk__in=UserAddresses.objects.order_by('pk')[:3].values('pk')).delete()
+        with CaptureQueriesContext(connection) as two_rows:
+            self.client.get(CHANGELIST_URL)
+        self.assertEqual(len(five_rows), len(two_rows))
+
+    def test_keyset_navigation(self):
+        expected = list(UserAddresses.objects.order_by('-pk').values_list('pk', flat=True))
+        seen = []
+        with mock.patch.object(UserAddressesAdmin, 'list_per_page', 2):
+            resp = self.client.get(CHANGELIST_URL)
+            self.assertContains(resp, 'Следующая страница')
+            while True:
+                self.assertEqual(resp.status_code, 200)
+                seen.extend(self.get_ids(resp))
+                next_url = resp.context['cl'].next_page_url
+                if next_url is None:
+                    break
+                self.assertIn('after=', next_url)
+                resp = self.client.get(CHANGELIST_URL + next_url)
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        resp = self.client.get(CHANGELIST_URL, {'after': 'broken'})
+        self.assertEqual(resp.status_code, 302)
+
+    def test_sorted_by_column(self):
+        resp = self.client.get(CHANGELIST_URL, {'o': '4'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.context['cl'].keyset)
+
+    def test_users_changelist(self):
+        resp = self.client.get('/admin/user_app/user/', {'q': 'test_admin_'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['cl'].result_count, 5)
+
+    def test_order_count_filter(self):
+        resp = self.client.get(CHANGELIST_URL, {'orders': '1-5'})
+        self.assertEqual(self.get_ids(resp), list(UserAddresses.objects.filter(order_count=5).values_list('pk', flat=True)))
+
+    @override_settings(ADMIN_CHANGELIST={'COUNT_THRESHOLD': 2})
+    def test_count_threshold(self):
+        paginator = EstimatedCountPaginator(UserAddresses.objects.all(), 2)
+        # В SQLite оценки нет - выше порога считается точно
+        self.assertEqual(paginator.count, 5)
+        self.assertFalse(paginator.estimated)
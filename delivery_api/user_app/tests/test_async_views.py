@@ -0,0 +1,238 @@
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import user_login_failed
+from django.test import TestCase, AsyncRequestFactory, override_settings
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from ..async_views import (
+    AsyncUserRegistrationAPIView, AsyncUserLoginAPIView, AsyncUserLogoutAPIView, AsyncUserResetPasswordAPIView,
+    AsyncUserUpdateAPIView, AsyncUserAddressAPIView
+)
+from ..models import User, UserAddresses
+from ..tokens import RefreshToken
+
+
+class AsyncUserViewsTestCase(TestCase):
+    """
+        Тесты для async-версий endpoint'ов регистрации, авторизации и смены пароля
+    """
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_async@mail.ru',
+            first_name='test_async',
+            last_name='test_async',
+            birthday='2023-02-23'
+        )
+        cls.user = User.objects.create_user(username='test_async', password='test_async', **extra_kwargs)
+
+    def setUp(self) -> None:
+        self.factory = AsyncRequestFactory()
+
+    async def post(self, view_class, data, method='post', **extra):
+        request = getattr(self.factory, method)('/', data=json.dumps(data), content_type='application/json', **extra)
+        response = await view_class.as_view()(request)
+        return response, json.loads(response.content or b'null')
+
+    async def test_registration(self):
+        data = dict(
+            username='test_async_reg', password='test_async_reg', email='test_async_reg@mail.ru',
+            first_name='test_async_reg', last_name='test_async_reg', birthday='2023-02-23'
+        )
+        response, resp_data = await self.post(AsyncUserRegistrationAPIView, data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(resp_data.keys()),
+            ['id', 'username', 'email', 'first_name', 'last_name', 'birthday', 'created_at', 'tokens']
+        )
+        user = await User.objects.aget(username='test_async_reg')
+        self.assertTrue(await user.acheck_password('test_async_reg'))
+
+    async def test_registration_duplicate(self):
+        data = dict(
+            username='test_async', password='test_async', email='test_async@mail.ru',
+            first_name='test_async', last_name='test_async', birthday='2023-02-23'
+        )
+        response, resp_data = await self.post(AsyncUserRegistrationAPIView, data)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('username', resp_data)
+
+    async def test_login(self):
+        response, resp_data = await self.post(AsyncUserLoginAPIView, dict(username='test_async', password='test_async'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(resp_data.keys()), ['id', 'username', 'email', 'first_name', 'last_name', 'birthday', 'tokens'])
+        self.assertEqual(list(resp_data['tokens'].keys()), ['refresh', 'access'])
+
+    async def test_login_invalid(self):
+        response, resp_data = await self.post(AsyncUserLoginAPIView, dict(username='test_async', password='wrong'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(resp_data, {'non_field_errors': ['Неверный логин или пароль']})
+        response, resp_data = await self.post(AsyncUserLoginAPIView, dict(username='test_async'))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', resp_data)
+
+    async def test_login_signals_match_sync(self):
+        failed = []
+
+        def receiver(sender, credentials, request, **kwargs):
+            failed.append((sender, credentials, request))
+
+        user_login_failed.connect(receiver)
+        try:
+            await self.post(AsyncUserLoginAPIView, dict(username='test_async', password='wrong'))
+            await sync_to_async(self.client.post)('/users/login', dict(username='test_async', password='wrong'))
+        finally:
+            user_login_failed.disconnect(receiver)
+        self.assertEqual(len(failed), 2)
+        self.assertEqual(failed[0], failed[1])
+        self.assertEqual(failed[0][1]['username'], 'test_async')
+        self.assertNotEqual(failed[0][1]['password'], 'wrong')
+
+    @mock.patch.object(jwt_settings, 'UPDATE_LAST_LOGIN', True)
+    async def test_login_updates_last_login(self):
+        response, _ = await self.post(AsyncUserLoginAPIView, dict(username='test_async', password='test_async'))
+        self.assertEqual(response.status_code, 200)
+        last_login = (await User.objects.aget(pk=self.user.pk)).last_login
+        self.assertIsNotNone(last_login)
+        await sync_to_async(self.client.post)('/users/login', dict(username='test_async', password='test_async'))
+        self.assertGreater((await User.objects.aget(pk=self.user.pk)).last_login, last_login)
+
+    @override_settings(AUTH_THROTTLE=dict(
+        settings.AUTH_THROTTLE, ENABLED=True, STORE='user_app.throttling.LocMemThrottleStore',
+        RATES={'login': {'username': '1/min'}}
+    ))
+    async def test_login_throttled(self):
+        data = dict(username='test_async_throttled', password='wrong')
+        response, _ = await self.post(AsyncUserLoginAPIView, data)
+        self.assertEqual(response.status_code, 400)
+        response, _ = await self.post(AsyncUserLoginAPIView, data)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    async def test_reset_password(self):
+        response, _ = await self.post(
+            AsyncUserResetPasswordAPIView, dict(password1='new', password2='new'), method='put'
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(response.has_header('WWW-Authenticate'))
+
+        token = await sync_to_async(RefreshToken.for_user)(user=self.user)
+        response, _ = await self.post(
+            AsyncUserResetPasswordAPIView, dict(password1='new_pass', password2='new_pass'), method='put',
+            authorization=f'Token {token.access_token}'
+        )
+        self.assertEqual(response.status_code, 200)
+        user = await User.objects.aget(pk=self.user.pk)
+        self.assertTrue(await user.acheck_password('new_pass'))
+
+
+class AsyncUserAddressAPIViewTestCase(TestCase):
+    """
+        Тесты для async-версий endpoint'ов адресов, профиля и выхода: ответы совпадают с синхронными
+    """
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_async_addr@mail.ru',
+            first_name='test_async_addr',
+            last_name='test_async_addr',
+            birthday='2023-02-23'
+        )
+        cls.user = User.objects.create_user(username='test_async_addr', password='test_async_addr', **extra_kwargs)
+        address_data = dict(user=cls.user, city='Москва', street='Тверская', house='1', entrance=1, floor=1, flat='1')
+        cls.addresses = UserAddresses.objects.bulk_create(
+            UserAddresses(order_count=index % 2, **address_data) for index in range(3)
+        )
+        cls.access = str(RefreshToken.for_user(user=cls.user).access_token)
+
+    def setUp(self) -> None:
+        self.factory = AsyncRequestFactory()
+
+    async def call(self, view_class, method, path, data=None, **kwargs):
+        body = json.dumps(data) if data is not None else ''
+        request = getattr(self.factory, method)(
+            path, data=body, content_type='application/json', authorization=f'Token {self.access}'
+        )
+        response = await view_class.as_view()(request, **kwargs)
+        return response, json.loads(response.content or b'null')
+
+    async def sync_call(self, method, path, data=None):
+        response = await sync_to_async(getattr(self.client, method))(
+            path, data=data, content_type='application/json', HTTP_AUTHORIZATION=f'Token {self.access}'
+        )
+        return response, json.loads(response.content or b'null')
+
+    async def test_list_matches_sync(self):
+        path = '/users/addresses?page_size=2'
+        response, resp_data = await self.call(AsyncUserAddressAPIView, 'get', path)
+        sync_response, sync_data = await self.sync_call('get', path)
+        self.assertEqual(response.status_code, sync_response.status_code)
+        self.assertEqual(resp_data, sync_data)
+
+        response, resp_data = await self.call(AsyncUserAddressAPIView, 'get', resp_data['next'])
+        sync_response, sync_data = await self.sync_call('get', sync_data['next'])
+        self.assertEqual(resp_data, sync_data)
+        self.assertEqual(len(resp_data['results']), 1)
+
+    async def test_retrieve_matches_sync(self):
+        address_id = self.addresses[0].pk
+        path = f'/users/addresses/{address_id}'
+        response, resp_data = await self.call(AsyncUserAddressAPIView, 'get', path, address_id=address_id)
+        sync_response, sync_data = await self.sync_call('get', path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(resp_data, sync_data)
+
+        response, resp_data = await self.call(AsyncUserAddressAPIView, 'get', '/users/addresses/0', address_id=0)
+        sync_response, sync_data = await self.sync_call('get', '/users/addresses/0')
+        self.assertEqual((response.status_code, resp_data), (sync_response.status_code, sync_data))
+
+    async def test_not_modified(self):
+        response, _ = await self.call(AsyncUserAddressAPIView, 'get', '/users/addresses')
+        sync_response, _ = await self.sync_call('get', '/users/addresses')
+        self.assertEqual(response['ETag'], sync_response['ETag'])
+        request = self.factory.get(
+            '/users/addresses', authorization=f'Token {self.access}', if_none_match=response['ETag']
+        )
+        response = await AsyncUserAddressAPIView.as_view()(request)
+        self.assertEqual(response.status_code, 304)
+
+    async def test_create_update_delete(self):
+        data = dict(city='Казань', street='Баумана', house='2', entrance=1, floor=2, flat='3')
+        response, resp_data = await self.call(AsyncUserAddressAPIView, 'post', '/users/addresses', data)
+        sync_response, sync_data = await self.sync_call('post', '/users/addresses', data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(resp_data.keys(), sync_data.keys())
+
+        address_id = resp_data['id']
+        path = f'/users/addresses/{address_id}'
+        response, resp_data = await self.call(
+            AsyncUserAddressAPIView, 'patch', path, dict(floor=5), address_id=address_id
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(resp_data['floor'], 5)
+
+        response, resp_data = await self.call(
+            AsyncUserAddressAPIView, 'put', path, dict(floor='этаж'), address_id=address_id
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('floor', resp_data)
+
+        response, _ = await self.call(AsyncUserAddressAPIView, 'delete', path, address_id=address_id)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(await UserAddresses.objects.filter(pk=address_id).aexists())
+
+    async def test_update_profile(self):
+        response, resp_data = await self.call(AsyncUserUpdateAPIView, 'put', '/users/update', dict(first_name='new'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(resp_data['first_name'], 'new')
+        self.assertEqual(list(resp_data.keys()), ['id', 'username', 'email', 'first_name', 'last_name', 'birthday'])
+
+    async def test_logout(self):
+        refresh = str(await sync_to_async(RefreshToken.for_user)(user=self.user))
+        response, _ = await self.call(AsyncUserLogoutAPIView, 'post', '/users/logout', dict(refresh=refresh))
+        self.assertEqual(response.status_code, 205)
+        response, _ = await self.call(AsyncUserLogoutAPIView, 'post', '/users/logout', dict(refresh=refresh))
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from ..models import User
+from ..tokens import RefreshToken
+from . import SHARED_CACHES
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class CachedJWTAuthenticationTestCase(TestCase):
+    """
+        Тесты для CachedJWTAuthentication
+    """
+    endpoint_url = '/users/addresses'
+
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_auth_cache@mail.ru',
+            first_name='test_auth_cache',
+            last_name='test_auth_cache',
+            birthday='2023-02-23'
+        )
+        cls.user = User.objects.create_user(username='test_auth_cache', password='test_auth_cache', **extra_kwargs)
+
+    def setUp(self) -> None:
+        caches[settings.USER_AUTH_CACHE_ALIAS].clear()
+        token = RefreshToken.for_user(user=self.user)
+        self.auth_header = f'Token {token.access_token}'
+
+    def get(self):
+        return self.client.get(self.endpoint_url, HTTP_AUTHORIZATION=self.auth_header)
+
+    @override_settings(ADDRESS_LIST_CACHE=dict(settings.ADDRESS_LIST_CACHE, ENABLED=False))
+    def test_user_cached(self):
+        self.assertEqual(self.get().status_code, 200)
+        with self.assertNumQueries(1):
+            resp = self.get()
+        self.assertEqual(resp.status_code, 200)
+
+    def test_deactivation(self):
+        self.get()
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_update_invalidates(self):
+        self.get()
+        resp = self.client.put('/users/update', data={'first_name': 'new_name'},
+                               content_type='application/json', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(resp.status_code, 200)
+        cached = caches[settings.USER_AUTH_CACHE_ALIAS].get(f'auth-user:{self.user.pk}')
+        self.assertIsNone(cached)
+
+    def test_delete(self):
+        self.get()
+        resp = self.client.delete('/users/delete', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_password_not_cached(self):
+        self.get()
+        cached = caches[settings.USER_AUTH_CACHE_ALIAS].get(f'auth-user:{self.user.pk}')
+        self.assertNotIn(self.user.password, cached)
+        self.assertIn(self.user.username, cached)
+
+
+class LocalCacheAuthenticationTestCase(TestCase):
+    """
+        Тесты аутентификации без общего кэша
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='test_auth_local', password='test_auth_local', email='test_auth_local@mail.ru',
+            first_name='test_auth_local', last_name='test_auth_local', birthday='2023-02-23'
+        )
+
+    def test_not_cached(self):
+        caches[settings.USER_AUTH_CACHE_ALIAS].clear()
+        auth_header = f'Token {RefreshToken.for_user(user=self.user).access_token}'
+        self.assertEqual(self.client.get('/users/profile', HTTP_AUTHORIZATION=auth_header).status_code, 200)
+        self.assertIsNone(caches[settings.USER_AUTH_CACHE_ALIAS].get(f'auth-user:{self.user.pk}'))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get('/users/profile', HTTP_AUTHORIZATION=auth_header).status_code, 401)
@@ -0,0 +1,48 @@
+import math
+
+from django.db import OperationalError
+from django.test import Client, SimpleTestCase
+
+from ..benchmark import BenchmarkRunner, Scenario, compare, percentile
+
+
+class FlakyScenario(Scenario):
+    name = 'flaky'
+    expected_status = 401
+
+    def prepare(self, state, index):
+        if index % 2:
+            raise OperationalError('database is locked')
+        return '/users/addresses', None, {}
+
+
+class BenchmarkTestCase(SimpleTestCase):
+    """
+        Тесты для расчёта метрик и сравнения с baseline
+    """
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_compare(self):
+        baseline = {'scenarios': {'login': {'p95_ms': 10.0, 'throughput_rps': 100.0, 'queries_per_request': 0.0}}}
+        results = {'scenarios': {
+            'login': {'p95_ms': 13.0, 'throughput_rps': 95.0, 'queries_per_request': 1.0},
+            'logout': {'p95_ms': 1.0},
+        }}
+        rows = {row['metric']: row for row in compare(results, baseline, threshold=0.2)}
+        self.assertTrue(rows['p95_ms']['regression'])
+        self.assertFalse(rows['throughput_rps']['regression'])
+        self.assertTrue(rows['queries_per_request']['regression'])
+        self.assertTrue(math.isinf(rows['queries_per_request']['change']))
+        self.assertEqual(len(rows), 3)
+
+    def test_request_errors_counted(self):
+        state = type('State', (), {'client': Client()})()
+        result = BenchmarkRunner(clients=1, requests=4, warmup=1).run_scenario(FlakyScenario(), [state])
+        self.assertEqual((result['count'], result['errors']), (2, 2))
+        self.assertEqual(result['error_statuses'], ['OperationalError'])
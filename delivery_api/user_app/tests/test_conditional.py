@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.contrib.auth.models import update_last_login
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+
+from ..models import User, UserAddresses
+from ..tokens import RefreshToken
+from ..versioning import get_user_version
+from . import SHARED_CACHES
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class ConditionalGetTestCase(TestCase):
+    """
+        Тесты для ETag/Last-Modified профиля и адресов
+    """
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_etag@mail.ru',
+            first_name='test_etag',
+            last_name='test_etag',
+            birthday='2023-02-23'
+        )
+        cls.user = User.objects.create_user(username='test_etag', password='test_etag', **extra_kwargs)
+        cls.address = UserAddresses.objects.create(
+            user=cls.user, city='Москва', street='Тверская', house='1', entrance=1, floor=1, flat='1'
+        )
+
+    def setUp(self) -> None:
+        caches[settings.USER_AUTH_CACHE_ALIAS].clear()
+        token = RefreshToken.for_user(user=self.user)
+        self.auth_header = f'Token {token.access_token}'
+
+    def get(self, url, **headers):
+        return self.client.get(url, HTTP_AUTHORIZATION=self.auth_header, **headers)
+
+    def test_not_modified_without_queries(self):
+        for url in ('/users/profile', '/users/addresses', f'/users/addresses/{self.address.pk}'):
+            resp = self.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertIn('ETag', resp)
+            self.assertIn('private', resp['Cache-Control'])
+            with self.assertNumQueries(0):
+                resp_304 = self.get(url, HTTP_IF_NONE_MATCH=resp['ETag'])
+            self.assertEqual(resp_304.status_code, 304)
+            self.assertEqual(resp_304['ETag'], resp['ETag'])
+            self.assertEqual(resp_304.content, b'')
+
+    def test_if_modified_since(self):
+        resp = self.get('/users/addresses')
+        resp = self.get('/users/addresses', HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'])
+        self.assertEqual(resp.status_code, 304)
+        resp = self.get('/users/addresses', HTTP_IF_MODIFIED_SINCE=http_date(0))
+        self.assertEqual(resp.status_code, 200)
+
+    def test_write_changes_etag(self):
+        etag = self.get('/users/addresses')['ETag']
+        resp = self.client.post('/users/addresses', data={
+            'city': 'Москва', 'street': 'Арбат', 'house': '2', 'entrance': 1, 'floor': 1, 'flat': '2'
+        }, content_type='application/json', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(resp.status_code, 201)
+        resp = self.get('/users/addresses', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()['results']), 2)
+
+    def test_profile_update_changes_etag(self):
+        etag = self.get('/users/profile')['ETag']
+        self.client.put('/users/update', data={'first_name': 'new_name'},
+                        content_type='application/json', HTTP_AUTHORIZATION=self.auth_header)
+        resp = self.get('/users/profile', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['first_name'], 'new_name')
+
+    @override_settings(ORDER_COUNTER_MODE='sync')
+    def test_order_count_changes_version(self):
+        version = get_user_version(self.user.pk)
+        self.address.update_order_count()
+        self.assertNotEqual(get_user_version(self.user.pk), version)
+
+    def test_stale_instance_save_changes_version(self):
+        stale = User.objects.get(pk=self.user.pk)
+        self.address.city = 'Тула'
+        self.address.save()
+        version = get_user_version(self.user.pk)
+        # Экземпляр, загруженный до смены версии, перезаписывает её старым номером
+        stale.save()
+        self.assertGreater(get_user_version(self.user.pk)[0], version[0])
+
+    def test_login_keeps_version(self):
+        version = get_user_version(self.user.pk)
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            update_last_login(None, user)
+        self.assertEqual(get_user_version(self.user.pk), version)
+        user.first_name = 'new_name'
+        with self.assertNumQueries(1):
+            user.save(update_fields=['first_name'])
+        self.assertGreater(get_user_version(self.user.pk)[0], version[0])
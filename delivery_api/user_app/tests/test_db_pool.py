@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+
+from django.db.utils import ConnectionHandler, OperationalError
+from django.test import SimpleTestCase
+
+from ..db import pool as db_pool
+from ..db.pool import ConnectionPool, PoolTimeout
+
+
+def ping(conn):
+    conn.execute('SELECT 1')
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    """
+        Тесты для ConnectionPool на соединениях sqlite3
+    """
+    def make_pool(self, **config):
+        return ConnectionPool(connect=lambda: sqlite3.connect(':memory:', check_same_thread=False), ping=ping, **config)
+
+    def test_reuse(self):
+        pool = self.make_pool(MIN_SIZE=2, MAX_SIZE=5)
+        self.assertEqual(pool.get_stats()['idle'], 2)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+        stats = pool.get_stats()
+        self.assertEqual((stats['created'], stats['in_use'], stats['checkouts']), (2, 1, 2))
+
+    def test_max_size(self):
+        pool = self.make_pool(MAX_SIZE=1, TIMEOUT=0.05)
+        conn = pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+        self.assertEqual(pool.get_stats()['timeouts'], 1)
+
+    def test_health_check(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.close()
+        new_conn = pool.getconn()
+        self.assertIsNot(new_conn, conn)
+        stats = pool.get_stats()
+        self.assertEqual((stats['health_check_failures'], stats['discarded'], stats['size']), (1, 1, 1))
+
+    def test_max_lifetime(self):
+        pool = self.make_pool(MAX_LIFETIME=0)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertEqual(pool.get_stats()['size'], 0)
+        self.assertIsNot(pool.getconn(), conn)
+
+    def test_discard_after_error(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn, discard=True)
+        self.assertEqual(pool.get_stats()['size'], 0)
+
+
+class PooledBackendTestCase(SimpleTestCase):
+    """
+        Тесты для пулового бэкенда на SQLite
+    """
+    def setUp(self) -> None:
+        path = os.path.join(tempfile.mkdtemp(), 'pool.sqlite3')
+        self.databases_settings = {
+            'default': {'ENGINE': 'django.db.backends.dummy'},
+            'pool_test': {
+                'ENGINE': 'user_app.db.backends.sqlite3', 'NAME': path, 'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0.05}
+            },
+        }
+        self.connections = ConnectionHandler(self.databases_settings)
+        self.connection = self.connections['pool_test']
+
+    def tearDown(self) -> None:
+        self.connection.close()
+        self.connection.pool.close()
+        db_pool._pools.pop('pool_test', None)
+
+    def test_return_to_pool(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        raw = self.connection.connection
+        self.connection.close()
+        self.assertEqual(self.connection.pool.get_stats()['idle'], 1)
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertIs(self.connection.connection, raw)
+
+    def test_pool_exhausted(self):
+        self.connection.ensure_connection()
+        other = ConnectionHandler(self.databases_settings)['pool_test']
+        with self.assertRaises(OperationalError):
+            other.ensure_connection()
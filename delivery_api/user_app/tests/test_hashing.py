@@ -0,0 +1,60 @@
+import threading
+
+from django.test import TestCase, override_settings
+
+from ..hashing import PasswordHashingPool, PasswordHashingUnavailable
+from ..models import User
+
+POOL_SETTINGS = dict(ENABLED=True, MAX_WORKERS=1, MAX_QUEUE=1, TIMEOUT=5)
+
+
+@override_settings(PASSWORD_HASHING_POOL=POOL_SETTINGS)
+class PasswordHashingPoolTestCase(TestCase):
+    """
+        Тесты для пула хэширования паролей
+    """
+    def setUp(self) -> None:
+        self.pool = PasswordHashingPool()
+
+    def test_run(self):
+        self.assertEqual(self.pool.run(sum, (1, 2)), 3)
+        self.assertEqual(self.pool.stats['submitted'], 1)
+
+    def test_rejects_when_saturated(self):
+        release = threading.Event()
+        futures = [self.pool.submit(release.wait) for _ in range(2)]
+        with self.assertRaises(PasswordHashingUnavailable):
+            self.pool.submit(release.wait)
+        self.assertEqual(self.pool.stats['rejected'], 1)
+        release.set()
+        for future in futures:
+            future.result()
+        self.assertEqual(self.pool.run(sum, (1, 2)), 3)
+
+    def test_timeout(self):
+        release = threading.Event()
+        with override_settings(PASSWORD_HASHING_POOL=dict(POOL_SETTINGS, TIMEOUT=0.01)):
+            with self.assertRaises(PasswordHashingUnavailable):
+                self.pool.run(release.wait)
+        release.set()
+        self.assertEqual(self.pool.stats['timeouts'], 1)
+
+    def test_map(self):
+        self.assertEqual(self.pool.map(abs, range(-3, 2)), [3, 2, 1, 0, 1])
+        self.assertEqual(self.pool.stats['submitted'], 5)
+
+    def test_map_waits_for_slot(self):
+        release = threading.Event()
+        futures = [self.pool.submit(release.wait) for _ in range(2)]
+        threading.Timer(0.05, release.set).start()
+        # Пачка ждёт свободного места, а не отклоняется сразу
+        self.assertEqual(self.pool.map(abs, [-1, -2]), [1, 2])
+        for future in futures:
+            future.result()
+        self.assertEqual(self.pool.stats['rejected'], 0)
+
+    def test_user_password(self):
+        user = User(username='test_hashing')
+        user.set_password('test_hashing')
+        self.assertTrue(user.check_password('test_hashing'))
+        self.assertFalse(user.check_password('wrong'))
@@ -0,0 +1,97 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from ..instrumentation import MetricsRegistry, RequestMetricsMiddleware, registry, timer
+from ..list_cache import address_list_cache
+from ..models import User, UserAddresses
+from ..tokens import RefreshToken
+
+
+class MetricsRegistryTestCase(TestCase):
+    """
+        Тесты для MetricsRegistry
+    """
+    def test_render(self):
+        metrics = MetricsRegistry(prefix='test')
+        metrics.describe('duration_seconds', 'histogram', 'Длительность')
+        metrics.observe('duration_seconds', (('view', 'a"b'),), 0.003, buckets=(0.001, 0.01))
+        metrics.observe('duration_seconds', (('view', 'a"b'),), 0.5, buckets=(0.001, 0.01))
+        text = metrics.render()
+        self.assertIn('# TYPE test_duration_seconds histogram', text)
+        self.assertIn('test_duration_seconds_bucket{view="a\\"b",le="0.001"} 0', text)
+        self.assertIn('test_duration_seconds_bucket{view="a\\"b",le="0.01"} 1', text)
+        self.assertIn('test_duration_seconds_bucket{view="a\\"b",le="+Inf"} 2', text)
+        self.assertIn('test_duration_seconds_count{view="a\\"b"} 2', text)
+
+
+class RequestMetricsMiddlewareTestCase(TestCase):
+    """
+        Тесты для RequestMetricsMiddleware и /metrics
+    """
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_metrics@mail.ru',
+            first_name='test_metrics',
+            last_name='test_metrics',
+            birthday='2023-02-23'
+        )
+        cls.user = User.objects.create_user(username='test_metrics', password='test_metrics', **extra_kwargs)
+        UserAddresses.objects.create(
+            user=cls.user, city='Москва', street='Тверская', house='1', entrance=1, floor=1, flat='1'
+        )
+
+    def setUp(self) -> None:
+        registry.reset()
+        address_list_cache.clear()
+        token = RefreshToken.for_user(user=self.user)
+        self.auth_header = f'Token {token.access_token}'
+
+    def test_server_timing(self):
+        resp = self.client.get('/users/addresses', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(resp.status_code, 200)
+        phases = {entry.split(';')[0].strip() for entry in resp['Server-Timing'].split(',')}
+        self.assertTrue({'total', 'db', 'serialize', 'render', 'jwt'} <= phases)
+
+    def test_login_hash_phase(self):
+        resp = self.client.post('/users/login', data={'username': 'test_metrics', 'password': 'test_metrics'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('hash;dur=', resp['Server-Timing'])
+
+    def test_metrics_endpoint(self):
+        self.client.get('/users/addresses', HTTP_AUTHORIZATION=self.auth_header)
+        resp = self.client.get('/metrics')
+        self.assertEqual(resp.status_code, 200)
+        text = resp.content.decode()
+        self.assertIn('delivery_api_request_phase_seconds_count{view="users:addresses-list",phase="total"} 1', text)
+        self.assertIn('delivery_api_requests_total{view="users:addresses-list",method="GET",status="2xx"} 1', text)
+        self.assertIn('delivery_api_address_list_cache{stat="misses"}', text)
+
+    @override_settings(REQUEST_METRICS=dict(settings.REQUEST_METRICS, TOKEN='secret'))
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    @override_settings(REQUEST_METRICS=dict(settings.REQUEST_METRICS, ENABLED=False))
+    def test_disabled(self):
+        resp = self.client.get('/users/addresses', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertNotIn('Server-Timing', resp)
+
+
+class AsyncRequestMetricsMiddlewareTestCase(SimpleTestCase):
+    """
+        Тесты RequestMetricsMiddleware в асинхронной цепочке
+    """
+    def test_async_chain(self):
+        async def get_response(request):
+            with timer('serialize'):
+                pass
+            return HttpResponse()
+
+        middleware = RequestMetricsMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
@@ -0,0 +1,143 @@
+import threading
+import time
+
+from django.test import TestCase, override_settings
+from django.conf import settings
+from django.core.cache import caches
+
+from ..list_cache import ListCache, LocMemListCacheBackend, address_list_cache
+from ..models import User, UserAddresses
+from ..tokens import RefreshToken
+from ..versioning import bump_user_version
+from . import SHARED_CACHES
+
+
+class LocMemListCacheBackendTestCase(TestCase):
+    """
+        Тесты для LocMemListCacheBackend
+    """
+    def test_eviction(self):
+        backend = LocMemListCacheBackend(max_entries=2)
+        backend.set('a', 1, timeout=None)
+        backend.set('b', 2, timeout=None)
+        backend.get('a')
+        backend.set('c', 3, timeout=None)
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(backend.get('a'), 1)
+        self.assertEqual(backend.evictions, 1)
+
+    def test_timeout(self):
+        backend = LocMemListCacheBackend()
+        backend.set('a', 1, timeout=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(backend.get('a'))
+
+
+class ListCacheTestCase(TestCase):
+    """
+        Тесты для ListCache
+    """
+    def setUp(self) -> None:
+        self.cache = ListCache('test-list', 'ADDRESS_LIST_CACHE')
+        self.cache.clear()
+
+    def test_single_flight(self):
+        calls = []
+
+        def builder():
+            calls.append(1)
+            time.sleep(0.05)
+            return ['data']
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get_or_set(1, 'page', builder)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [['data']] * 5)
+        stats = self.cache.get_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'] + stats['coalesced'], 4)
+
+    def test_version_change(self):
+        user = User.objects.create_user(
+            username='test_version', password='test_version', email='test_version@mail.ru',
+            first_name='test_version', last_name='test_version', birthday='2023-02-23'
+        )
+        self.cache.get_or_set(user.pk, 'page', lambda: ['old'])
+        bump_user_version(user.pk)
+        self.assertEqual(self.cache.get_or_set(user.pk, 'page', lambda: ['new']), ['new'])
+        self.assertEqual(self.cache.get_stats()['stale'], 1)
+
+    @override_settings(ADDRESS_LIST_CACHE=dict(
+        settings.ADDRESS_LIST_CACHE, BACKEND='user_app.list_cache.DjangoListCacheBackend',
+        OPTIONS={'cache_alias': 'default'}
+    ))
+    def test_django_backend(self):
+        self.assertEqual(self.cache.get_or_set(1, 'page', lambda: ['data']), ['data'])
+        self.assertEqual(self.cache.get_or_set(1, 'page', lambda: ['other']), ['data'])
+        self.cache.invalidate(1)
+        self.assertEqual(self.cache.get_or_set(1, 'page', lambda: ['other']), ['other'])
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class AddressListCacheTestCase(TestCase):
+    """
+        Тесты кэширования списка адресов в UserAddressAPIViewSet
+    """
+    endpoint_url = '/users/addresses'
+
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_list_cache@mail.ru',
+            first_name='test_list_cache',
+            last_name='test_list_cache',
+            birthday='2023-02-23'
+        )
+        cls.user = User.objects.create_user(username='test_list_cache', password='test_list_cache', **extra_kwargs)
+        cls.address = UserAddresses.objects.create(
+            user=cls.user, city='Москва', street='Тверская', house='1', entrance=1, floor=1, flat='1'
+        )
+
+    def setUp(self) -> None:
+        address_list_cache.clear()
+        caches['users'].clear()
+        token = RefreshToken.for_user(user=self.user)
+        self.auth_header = f'Token {token.access_token}'
+
+    def request(self, method, url, data=None):
+        return getattr(self.client, method)(
+            url, data=data, content_type='application/json', HTTP_AUTHORIZATION=self.auth_header
+        )
+
+    def test_cached(self):
+        first = self.request('get', self.endpoint_url)
+        with self.assertNumQueries(0):
+            second = self.request('get', self.endpoint_url)
+        self.assertEqual(first.content, second.content)
+
+    def test_invalidation(self):
+        self.request('get', self.endpoint_url)
+        data = {'city': 'Москва', 'street': 'Арбат', 'house': '2', 'entrance': 1, 'floor': 1, 'flat': '2'}
+        resp = self.request('post', self.endpoint_url, data)
+        self.assertEqual(len(self.request('get', self.endpoint_url).json()['results']), 2)
+
+        self.request('patch', f'{self.endpoint_url}/{resp.json()["id"]}', {'city': 'Казань'})
+        cities = {address['city'] for address in self.request('get', self.endpoint_url).json()['results']}
+        self.assertEqual(cities, {'Москва', 'Казань'})
+
+        self.request('delete', f'{self.endpoint_url}/{resp.json()["id"]}')
+        self.assertEqual(len(self.request('get', self.endpoint_url).json()['results']), 1)
+
+    @override_settings(ORDER_COUNTER_MODE='sync')
+    def test_order_count(self):
+        self.request('get', self.endpoint_url)
+        UserAddresses.objects.get(pk=self.address.pk).update_order_count()
+        resp = self.request('get', self.endpoint_url)
+        self.assertEqual(resp.json()['results'][0]['order_count'], 1)
@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..counters import OrderCountBuffer
+from ..models import User, UserAddresses
+from ..pagination import UserAddressKeysetPagination
+
+
+class UserAddressesOrderCountTestCase(TestCase):
+    """
+        Тесты для счётчика заказов по адресам
+    """
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_counter@mail.ru',
+            first_name='test_counter',
+            last_name='test_counter',
+            birthday='2023-02-23'
+        )
+        user = User.objects.create_user(username='test_counter', password='test_counter', **extra_kwargs)
+        address_data = dict(user=user, city='Москва', street='Тверская', house='1', entrance=1, floor=1, flat='1')
+        cls.address = UserAddresses.objects.create(**address_data)
+        cls.other_address = UserAddresses.objects.create(**address_data)
+
+    def setUp(self) -> None:
+        self.buffer = OrderCountBuffer(flush_interval=3600, max_pending=100, batch_size=100)
+
+    def tearDown(self) -> None:
+        self.buffer._stop.set()
+
+    @override_settings(ORDER_COUNTER_MODE='buffered')
+    def test_buffered_until_flush(self):
+        for _ in range(3):
+            self.buffer.add(self.address.pk)
+        self.buffer.add(self.other_address.pk)
+        self.assertEqual(self.buffer.pending, 2)
+        self.address.refresh_from_db()
+        self.assertEqual(self.address.order_count, 0)
+
+        updated = self.buffer.flush()
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.buffer.pending, 0)
+        self.address.refresh_from_db()
+        self.other_address.refresh_from_db()
+        self.assertEqual(self.address.order_count, 3)
+        self.assertEqual(self.other_address.order_count, 1)
+
+    @override_settings(ORDER_COUNTER_MODE='buffered')
+    def test_last_order_is_latest(self):
+        ordered_at = timezone.now() + timedelta(days=1)
+        self.buffer.add(self.address.pk, ordered_at=ordered_at)
+        self.buffer.add(self.address.pk, ordered_at=ordered_at - timedelta(hours=1))
+        self.buffer.flush()
+        self.address.refresh_from_db()
+        self.assertEqual(self.address.last_order, ordered_at)
+
+    @override_settings(ORDER_COUNTER_MODE='buffered')
+    def test_flush_on_threshold(self):
+        buffer = OrderCountBuffer(flush_interval=3600, max_pending=2)
+        buffer.add(self.address.pk)
+        buffer.add(self.other_address.pk)
+        buffer._stop.set()
+        self.assertEqual(buffer.pending, 0)
+        self.address.refresh_from_db()
+        self.assertEqual(self.address.order_count, 1)
+
+    @override_settings(ORDER_COUNTER_MODE='buffered')
+    def test_shutdown_flushes(self):
+        self.buffer.add(self.address.pk)
+        self.buffer.shutdown()
+        self.address.refresh_from_db()
+        self.assertEqual(self.address.order_count, 1)
+
+    @override_settings(ORDER_COUNTER_MODE='buffered')
+    def test_add_after_shutdown(self):
+        self.buffer.shutdown()
+        self.buffer.add(self.address.pk)
+        self.assertEqual(self.buffer.pending, 0)
+        self.address.refresh_from_db()
+        self.assertEqual(self.address.order_count, 1)
+
+    @override_settings(ORDER_COUNTER_MODE='sync')
+    def test_update_order_count_sync(self):
+        self.address.update_order_count()
+        self.address.update_order_count()
+        self.address.refresh_from_db()
+        self.assertEqual(self.address.order_count, 2)
+
+
+class UserAddressesIndexTestCase(TestCase):
+    """
+        Регрессионные тесты планов запросов для списка адресов
+    """
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_explain@mail.ru',
+            first_name='test_explain',
+            last_name='test_explain',
+            birthday='2023-02-23'
+        )
+        cls.user = User.objects.create_user(username='test_explain', password='test_explain', **extra_kwargs)
+        address_data = dict(user=cls.user, city='Москва', street='Тверская', house='1', entrance=1, floor=1, flat='1')
+        UserAddresses.objects.bulk_create(UserAddresses(order_count=index, **address_data) for index in range(50))
+
+    def explain(self, queryset):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # На маленькой таблице планировщик и так выберет seq scan, проверяем, что индекс применим
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def assertIndexPlan(self, plan):
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan', plan)
+            self.assertNotRegex(plan, r'(?m)(^|->)\s*(Incremental )?Sort\b')
+            self.assertIn('address_user_list_covering_idx', plan)
+        elif connection.vendor == 'sqlite':
+            self.assertNotIn('TEMP B-TREE', plan)
+            self.assertIn('address_user_list_covering_idx', plan)
+
+    def test_list_query_plan(self):
+        ordering = UserAddressKeysetPagination.ordering
+        queryset = UserAddresses.objects.filter(user_id=self.user.pk).order_by(*ordering)[:51]
+        self.assertIndexPlan(self.explain(queryset))
+
+    def test_list_default_ordering_plan(self):
+        queryset = UserAddresses.objects.filter(user_id=self.user.pk)
+        self.assertIndexPlan(self.explain(queryset))
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import OrderEvent, User, UserAddresses
+from ..order_events import OrderEventIngestor
+
+
+@override_settings(ORDER_EVENTS=dict(BATCH_SIZE=100, MAX_EVENTS=5, RETENTION_DAYS=30))
+class OrderEventIngestorTestCase(TestCase):
+    """
+        Тесты для приёма событий заказов
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='test_events', password='test_events', email='test_events@mail.ru',
+            first_name='test_events', last_name='test_events', birthday='2023-02-23', is_staff=True
+        )
+        address_data = dict(user=cls.admin, city='Москва', street='Тверская', house='1', entrance=1, floor=1, flat='1')
+        cls.addresses = UserAddresses.objects.bulk_create(UserAddresses(**address_data) for _ in range(3))
+        cls.ordered_at = timezone.now() + timedelta(days=1)
+
+    def event(self, event_id, address, hours=0):
+        return {
+            'event_id': f'event-{event_id}', 'address_id': address.pk,
+            'ordered_at': (self.ordered_at - timedelta(hours=hours)).isoformat()
+        }
+
+    def test_coalesced_single_update(self):
+        events = [self.event(index, self.addresses[index % 2], hours=index) for index in range(10)]
+        with CaptureQueriesContext(connection) as queries:
+            report = OrderEventIngestor().run(events)
+        self.assertEqual((report['received'], report['applied'], report['addresses']), (10, 10, 2))
+        self.assertGreater(report['events_per_second'], 0)
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "user_app_useraddresses"')]
+        self.assertEqual(len(updates), 1)
+        first, second = UserAddresses.objects.filter(pk__in=[self.addresses[0].pk, self.addresses[1].pk])
+        self.assertEqual((first.order_count, second.order_count), (5, 5))
+        self.assertEqual(first.last_order, self.ordered_at)
+
+    def test_idempotent(self):
+        events = [self.event(1, self.addresses[0]), self.event(2, self.addresses[0]), self.event(1, self.addresses[0])]
+        report = OrderEventIngestor().run(events)
+        self.assertEqual((report['applied'], report['duplicates']), (2, 1))
+        report = OrderEventIngestor(batch_size=1).run(events + [self.event(3, self.addresses[0])])
+        self.assertEqual((report['applied'], report['duplicates']), (1, 3))
+        self.assertEqual(UserAddresses.objects.get(pk=self.addresses[0].pk).order_count, 3)
+        self.assertEqual(OrderEvent.objects.count(), 3)
+
+    def test_last_order_not_moved_back(self):
+        OrderEventIngestor().run([self.event(1, self.addresses[2])])
+        OrderEventIngestor().run([self.event(2, self.addresses[2], hours=5)])
+        address = UserAddresses.objects.get(pk=self.addresses[2].pk)
+        self.assertEqual((address.order_count, address.last_order), (2, self.ordered_at))
+
+    def test_unknown_address(self):
+        missing = UserAddresses(pk=self.addresses[-1].pk + 100)
+        events = [self.event(1, self.addresses[0]), self.event(2, missing), self.event(3, self.addresses[0])]
+        report = OrderEventIngestor().run(events)
+        self.assertEqual((report['applied'], report['duplicates']), (2, 0))
+        self.assertEqual([error['row'] for error in report['errors']], [2])
+        self.assertIn('address_id', report['errors'][0]['errors'])
+        self.assertFalse(OrderEvent.objects.filter(event_id='event-2').exists())
+
+    def test_purge_expired(self):
+        OrderEventIngestor().run([self.event(1, self.addresses[0]), self.event(2, self.addresses[0])])
+        OrderEvent.objects.filter(event_id='event-1').update(received_at=timezone.now() - timedelta(days=31))
+        self.assertEqual(OrderEventIngestor().purge_expired(), 1)
+        self.assertEqual(list(OrderEvent.objects.values_list('event_id', flat=True)), ['event-2'])
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        rows = [self.event(1, self.addresses[0]), {'event_id': 'event-2', 'address_id': 'нет'}]
+        body = '\n'.join(json.dumps(row) for row in rows)
+        resp = client.post('/users/order-events', data=body, content_type='application/x-ndjson')
+        self.assertEqual(resp.status_code, 207)
+        self.assertEqual((resp.data['applied'], resp.data['errors'][0]['row']), (1, 2))
+
+        rows = [self.event(index, self.addresses[1]) for index in range(10, 16)]
+        resp = client.post('/users/order-events', data=json.dumps(rows), content_type='application/json')
+        self.assertEqual(resp.status_code, 207)
+        self.assertEqual(resp.data['applied'], 5)
+        self.assertIn('detail', resp.data)
+
+    def test_command(self):
+        path = os.path.join(tempfile.mkdtemp(), 'events.ndjson')
+        with open(path, 'w', encoding='utf-8') as events_file:
+            for index in range(4):
+                events_file.write(json.dumps(self.event(index, self.addresses[0])) + '\n')
+        out = StringIO()
+        call_command('ingest_order_events', path, '--batch-size', '3', stdout=out)
+        self.assertIn('применено: 4', out.getvalue())
+        self.assertIn('событий/с', out.getvalue())
+        self.assertEqual(UserAddresses.objects.get(pk=self.addresses[0].pk).order_count, 4)
@@ -0,0 +1,103 @@
+from datetime import date
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from ..models import User, UserAddresses
+from ..projections import ValuesProjection
+from ..renderers import FastJSONRenderer
+from ..serializers import UserAddressSerializer, UserSerializer
+from ..tokens import RefreshToken
+
+
+class FastJSONRendererTestCase(TestCase):
+    """
+        Тесты для FastJSONRenderer
+    """
+    def test_same_bytes(self):
+        data = [
+            {'id': 1, 'city': 'Москва', 'flat': None, 'ok': True, 'text': 'a b "c"'},
+            {'nested': {'list': [1, 2.5, -3]}, 'date': date(2023, 2, 23), 'at': timezone.now()},
+        ]
+        for item in data:
+            self.assertEqual(FastJSONRenderer().render(item), JSONRenderer().render(item))
+
+    def test_floats(self):
+        data = {'values': [0.1, 2.5, 1e16, 1e-7, 123456789.123, -0.0], 'nested': [{'price': 1e22}]}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({'value': value})
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render({'value': [value]})
+
+    def test_indent(self):
+        context = {'indent': 4}
+        data = {'id': 1}
+        self.assertEqual(FastJSONRenderer().render(data, renderer_context=context),
+                         JSONRenderer().render(data, renderer_context=context))
+
+
+class ValuesProjectionTestCase(TestCase):
+    """
+        Тесты для быстрого пути чтения через ValuesProjection
+    """
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_projection@mail.ru',
+            first_name='test_projection',
+            last_name='test_projection',
+            birthday='2023-02-23',
+            is_staff=True
+        )
+        cls.user = User.objects.create_user(username='test_projection', password='test_projection', **extra_kwargs)
+        address_data = dict(user=cls.user, city='Москва', street='Тверская', house='1', entrance=1, floor=1)
+        UserAddresses.objects.bulk_create(
+            UserAddresses(order_count=index % 2, flat=str(index), **address_data)
+            for index in range(5)
+        )
+
+    def setUp(self) -> None:
+        token = RefreshToken.for_user(user=self.user)
+        self.auth_header = f'Token {token.access_token}'
+
+    def get(self, url):
+        return self.client.get(url, HTTP_AUTHORIZATION=self.auth_header)
+
+    def test_represent(self):
+        cases = (
+            (UserAddressSerializer, UserAddresses.objects.filter(user=self.user)),
+            (UserSerializer, User.objects.all()),
+        )
+        for serializer_class, queryset in cases:
+            projection = ValuesProjection(serializer_class)
+            expected = JSONRenderer().render(serializer_class(queryset.order_by('pk'), many=True).data)
+            result = FastJSONRenderer().render(projection.represent_many(projection.values(queryset.order_by('pk'))))
+            self.assertEqual(result, expected)
+
+    def test_same_response(self):
+        address = UserAddresses.objects.filter(user=self.user).first()
+        for url in ('/users/addresses?page_size=2', f'/users/addresses/{address.pk}', '/users/list'):
+            with override_settings(API_FAST_READ_PATH=False):
+                expected = self.get(url)
+            resp = self.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.content, expected.content)
+
+    def test_pages(self):
+        cur_ids = []
+        next_url = '/users/addresses?page_size=2'
+        while next_url:
+            resp = self.get(next_url)
+            cur_ids.extend(address['id'] for address in resp.json()['results'])
+            next_url = resp.json()['next']
+        expected_ids = list(
+            UserAddresses.objects.filter(user=self.user).order_by('order_count', '-last_order', 'pk')
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(cur_ids, expected_ids)
+
+    def test_not_found(self):
+        self.assertEqual(self.get('/users/addresses/0').status_code, 404)
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .. import purge
+from ..models import User, UserAddresses, UserPurge
+from ..purge import UserPurger
+from ..tokens import RefreshToken
+
+
+class UserPurgeTestCase(TestCase):
+    """
+        Тесты для soft-delete и фонового удаления пользователя
+    """
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(
+            username='test_purge', password='test_purge', email='test_purge@mail.ru',
+            first_name='test_purge', last_name='test_purge', birthday='2000-01-01'
+        )
+        UserAddresses.objects.bulk_create(
+            UserAddresses(user=self.user, city='Москва', street='Тверская', house='1', entrance=1, floor=1, flat=str(n))
+            for n in range(5)
+        )
+        tokens = [RefreshToken.for_user(user=self.user) for _ in range(3)]
+        tokens[0].blacklist()
+        self.auth_header = f'Token {tokens[1].access_token}'
+
+    def test_soft_delete(self):
+        resp = self.client.delete('/users/delete', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(resp.status_code, 204)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertIsNotNone(self.user.deleted_at)
+        self.assertEqual(UserPurge.objects.get(user_id=self.user.pk).status, 'pending')
+        # Данные на месте до прохода воркера, но пользователь уже не аутентифицируется
+        self.assertEqual(UserAddresses.objects.filter(user=self.user).count(), 5)
+        resp = self.client.get('/users/profile', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(resp.status_code, 401)
+
+    @override_settings(USER_DELETE_MODE='hard')
+    def test_hard_delete(self):
+        resp = self.client.delete('/users/delete', HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(resp.status_code, 204)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(UserPurge.objects.exists())
+
+    def test_purge(self):
+        self.user.soft_delete()
+        self.assertEqual(UserPurger(chunk_size=2).run_once(), 1)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(UserAddresses.objects.exists())
+        self.assertFalse(OutstandingToken.objects.exists())
+        self.assertFalse(BlacklistedToken.objects.exists())
+        task = UserPurge.objects.get(user_id=self.user.pk)
+        self.assertEqual(task.status, 'done')
+        self.assertEqual(task.deleted_rows['addresses'], 5)
+        self.assertEqual(task.deleted_rows['tokens'], 3)
+        # Повторный проход ничего не делает
+        self.assertEqual(UserPurger().run_once(), 0)
+
+    def test_retry(self):
+        self.user.soft_delete()
+        failing = dict(purge.PURGE_STEPS, tokens=mock.Mock(side_effect=RuntimeError('db is down')))
+        with mock.patch.object(purge, 'PURGE_STEPS', failing):
+            self.assertEqual(UserPurger(chunk_size=2).run_once(), 0)
+        task = UserPurge.objects.get(user_id=self.user.pk)
+        self.assertEqual((task.status, task.step, task.attempts), ('pending', 'tokens', 1))
+        self.assertEqual(task.deleted_rows['addresses'], 5)
+        self.assertEqual(task.last_error, 'db is down')
+        self.assertGreater(task.next_attempt_at, timezone.now())
+        # После паузы задача продолжается с того же места
+        UserPurge.objects.filter(pk=task.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(UserPurger().run_once(), 1)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+
+    @override_settings(USER_PURGE=dict(settings.USER_PURGE, MAX_ATTEMPTS=1))
+    def test_failed(self):
+        self.user.soft_delete()
+        with mock.patch.object(purge, 'PURGE_STEPS', {'addresses': mock.Mock(side_effect=RuntimeError('error'))}):
+            UserPurger().run_once()
+        self.assertEqual(UserPurge.objects.get(user_id=self.user.pk).status, 'failed')
+
+    def test_restored(self):
+        self.user.soft_delete()
+        User.objects.filter(pk=self.user.pk).update(is_active=True, deleted_at=None)
+        self.assertEqual(UserPurger().run_once(), 0)
+        self.assertFalse(UserPurge.objects.exists())
+        self.assertEqual(UserAddresses.objects.filter(user=self.user).count(), 5)
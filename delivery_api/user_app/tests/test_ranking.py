@@ -0,0 +1,71 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ..models import PreferredAddresses, User, UserAddresses
+from ..ranking import get_preferred_addresses, rebuild_rankings
+
+
+@override_settings(ORDER_COUNTER_MODE='sync', PREFERRED_ADDRESSES={'SIZE': 3})
+class PreferredAddressesTestCase(TestCase):
+    """
+        Тесты для рейтинга самых используемых адресов
+    """
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_preferred@mail.ru',
+            first_name='test_preferred',
+            last_name='test_preferred',
+            birthday='2023-02-23'
+        )
+        cls.user = User.objects.create_user(username='test_preferred', password='test_preferred', **extra_kwargs)
+        address_data = dict(user=cls.user, city='Москва', street='Тверская', house='1', entrance=1, floor=1, flat='1')
+        cls.addresses = UserAddresses.objects.bulk_create(UserAddresses(**address_data) for _ in range(5))
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def order(self, address, times=1):
+        for _ in range(times):
+            UserAddresses(pk=address.pk).update_order_count()
+
+    def ranked_ids(self):
+        return [entry['id'] for entry in get_preferred_addresses(self.user.pk)]
+
+    def test_incremental_update(self):
+        rebuild_rankings(self.user.pk)
+        self.order(self.addresses[3], 3)
+        self.order(self.addresses[1], 2)
+        self.order(self.addresses[4])
+        self.assertEqual(self.ranked_ids(), [self.addresses[3].pk, self.addresses[1].pk, self.addresses[4].pk])
+        # Адрес вне top-N попадает в рейтинг, когда его счётчик обгоняет последний
+        self.order(self.addresses[0], 2)
+        self.assertEqual(self.ranked_ids(), [self.addresses[3].pk, self.addresses[0].pk, self.addresses[1].pk])
+        self.assertEqual(get_preferred_addresses(self.user.pk)[0]['order_count'], 3)
+
+    def test_matches_rebuild(self):
+        for index, times in enumerate((1, 4, 2, 4, 3)):
+            self.order(self.addresses[index], times)
+        incremental = get_preferred_addresses(self.user.pk)
+        self.assertEqual(incremental, rebuild_rankings(self.user.pk)[self.user.pk])
+
+    def test_invalidated_on_change(self):
+        self.order(self.addresses[2], 2)
+        self.assertTrue(PreferredAddresses.objects.filter(user=self.user).exists())
+        address = UserAddresses.objects.get(pk=self.addresses[2].pk)
+        address.city = 'Тула'
+        address.save()
+        self.assertFalse(PreferredAddresses.objects.filter(user=self.user).exists())
+        self.assertEqual(get_preferred_addresses(self.user.pk)[0]['city'], 'Тула')
+
+    def test_endpoint(self):
+        self.order(self.addresses[1], 2)
+        get_preferred_addresses(self.user.pk)
+        with self.assertNumQueries(1):
+            response = self.client.get('/users/addresses/preferred', {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response.data[0]['id'], self.addresses[1].pk)
+        self.assertEqual(response.data[0]['order_count'], 2)
+        self.assertEqual(len(self.client.get('/users/addresses/preferred', {'limit': 100}).data), 3)
@@ -0,0 +1,112 @@
+import os
+import tempfile
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..checks import check_replica_pin_cache
+from ..models import User, UserAddresses
+from ..routers import ReplicaRouter, ReplicaRoutingMiddleware, pin_user, set_current_user
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from . import SHARED_CACHES
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+class ReplicaRouterTestCase(SimpleTestCase):
+    """
+        Тесты для ReplicaRouter на нескольких SQLite-алиасах
+    """
+    def setUp(self) -> None:
+        directory = tempfile.mkdtemp()
+        self.databases_settings = {
+            'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(directory, 'default.sqlite3')},
+            'replica_1': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(directory, 'r1.sqlite3')},
+            'replica_2': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(directory, 'r2.sqlite3')},
+        }
+        self.connections = ConnectionHandler(self.databases_settings)
+        self.router = ReplicaRouter(connections=self.connections)
+        caches[settings.REPLICA_ROUTING['CACHE_ALIAS']].clear()
+
+    def tearDown(self) -> None:
+        self.connections.close_all()
+
+    def route(self, method='get', user_id=None, action=None):
+        def get_response(request):
+            if user_id is not None:
+                set_current_user(user_id)
+            if action is not None:
+                action()
+            return [self.router.db_for_read(model) for model in (User, UserAddresses, OutstandingToken)]
+        return ReplicaRoutingMiddleware(get_response)(getattr(RequestFactory(), method)('/'))
+
+    def test_safe_reads(self):
+        first, second, other = self.route()
+        self.assertEqual({first, second}, {'replica_1', 'replica_2'})
+        self.assertIsNone(other)
+        self.assertEqual(self.route(method='post')[:2], ['default', 'default'])
+
+    def test_outside_request(self):
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_read_after_write_in_request(self):
+        result = self.route(action=lambda: self.router.db_for_write(UserAddresses))
+        self.assertEqual(result[:2], ['default', 'default'])
+
+    def test_pin_after_write(self):
+        self.route(method='post', user_id=1, action=lambda: self.router.db_for_write(UserAddresses))
+        self.assertEqual(self.route(user_id=1)[:2], ['default', 'default'])
+        self.assertIn(self.route(user_id=2)[0], ('replica_1', 'replica_2'))
+        pin_user(3)
+        self.assertEqual(self.route(user_id=3)[0], 'default')
+        self.assertEqual(self.router.get_stats()['pinned_reads'], 4)
+
+    def test_failover(self):
+        self.connections['replica_1'].settings_dict['NAME'] = '/nonexistent/dir/r1.sqlite3'
+        self.assertEqual(set(self.route()[:2]), {'replica_2'})
+        self.connections['replica_2'].settings_dict['NAME'] = '/nonexistent/dir/r2.sqlite3'
+        self.router.mark_unhealthy('replica_2')
+        self.assertEqual(self.route()[:2], ['default', 'default'])
+        stats = self.router.get_stats()
+        self.assertEqual((stats['failovers'], stats['healthy_replicas']), (2, 0))
+
+    def test_operational_error_failover(self):
+        calls = []
+
+        def get_response(request):
+            calls.append([self.router.db_for_read(model) for model in (User, UserAddresses)])
+            if len(calls) == 1:
+                # Так Django передаёт middleware исключение представления
+                middleware.process_exception(request, OperationalError('replica is down'))
+            return calls[-1]
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        self.assertEqual(middleware(RequestFactory().get('/')), ['default', 'default'])
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(any(self.router.is_healthy(alias) for alias in calls[0]))
+        self.assertEqual(self.router.get_stats()['failovers'], 2)
+
+    def test_async_chain(self):
+        async def get_response(request):
+            # Асинхронные представления читают из БД через sync_to_async, состояние запроса переходит в поток
+            return await sync_to_async(lambda: [self.router.db_for_read(model) for model in (User, UserAddresses)])()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertEqual(set(async_to_sync(middleware)(RequestFactory().get('/'))), {'replica_1', 'replica_2'})
+
+    def test_check_requires_shared_cache(self):
+        self.assertEqual([error.id for error in check_replica_pin_cache(None)], ['user_app.E002'])
+        with self.settings(CACHES=SHARED_CACHES):
+            self.assertEqual(check_replica_pin_cache(None), [])
+
+    def test_allow_migrate(self):
+        self.assertFalse(self.router.allow_migrate('replica_1', 'user_app'))
+        self.assertIsNone(self.router.allow_migrate('default', 'user_app'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        self.assertEqual(self.route()[:2], [None, None])
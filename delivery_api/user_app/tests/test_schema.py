@@ -0,0 +1,46 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from ..schema import write_schema
+
+
+class SchemaViewsTestCase(TestCase):
+    """
+        Тесты для отдачи предсобранной OpenAPI-схемы
+    """
+    def setUp(self) -> None:
+        self.schema_dir = tempfile.mkdtemp()
+        self.override = override_settings(OPENAPI_SCHEMA_DIR=self.schema_dir, OPENAPI_SCHEMA_GENERATE_MISSING=False)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+
+    def test_missing(self):
+        self.assertEqual(self.client.get('/swagger.json').status_code, 404)
+
+    def test_serve_file(self):
+        paths = write_schema()
+        self.assertIn(os.path.join(self.schema_dir, 'swagger.json'), paths)
+        resp = self.client.get('/swagger.json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('/addresses', resp.json()['paths'])
+        self.assertIn('max-age=', resp['Cache-Control'])
+        resp = self.client.get('/swagger.json', HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_reload_after_rebuild(self):
+        path = os.path.join(self.schema_dir, 'swagger.json')
+        with open(path, 'wb') as schema_file:
+            schema_file.write(b'{"swagger": "2.0"}')
+        etag = self.client.get('/swagger.json')['ETag']
+        with open(path, 'wb') as schema_file:
+            schema_file.write(b'{"swagger": "2.0", "paths": {}}')
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+        self.assertNotEqual(self.client.get('/swagger.json')['ETag'], etag)
+
+    def test_ui(self):
+        for url in ('/swagger/', '/redoc/'):
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertContains(resp, '/swagger.json')
@@ -0,0 +1,75 @@
+from unittest import skipUnless
+
+from django.contrib.admin.sites import site
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+
+from ..models import User, UserAddresses
+from ..search import search
+from ..tokens import RefreshToken
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username, password=username, email=f'{username}@mail.ru',
+        first_name=username, last_name=username, birthday='2000-01-01'
+    )
+
+
+class SearchTestCase(TestCase):
+    """
+        Тесты для поиска по индексам (в SQLite - префиксный)
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('Иванов')
+        cls.other = create_user('test_search_other')
+        address = dict(house='1', entrance=1, floor=1, flat='1')
+        cls.moscow = UserAddresses.objects.create(user=cls.user, city='Москва', street='Тверская', order_count=1, **address)
+        cls.kazan = UserAddresses.objects.create(user=cls.user, city='Казань', street='Московская', order_count=5, **address)
+        UserAddresses.objects.create(user=cls.other, city='Москва', street='Арбат', **address)
+
+    def setUp(self) -> None:
+        token = RefreshToken.for_user(user=self.user)
+        self.auth_header = f'Token {token.access_token}'
+
+    def test_case_insensitive_prefix(self):
+        queryset = search(UserAddresses.objects.filter(user=self.user), ('city', 'street'), 'моск')
+        self.assertCountEqual(queryset, [self.moscow, self.kazan])
+        queryset = search(UserAddresses.objects.filter(user=self.user), ('city', 'street'), 'МОСК тВер')
+        self.assertCountEqual(queryset, [self.moscow])
+
+    def test_related(self):
+        related = {'user': (User.objects.all(), ('username',))}
+        queryset = search(UserAddresses.objects.all(), ('city',), 'иван', related)
+        self.assertCountEqual(queryset, [self.moscow, self.kazan])
+
+    def test_endpoint(self):
+        resp = self.client.get('/users/addresses/search', {'q': 'моск'}, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([row['id'] for row in resp.json()], [self.kazan.pk, self.moscow.pk])
+
+    @override_settings(ADDRESS_SEARCH={'MIN_LENGTH': 2, 'MAX_RESULTS': 1})
+    def test_endpoint_limit(self):
+        resp = self.client.get(
+            '/users/addresses/search', {'q': 'моск', 'limit': 10}, HTTP_AUTHORIZATION=self.auth_header
+        )
+        self.assertEqual(len(resp.json()), 1)
+
+    @skipUnless(connection.vendor == 'sqlite', 'только SQLite')
+    def test_no_sqlite_expression_indexes(self):
+        # Индекс по SEARCH_FOLD() не дал бы писать в таблицу клиентам без этой функции
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, UserAddresses._meta.db_table)
+        self.assertNotIn('useraddresses_city_search_idx', indexes)
+
+    def test_endpoint_short_term(self):
+        resp = self.client.get('/users/addresses/search', {'q': 'м'}, HTTP_AUTHORIZATION=self.auth_header)
+        self.assertEqual(resp.status_code, 400)
+
+    def test_admin(self):
+        request = RequestFactory().get('/')
+        model_admin = site._registry[UserAddresses]
+        queryset, may_have_duplicates = model_admin.get_search_results(request, UserAddresses.objects.all(), 'иван')
+        self.assertFalse(may_have_duplicates)
+        self.assertCountEqual(queryset, [self.moscow, self.kazan])
@@ -0,0 +1,119 @@
+import time
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from ..checks import check_sliding_token_denylist
+from ..models import User
+from ..serializers import UserSlidingTokenRefreshSerializer
+from ..token_cache import SlidingTokenDenylist, sliding_token_denylist
+from ..tokens import SlidingToken
+from . import SHARED_CACHES
+
+DENYLIST_SETTINGS = dict(CACHE_ALIAS='users', MAX_LOCAL_ENTRIES=100, PRUNE_INTERVAL=3600)
+
+
+@override_settings(SLIDING_TOKEN_DENYLIST=DENYLIST_SETTINGS)
+class SlidingTokenDenylistTestCase(SimpleTestCase):
+    """
+        Тесты для списка отозванных sliding-токенов
+    """
+    def setUp(self) -> None:
+        caches['users'].clear()
+
+    def test_add(self):
+        denylist = SlidingTokenDenylist()
+        denylist.add('jti-1', time.time() + 60)
+        self.assertTrue(denylist.is_denied('jti-1'))
+        self.assertFalse(denylist.is_denied('jti-2'))
+        self.assertEqual(denylist.get_stats()['local_hits'], 1)
+
+    def test_expired_not_stored(self):
+        denylist = SlidingTokenDenylist()
+        denylist.add('jti-1', time.time() - 1)
+        self.assertFalse(denylist.is_denied('jti-1'))
+        self.assertEqual(denylist.get_stats()['revoked'], 0)
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_shared_cache_lookup(self):
+        caches['users'].clear()
+        SlidingTokenDenylist().add('jti-1', time.time() + 60)
+        # Другой экземпляр (как другой воркер) находит JTI в общем кэше и запоминает его локально
+        other = SlidingTokenDenylist()
+        self.assertTrue(other.is_denied('jti-1'))
+        self.assertTrue(other.is_denied('jti-1'))
+        stats = other.get_stats()
+        self.assertEqual((stats['shared_lookups'], stats['local_hits'], stats['local_size']), (1, 1, 1))
+
+    @override_settings(SLIDING_TOKEN_DENYLIST=dict(DENYLIST_SETTINGS, MAX_LOCAL_ENTRIES=2))
+    def test_local_bounded(self):
+        denylist = SlidingTokenDenylist()
+        for index in range(5):
+            denylist.add(f'jti-{index}', time.time() + 60)
+        self.assertLessEqual(denylist.get_stats()['local_size'], 2)
+        # Вытесненные из памяти процесса записи остаются в общем кэше
+        self.assertTrue(all(denylist.is_denied(f'jti-{index}') for index in range(5)))
+
+    @override_settings(AUTH_TOKEN_MODE='sliding')
+    def test_check_requires_shared_cache(self):
+        self.assertEqual([error.id for error in check_sliding_token_denylist(None)], ['user_app.E001'])
+        with self.settings(CACHES=SHARED_CACHES):
+            self.assertEqual(check_sliding_token_denylist(None), [])
+
+
+@override_settings(AUTH_TOKEN_MODE='sliding', SLIDING_TOKEN_DENYLIST=DENYLIST_SETTINGS)
+class SlidingTokenTestCase(TestCase):
+    """
+        Тесты для режима sliding-токенов
+    """
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_sliding@mail.ru',
+            first_name='test_sliding',
+            last_name='test_sliding',
+            birthday='2023-02-23'
+        )
+        cls.user = User.objects.create_user(username='test_sliding', password='test_sliding', **extra_kwargs)
+
+    def setUp(self) -> None:
+        caches['users'].clear()
+        sliding_token_denylist.reset()
+        self.client = APIClient()
+
+    def test_refresh_without_queries(self):
+        token = SlidingToken.for_user(self.user)
+        with self.assertNumQueries(0):
+            serializer = UserSlidingTokenRefreshSerializer(data={'token': str(token)})
+            serializer.is_valid(raise_exception=True)
+        refreshed = SlidingToken(serializer.validated_data['token'])
+        self.assertEqual(refreshed['jti'], token['jti'])
+        self.assertEqual(refreshed['refresh_exp'], token['refresh_exp'])
+
+    def test_blacklist(self):
+        token = SlidingToken.for_user(self.user)
+        token.blacklist()
+        with self.assertRaises(TokenError):
+            SlidingToken(str(token))
+
+    def test_login_refresh_logout(self):
+        response = self.client.post('/users/login', {'username': 'test_sliding', 'password': 'test_sliding'})
+        self.assertEqual(response.status_code, 200)
+        token = response.data['tokens']['token']
+        self.assertNotIn('refresh', response.data['tokens'])
+
+        response = self.client.post('/users/token/refresh', {'token': token})
+        self.assertEqual(response.status_code, 200)
+        token = response.data['token']
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(self.client.get('/users/profile').status_code, 200)
+        self.assertEqual(self.client.post('/users/logout').status_code, 205)
+        self.assertEqual(self.client.get('/users/profile').status_code, 401)
+        self.client.credentials()
+        self.assertEqual(self.client.post('/users/token/refresh', {'token': token}).status_code, 401)
+        self.assertFalse(OutstandingToken.objects.exists())
+        self.assertFalse(BlacklistedToken.objects.exists())
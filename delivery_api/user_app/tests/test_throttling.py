@@ -0,0 +1,107 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..hashing import password_hashing_pool
+from ..instrumentation import registry
+from ..models import User
+from ..throttling import CacheThrottleStore, LocMemThrottleStore, SharedMemoryThrottleStore, auth_throttle
+
+
+def throttle_settings(**rates):
+    return dict(
+        settings.AUTH_THROTTLE, ENABLED=True, RATES=rates, STORE='user_app.throttling.LocMemThrottleStore', OPTIONS={}
+    )
+
+
+class ThrottleStoreTestCase(SimpleTestCase):
+    """
+        Тесты для хранилищ счётчиков
+    """
+    def assert_store(self, store):
+        self.assertEqual(store.hit('a', 10, 60), (1, 0))
+        self.assertEqual(store.hit('a', 10, 60), (2, 0))
+        self.assertEqual(store.hit('b', 10, 60), (1, 0))
+        # Новое окно: текущий счётчик становится предыдущим
+        self.assertEqual(store.hit('a', 11, 60), (1, 2))
+        # Пропущенное окно обнуляет оба
+        self.assertEqual(store.hit('a', 13, 60), (1, 0))
+
+    def test_locmem(self):
+        self.assert_store(LocMemThrottleStore())
+
+    def test_locmem_eviction(self):
+        store = LocMemThrottleStore(max_entries=1)
+        store.hit('a', 1, 60)
+        store.hit('b', 1, 60)
+        self.assertEqual(store.hit('a', 1, 60), (1, 0))
+        self.assertEqual(store.get_stats()['evictions'], 2)
+
+    def test_cache(self):
+        caches['users'].clear()
+        self.assert_store(CacheThrottleStore('users'))
+
+    def test_shared_memory(self):
+        path = os.path.join(tempfile.mkdtemp(), 'throttle')
+        self.assert_store(SharedMemoryThrottleStore(path=path, slots=64))
+        # Второй экземпляр (как другой воркер) видит те же счётчики
+        self.assertEqual(SharedMemoryThrottleStore(path=path, slots=64).hit('b', 10, 60), (2, 0))
+
+    def test_shared_memory_eviction(self):
+        store = SharedMemoryThrottleStore(path=os.path.join(tempfile.mkdtemp(), 'throttle'), slots=2)
+        for key in 'abcd':
+            store.hit(key, 1, 60)
+        self.assertGreater(store.get_stats()['evictions'], 0)
+
+
+class AuthThrottleTestCase(TestCase):
+    """
+        Тесты для лимитов login/register
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='test_throttle', password='test_throttle', email='test_throttle@mail.ru',
+            first_name='test_throttle', last_name='test_throttle', birthday='2000-01-01'
+        )
+
+    def login(self, username='test_throttle'):
+        return self.client.post('/users/login', {'username': username, 'password': 'wrong'})
+
+    @override_settings(AUTH_THROTTLE=throttle_settings(login={'ip': '100/min', 'username': '2/min'}))
+    def test_username_limit(self):
+        self.assertEqual(self.login().status_code, 400)
+        self.assertEqual(self.login().status_code, 400)
+        with mock.patch.object(password_hashing_pool, 'run') as run:
+            resp = self.login()
+        self.assertEqual(resp.status_code, 429)
+        self.assertIn('Retry-After', resp)
+        # Отказ до хэширования пароля
+        run.assert_not_called()
+        # Другой username с того же IP проходит
+        self.assertEqual(self.login('test_throttle_other').status_code, 400)
+
+    @override_settings(AUTH_THROTTLE=throttle_settings(register={'ip': '1/min'}))
+    def test_ip_limit(self):
+        self.client.post('/users/register', {})
+        self.assertEqual(self.client.post('/users/register', {}).status_code, 429)
+        self.assertEqual(self.client.post('/users/register', {}, REMOTE_ADDR='10.0.0.2').status_code, 400)
+
+    @override_settings(AUTH_THROTTLE=dict(throttle_settings(login={'username': '1/min'}), ENABLED=False))
+    def test_disabled(self):
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, 400)
+
+    @override_settings(AUTH_THROTTLE=throttle_settings(login={'username': '1/min'}))
+    def test_metrics(self):
+        registry.reset()
+        self.login()
+        self.login()
+        text = registry.render()
+        self.assertIn('auth_throttle_total{scope="login",result="allowed"} 1', text)
+        self.assertIn('auth_throttle_total{scope="login",result="rejected_username"} 1', text)
+        self.assertEqual(auth_throttle.get_stats()['keys'], 1)
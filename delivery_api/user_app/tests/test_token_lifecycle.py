@@ -0,0 +1,69 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from ..instrumentation import registry
+from ..models import ArchivedToken, User
+from ..token_lifecycle import TokenPurger, token_table_stats
+from ..tokens import RefreshToken
+
+
+@override_settings(TOKEN_LIFECYCLE=dict(settings.TOKEN_LIFECYCLE, CHUNK_PAUSE=0, GRACE_SECONDS=0, METRICS_TTL=0))
+class TokenPurgerTestCase(TestCase):
+    """
+        Тесты для очистки истёкших токенов
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='test_tokens', password='test_tokens', email='test_tokens@mail.ru',
+            first_name='test_tokens', last_name='test_tokens', birthday='2000-01-01'
+        )
+        tokens = [RefreshToken.for_user(user=cls.user) for _ in range(7)]
+        for token in tokens[:3]:
+            token.blacklist()
+        expired = [token['jti'] for token in tokens[:5]]
+        OutstandingToken.objects.filter(jti__in=expired).update(expires_at=timezone.now() - timedelta(days=1))
+        cls.alive = {token['jti'] for token in tokens[5:]}
+
+    def test_delete(self):
+        self.assertEqual(TokenPurger(chunk_size=2, mode='delete').purge_expired(), 5)
+        self.assertEqual(set(OutstandingToken.objects.values_list('jti', flat=True)), self.alive)
+        self.assertFalse(BlacklistedToken.objects.exists())
+        self.assertFalse(ArchivedToken.objects.exists())
+
+    def test_archive(self):
+        TokenPurger(chunk_size=2, mode='archive').purge_expired()
+        self.assertEqual(ArchivedToken.objects.count(), 5)
+        self.assertEqual(ArchivedToken.objects.filter(blacklisted_at__isnull=False).count(), 3)
+        self.assertEqual(set(ArchivedToken.objects.values_list('user_id', flat=True)), {self.user.pk})
+
+    def test_max_chunks(self):
+        self.assertEqual(TokenPurger(chunk_size=2, mode='delete').purge_expired(max_chunks=1), 2)
+        self.assertEqual(OutstandingToken.objects.count(), 5)
+
+    def test_archive_retention(self):
+        purger = TokenPurger(chunk_size=2, mode='archive')
+        purger.purge_expired()
+        self.assertEqual(purger.purge_archive(now=timezone.now()), 0)
+        self.assertEqual(purger.purge_archive(now=timezone.now() + timedelta(days=366)), 5)
+
+    def test_metrics(self):
+        stats = token_table_stats.get()
+        self.assertEqual(stats[OutstandingToken._meta.db_table], {'rows': 7, 'expired_rows': 5})
+        self.assertIn('token_tables{table="token_blacklist_blacklistedtoken",stat="rows"} 3', registry.render())
+
+    def test_metrics_expired_count_limited(self):
+        with self.settings(TOKEN_LIFECYCLE=dict(settings.TOKEN_LIFECYCLE, METRICS_TTL=0, EXPIRED_COUNT_LIMIT=3)):
+            stats = token_table_stats.get()
+        self.assertEqual(stats[OutstandingToken._meta.db_table]['expired_rows'], 3)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('purge_tokens', '--mode', 'delete', stdout=out)
+        self.assertIn('Удалено токенов: 5', out.getvalue())
@@ -0,0 +1,145 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from ..models import User
+from ..token_cache import BloomFilter, LRUCache, token_blacklist_cache
+from ..tokens import RefreshToken
+
+CACHE_SETTINGS = dict(BLOOM_CAPACITY=1000, BLOOM_ERROR_RATE=0.001, LRU_SIZE=100, SYNC_INTERVAL=3600)
+
+
+class BloomFilterTestCase(TestCase):
+    """
+        Тесты для BloomFilter и LRUCache
+    """
+    def test_membership(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.001)
+        keys = [f'jti-{index}' for index in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f'other-{index}' in bloom for index in range(10000))
+        self.assertLess(false_positives, 50)
+
+    def test_lru_eviction(self):
+        lru = LRUCache(max_size=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 1)
+        self.assertEqual(len(lru), 2)
+
+
+@override_settings(TOKEN_BLACKLIST_CACHE=CACHE_SETTINGS)
+class TokenBlacklistCacheTestCase(TestCase):
+    """
+        Тесты для кэша чёрного списка refresh-токенов
+    """
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_jti@mail.ru',
+            first_name='test_jti',
+            last_name='test_jti',
+            birthday='2023-02-23'
+        )
+        cls.user = User.objects.create_user(username='test_jti', password='test_jti', **extra_kwargs)
+
+    def setUp(self) -> None:
+        token_blacklist_cache.reset()
+        token_blacklist_cache.stats.update(dict.fromkeys(token_blacklist_cache.stats, 0))
+
+    def test_bloom_negative_without_queries(self):
+        token = RefreshToken.for_user(user=self.user)
+        token_blacklist_cache.warm()
+        with self.assertNumQueries(0):
+            RefreshToken(str(token))
+            RefreshToken(str(token))
+        self.assertEqual(token_blacklist_cache.get_stats()['bloom_negative'], 2)
+
+    def test_warm(self):
+        token = RefreshToken.for_user(user=self.user)
+        token.blacklist()
+        token_blacklist_cache.reset()
+        with self.assertRaises(TokenError):
+            RefreshToken(str(token))
+        stats = token_blacklist_cache.get_stats()
+        self.assertEqual(stats['bloom_count'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_sync_from_other_process(self):
+        token = RefreshToken.for_user(user=self.user)
+        token_blacklist_cache.warm()
+        BlacklistedToken.objects.create(token_id=token_blacklist_cache.get_outstanding_id(token['jti']))
+        # До SYNC_INTERVAL процесс отвечает по своему фильтру
+        RefreshToken(str(token))
+        token_blacklist_cache._synced_at = 0.0
+        with self.assertRaises(TokenError):
+            RefreshToken(str(token))
+
+    def test_sync_from_watermark(self):
+        first, second = RefreshToken.for_user(user=self.user), RefreshToken.for_user(user=self.user)
+        first.blacklist()
+        token_blacklist_cache.warm()
+        BlacklistedToken.objects.create(token_id=token_blacklist_cache.get_outstanding_id(second['jti']))
+        with CaptureQueriesContext(connection) as queries:
+            token_blacklist_cache._sync()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(token_blacklist_cache.get_stats()['bloom_count'], 2)
+        # Следующая синхронизация читает только строки после последней прочитанной
+        latest = BlacklistedToken.objects.latest('blacklisted_at').blacklisted_at
+        self.assertEqual(token_blacklist_cache._watermark, latest)
+        with self.assertNumQueries(0):
+            with self.assertRaises(TokenError):
+                RefreshToken(str(second))
+
+    def test_refresh_rotation(self):
+        token = RefreshToken.for_user(user=self.user)
+        resp = self.client.post('/users/token/refresh', data={'refresh': str(token)})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(list(resp.data.keys()), ['access', 'refresh'])
+        resp = self.client.post('/users/token/refresh', data={'refresh': str(token)})
+        self.assertEqual(resp.status_code, 401)
+
+
+@override_settings(TOKEN_BLACKLIST_CACHE=CACHE_SETTINGS)
+class OutstandingIdCacheTestCase(TransactionTestCase):
+    """
+        Тесты блокировки токена по id OutstandingToken из кэша (вне внешней транзакции)
+    """
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(
+            username='test_stale_jti', password='test_stale_jti', email='test_stale_jti@mail.ru',
+            first_name='test_stale_jti', last_name='test_stale_jti', birthday='2023-02-23'
+        )
+        token_blacklist_cache.reset()
+        token_blacklist_cache.stats.update(dict.fromkeys(token_blacklist_cache.stats, 0))
+
+    def test_blacklist(self):
+        token = RefreshToken.for_user(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            token.blacklist()
+        self.assertFalse(any('outstandingtoken' in query['sql'] for query in queries.captured_queries))
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=token['jti']).exists())
+        with self.assertNumQueries(0):
+            with self.assertRaises(TokenError):
+                RefreshToken(str(token))
+        self.assertEqual(token_blacklist_cache.get_stats()['hits'], 1)
+
+    def test_blacklist_after_delete(self):
+        token = RefreshToken.for_user(user=self.user)
+        stale_id = token_blacklist_cache.get_outstanding_id(token['jti'])
+        # Очистка в другом процессе удалила строку, кэш этого процесса о ней не знает
+        OutstandingToken.objects.filter(pk=stale_id)._raw_delete(OutstandingToken.objects.db)
+        token.blacklist()
+        blacklisted = BlacklistedToken.objects.get(token__jti=token['jti'])
+        self.assertNotEqual(blacklisted.token_id, stale_id)
+        self.assertEqual(token_blacklist_cache.get_outstanding_id(token['jti']), blacklisted.token_id)
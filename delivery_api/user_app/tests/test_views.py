@@ -1,6 +1,12 @@
+import json
+
+from django.conf import settings
 from django.test import TestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ..pagination import keyset_filter
 from ..views import UserRegistrationAPIView, UserLoginAPIView, UserLogoutAPIView
-from ..models import User
+from ..models import User, UserAddresses
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from ..serializers import UserRegistrationSerializer, UserLoginSerializer
 
@@ -154,3 +160,260 @@ class UserLogoutAPIViewTestCase(TestCase):
             HTTP_AUTHORIZATION=f'Token {tokens.get("access")}'
         )
         self.assertEqual(resp.status_code, 400)
+
+
+class UserAddressBulkCreateTestCase(TestCase):
+    """
+        Тесты для массового создания адресов
+    """
+    endpoint_url = '/users/addresses/bulk'
+
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_bulk@mail.ru',
+            first_name='test_bulk',
+            last_name='test_bulk',
+            birthday='2023-02-23'
+        )
+        cls.user = User.objects.create_user(username='test_bulk', password='test_bulk', **extra_kwargs)
+
+    def setUp(self) -> None:
+        token = RefreshToken.for_user(user=self.user)
+        self.auth_header = f'Token {token.access_token}'
+        self.address = dict(city='Москва', street='Тверская', house='1', entrance=2, floor=3, flat='4')
+
+    def post(self, body, content_type):
+        return self.client.post(
+            self.endpoint_url, data=body, content_type=content_type, HTTP_AUTHORIZATION=self.auth_header
+        )
+
+    def test_json_array(self):
+        rows = [self.address] * 3
+        resp = self.post(json.dumps(rows), 'application/json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['created'], 3)
+        self.assertEqual(resp.data['errors'], [])
+        self.assertEqual(UserAddresses.objects.filter(user=self.user).count(), 3)
+
+    def test_ndjson_with_invalid_rows(self):
+        invalid_address = dict(self.address, floor='этаж')
+        body = '\n'.join(json.dumps(row) for row in (self.address, invalid_address, self.address))
+        resp = self.post(body, 'application/x-ndjson')
+        self.assertEqual(resp.status_code, 207)
+        self.assertEqual(resp.data['created'], 2)
+        self.assertEqual([error['row'] for error in resp.data['errors']], [2])
+        self.assertIn('floor', resp.data['errors'][0]['errors'])
+        self.assertEqual(UserAddresses.objects.filter(user=self.user).count(), 2)
+
+    def test_csv(self):
+        header = ','.join(self.address.keys())
+        line = ','.join(str(value) for value in self.address.values())
+        resp = self.post('\n'.join((header, line, line)), 'text/csv')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data['created'], 2)
+
+    def test_chunks(self):
+        with self.settings(ADDRESS_BULK_CHUNK_SIZE=2):
+            resp = self.post(json.dumps([self.address] * 5), 'application/json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(len(set(resp.data['ids'])), 5)
+
+    def test_max_rows(self):
+        with self.settings(ADDRESS_BULK_MAX_ROWS=2):
+            resp = self.post(json.dumps([self.address] * 3), 'application/json')
+        self.assertEqual(resp.status_code, 207)
+        self.assertEqual(resp.data['created'], 2)
+        self.assertIn('detail', resp.data)
+
+    def test_malformed_json(self):
+        resp = self.post('[{"city": "Москва"', 'application/json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.data['created'], 0)
+
+
+class UserAddressPaginationTestCase(TestCase):
+    """
+        Тесты для keyset-пагинации адресов
+    """
+    endpoint_url = '/users/addresses'
+
+    @classmethod
+    def setUpTestData(cls):
+        extra_kwargs = dict(
+            email='test_pages@mail.ru',
+            first_name='test_pages',
+            last_name='test_pages',
+            birthday='2023-02-23'
+        )
+        cls.user = User.objects.create_user(username='test_pages', password='test_pages', **extra_kwargs)
+        address_data = dict(user=cls.user, city='Москва', street='Тверская', house='1', entrance=1, floor=1, flat='1')
+        UserAddresses.objects.bulk_create(
+            UserAddresses(order_count=index % 3, **address_data) for index in range(7)
+        )
+
+    def setUp(self) -> None:
+        token = RefreshToken.for_user(user=self.user)
+        self.auth_header = f'Token {token.access_token}'
+
+    def get(self, url):
+        return self.client.get(url, HTTP_AUTHORIZATION=self.auth_header)
+
+    def test_pages(self):
+        expected_ids = list(
+            UserAddresses.objects.filter(user=self.user).order_by('order_count', '-last_order', 'pk')
+            .values_list('pk', flat=True)
+        )
+        resp = self.get(f'{self.endpoint_url}?page_size=3')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(list(resp.data.keys()), ['next', 'previous', 'results'])
+        self.assertIsNone(resp.data['previous'])
+
+        cur_ids, pages = [], []
+        next_url = f'{self.endpoint_url}?page_size=3'
+        while next_url:
+            resp = self.get(next_url)
+            pages.append(resp.data)
+            cur_ids.extend(address['id'] for address in resp.data['results'])
+            next_url = resp.data['next']
+        self.assertEqual(cur_ids, expected_ids)
+        self.assertEqual(len(pages), 3)
+
+        resp = self.get(pages[-1]['previous'])
+        self.assertEqual([address['id'] for address in resp.data['results']], expected_ids[3:6])
+
+    def test_invalid_cursor(self):
+        resp = self.get(f'{self.endpoint_url}?cursor=broken')
+        self.assertEqual(resp.status_code, 404)
+
+    def test_keyset_filter(self):
+        queryset = UserAddresses.objects.filter(user=self.user)
+        for ordering in (('order_count', 'pk'), ('-order_count', '-pk'), ('order_count', '-pk')):
+            names = [field.lstrip('-') for field in ordering]
+            rows = list(queryset.order_by(*ordering).values_list(*names))
+            after = queryset.filter(keyset_filter(ordering, rows[2])).order_by(*ordering)
+            self.assertEqual(list(after.values_list(*names)), rows[3:])
+        # Одно направление у всех полей - сравнение кортежей
+        self.assertIn(') > (', str(queryset.filter(keyset_filter(('order_count', 'pk'), rows[2])).query))
+        users = User.objects.order_by('-created_at', '-pk')
+        first = users.values_list('created_at', 'pk').first()
+        after = users.filter(keyset_filter(('-created_at', '-pk'), first)).values_list('pk', flat=True)
+        self.assertEqual(list(after), list(users.values_list('pk', flat=True))[1:])
+
+
+class UserListAPIViewTestCase(TestCase):
+    """
+        Тесты для UserListAPIView
+    """
+    endpoint_url = '/users/list'
+
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(3):
+            User.objects.create_user(
+                username=f'test_list_{index}', password='test_list', email=f'test_list_{index}@mail.ru',
+                first_name='test_list', last_name='test_list', birthday='2023-02-23', is_staff=index == 0
+            )
+
+    def test_admin_only(self):
+        user = User.objects.get(username='test_list_1')
+        token = RefreshToken.for_user(user=user)
+        resp = self.client.get(self.endpoint_url, HTTP_AUTHORIZATION=f'Token {token.access_token}')
+        self.assertEqual(resp.status_code, 403)
+
+    def test_list(self):
+        user = User.objects.get(username='test_list_0')
+        token = RefreshToken.for_user(user=user)
+        resp = self.client.get(f'{self.endpoint_url}?page_size=2', HTTP_AUTHORIZATION=f'Token {token.access_token}')
+        self.assertEqual(resp.status_code, 200)
+        expected_ids = list(User.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+        self.assertEqual([user['id'] for user in resp.data['results']], expected_ids[:2])
+        resp = self.client.get(resp.data['next'], HTTP_AUTHORIZATION=f'Token {token.access_token}')
+        self.assertEqual([user['id'] for user in resp.data['results']], expected_ids[2:])
+        self.assertIsNone(resp.data['next'])
+
+
+class UserBulkProvisionAPIViewTestCase(TestCase):
+    """
+        Тесты для массового создания пользователей
+    """
+    endpoint_url = '/users/provision'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='test_provision', password='test_provision', email='test_provision@mail.ru',
+            first_name='test_provision', last_name='test_provision', birthday='2023-02-23', is_staff=True
+        )
+
+    def setUp(self) -> None:
+        token = RefreshToken.for_user(user=self.admin)
+        self.auth_header = f'Token {token.access_token}'
+
+    def row(self, index, **kwargs):
+        row = dict(
+            username=f'courier_{index}', password=f'courier_{index}', email=f'courier_{index}@mail.ru',
+            first_name='Курьер', last_name=str(index), birthday='2000-01-01', role='Courier'
+        )
+        row.update(kwargs)
+        return row
+
+    def post(self, rows, url=None):
+        body = '\n'.join(json.dumps(row) for row in rows)
+        return self.client.post(
+            url or self.endpoint_url, data=body, content_type='application/x-ndjson',
+            HTTP_AUTHORIZATION=self.auth_header
+        )
+
+    def test_provision(self):
+        rows = [self.row(index) for index in range(3)]
+        rows.append(self.row(3, birthday='не дата'))
+        rows.append(dict(self.row(4), username='test_provision'))
+        rows.append(dict(self.row(5), email='courier_0@mail.ru'))
+        with self.settings(USER_PROVISIONING=dict(settings.USER_PROVISIONING, CHUNK_SIZE=2, HASH_WORKERS=2)):
+            resp = self.post(rows)
+        self.assertEqual(resp.status_code, 207)
+        self.assertEqual(resp.data['created'], 3)
+        self.assertEqual([error['row'] for error in resp.data['errors']], [4, 5, 6])
+        self.assertIn('username', resp.data['errors'][1]['errors'])
+        self.assertIn('email', resp.data['errors'][2]['errors'])
+
+        user = User.objects.get(username='courier_1')
+        self.assertEqual(user.role, 'Courier')
+        self.assertTrue(user.check_password('courier_1'))
+        self.assertNotIn('tokens', resp.data)
+
+    def test_rejected_row_not_reserved(self):
+        # Строка отклонена из-за занятого username - её email остаётся свободным для следующих строк
+        rows = [dict(self.row(0), username='test_provision'), self.row(1, email='courier_0@mail.ru')]
+        resp = self.post(rows)
+        self.assertEqual(resp.status_code, 207)
+        self.assertEqual([error['row'] for error in resp.data['errors']], [1])
+        self.assertTrue(User.objects.filter(username='courier_1', email='courier_0@mail.ru').exists())
+
+    def test_max_rows(self):
+        with self.settings(USER_PROVISIONING=dict(settings.USER_PROVISIONING, MAX_ROWS=2)):
+            resp = self.post([self.row(index) for index in range(3)])
+        self.assertEqual(resp.status_code, 207)
+        self.assertEqual(resp.data['created'], 2)
+        self.assertIn('detail', resp.data)
+
+    def test_provision_tokens(self):
+        resp = self.post([self.row(index) for index in range(2)], url=f'{self.endpoint_url}?tokens=1')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(len(resp.data['tokens']), 2)
+        refresh = resp.data['tokens'][0]['refresh']
+        resp = self.client.post('/users/token/refresh', data={'refresh': refresh})
+        self.assertEqual(resp.status_code, 200)
+
+    def test_admin_only(self):
+        user = User.objects.create_user(
+            username='test_provision_client', password='test', email='test_provision_client@mail.ru',
+            first_name='test', last_name='test', birthday='2023-02-23'
+        )
+        token = RefreshToken.for_user(user=user)
+        resp = self.client.post(
+            self.endpoint_url, data='[]', content_type='application/json',
+            HTTP_AUTHORIZATION=f'Token {token.access_token}'
+        )
+        self.assertEqual(resp.status_code, 403)
@@ -0,0 +1,235 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+from .instrumentation import registry
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+        '5/min' -> (5, 60)
+    """
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period[0]]
+
+
+def _advance(state, window):
+    """
+        Счётчики (окно, текущее, предыдущее) после ещё одного обращения в окне window
+    """
+    state_window, current, previous = state
+    if state_window == window:
+        return window, current + 1, previous
+    if state_window == window - 1:
+        return window, 1, current
+    return window, 1, 0
+
+
+class LocMemThrottleStore:
+    """
+        Счётчики в памяти процесса (LRU на max_entries ключей). При нескольких воркерах
+        у каждого свои счётчики - лимит фактически умножается на число воркеров
+    """
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def hit(self, key, window, period):
+        with self._lock:
+            state = _advance(self._data.get(key, (None, 0, 0)), window)
+            self._data[key] = state
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return state[1], state[2]
+
+    def get_stats(self) -> dict:
+        return dict(keys=len(self._data), evictions=self.evictions)
+
+
+class SharedMemoryThrottleStore:
+    """
+        Счётчики в общей памяти (mmap файла в /dev/shm) - одни на все воркеры хоста.
+        Таблица фиксированного размера: ключ по хэшу попадает в одну из PROBES соседних ячеек,
+        при переполнении вытесняется ячейка с самым старым окном. Запись под flock файла
+    """
+    SLOT = struct.Struct('<Qqii')
+    PROBES = 4
+
+    def __init__(self, path=None, slots=65536):
+        shm_dir = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        self.path = path or os.path.join(shm_dir, 'delivery_api_throttle')
+        self.slots = slots
+        self._lock = threading.Lock()
+        self._fd = None
+        self._map = None
+        self._pid = None
+        self.evictions = 0
+
+    def _open(self):
+        # Файл открывается заново после fork: flock привязан к открытому файлу процесса
+        if self._pid != os.getpid():
+            size = self.slots * self.SLOT.size
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._fd, self._map, self._pid = fd, mmap.mmap(fd, size), os.getpid()
+        return self._map
+
+    def hit(self, key, window, period):
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+        with self._lock:
+            memory = self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                offset, state = self._find(memory, key_hash)
+                state = _advance(state, window)
+                self.SLOT.pack_into(memory, offset, key_hash, *state)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return state[1], state[2]
+
+    def _find(self, memory, key_hash):
+        oldest = None
+        for probe in range(self.PROBES):
+            offset = (key_hash + probe) % self.slots * self.SLOT.size
+            slot_hash, slot_window, current, previous = self.SLOT.unpack_from(memory, offset)
+            if slot_hash == key_hash:
+                return offset, (slot_window, current, previous)
+            if slot_hash == 0:
+                return offset, (None, 0, 0)
+            if oldest is None or slot_window < oldest[1]:
+                oldest = (offset, slot_window)
+        self.evictions += 1
+        return oldest[0], (None, 0, 0)
+
+    def get_stats(self) -> dict:
+        return dict(slots=self.slots, evictions=self.evictions)
+
+
+class CacheThrottleStore:
+    """
+        Счётчики в кэше Django (Redis/Memcached - общие для всех хостов): ключ на окно, атомарный incr
+    """
+    def __init__(self, cache_alias='users'):
+        self.cache_alias = cache_alias
+
+    def hit(self, key, window, period):
+        cache = caches[self.cache_alias]
+        current_key, previous_key = f'throttle:{key}:{window}', f'throttle:{key}:{window - 1}'
+        # Окно нужно ещё один период как предыдущее
+        cache.add(current_key, 0, timeout=period * 2)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # Ключ вытеснен между add и incr
+            cache.set(current_key, 1, timeout=period * 2)
+            current = 1
+        return current, cache.get(previous_key, 0)
+
+    def get_stats(self) -> dict:
+        return {}
+
+
+class AuthThrottle:
+    """
+        Лимиты на обращения к анонимным endpoint'ам с хэшированием пароля.
+        Правила AUTH_THROTTLE['RATES'][scope] - по IP и по username ('5/min').
+        Счётчик скользящего окна: prev * (1 - доля прошедшего окна) + current,
+        отказ - до вычисления хэша, с Retry-After
+    """
+    def __init__(self):
+        self._store = None
+        self._store_config = None
+        self.stats = dict(allowed=0, rejected=0)
+
+    @property
+    def config(self):
+        return settings.AUTH_THROTTLE
+
+    @property
+    def store(self):
+        config = self.config
+        if self._store is None or self._store_config is not config:
+            self._store = import_string(config['STORE'])(**config.get('OPTIONS', {}))
+            self._store_config = config
+        return self._store
+
+    def check(self, scope, identities):
+        """
+            Вернуть None, если запрос разрешён, иначе сколько секунд ждать
+        """
+        config = self.config
+        if not config['ENABLED']:
+            return None
+        now = time.time()
+        for kind, rate in config['RATES'].get(scope, {}).items():
+            identity = identities.get(kind)
+            if not identity:
+                continue
+            limit, period = parse_rate(rate)
+            window, elapsed = divmod(now, period)
+            current, previous = self.store.hit(f'{scope}:{kind}:{period}:{identity}', int(window), period)
+            if previous * (1 - elapsed / period) + current > limit:
+                self.stats['rejected'] += 1
+                registry.inc('auth_throttle_total', (('scope', scope), ('result', f'rejected_{kind}')))
+                return period - elapsed
+        self.stats['allowed'] += 1
+        registry.inc('auth_throttle_total', (('scope', scope), ('result', 'allowed')))
+        return None
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        if self._store is not None:
+            stats.update(self._store.get_stats())
+        return stats
+
+
+auth_throttle = AuthThrottle()
+registry.describe('auth_throttle_total', 'counter', 'Решения лимитов login/register по scope и правилу')
+
+
+def get_identities(request, data):
+    username = data.get('username') if hasattr(data, 'get') else None
+    return {
+        'ip': BaseThrottle().get_ident(request),
+        'username': str(username).strip().lower()[:255] if username else None,
+    }
+
+
+class AuthRateThrottle(BaseThrottle):
+    """
+        DRF-throttle поверх auth_throttle. scope задаётся в подклассе
+    """
+    scope = None
+
+    def allow_request(self, request, view):
+        self.retry_after = auth_throttle.check(self.scope, get_identities(request, request.data))
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
+
+
+class LoginRateThrottle(AuthRateThrottle):
+    scope = 'login'
+
+
+class RegistrationRateThrottle(AuthRateThrottle):
+    scope = 'register'
@@ -0,0 +1,291 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from hashlib import blake2b
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+
+class BloomFilter:
+    """
+        Bloom-фильтр: отвечает "точно нет" или "возможно есть"
+    """
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, key) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class LRUCache:
+    """
+        Ограниченный по размеру LRU-кэш
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def set(self, key, value) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TokenBlacklistCache:
+    """
+        Кэш JTI refresh-токенов перед таблицами token_blacklist.
+        Bloom-фильтр по заблокированным JTI отвечает "не в чёрном списке",
+        LRU хранит подтверждённые ответы БД и id OutstandingToken для blacklist().
+        Отрицательный ответ фильтра не обращается к БД: токены, заблокированные другими процессами,
+        подтягиваются по blacklisted_at от сохранённой отметки не чаще, чем раз в SYNC_INTERVAL секунд,
+        поэтому другой процесс узнаёт о блокировке с задержкой до SYNC_INTERVAL. Кэш прогревается
+        при старте воркера (warm_token_blacklist_cache в wsgi/asgi)
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._bloom = None
+        self._blacklisted = None
+        self._outstanding = None
+        self._watermark = None
+        self._synced_at = 0.0
+        self.stats = dict(bloom_negative=0, hits=0, misses=0, db_queries=0, blacklisted=0)
+
+    @property
+    def config(self):
+        return settings.TOKEN_BLACKLIST_CACHE
+
+    def warm(self) -> None:
+        """
+            Загрузить JTI всех действующих заблокированных токенов
+        """
+        config = self.config
+        watermark = timezone.now()
+        rows = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=watermark).values_list('token__jti', flat=True)
+        )
+        bloom = BloomFilter(max(config['BLOOM_CAPACITY'], len(rows) * 2), config['BLOOM_ERROR_RATE'])
+        for jti in rows:
+            bloom.add(jti)
+        with self._lock:
+            self._bloom = bloom
+            self._blacklisted = LRUCache(config['LRU_SIZE'])
+            if self._outstanding is None:
+                self._outstanding = LRUCache(config['LRU_SIZE'])
+            self._watermark = watermark
+            self._synced_at = time.monotonic()
+            self.stats['db_queries'] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._bloom = None
+
+    def is_blacklisted(self, jti) -> bool:
+        self._ensure_fresh()
+        with self._lock:
+            if self._bloom is not None and jti not in self._bloom:
+                self.stats['bloom_negative'] += 1
+                return False
+            cached = self._blacklisted.get(jti)
+            if cached is not None:
+                self.stats['hits'] += 1
+                return cached
+            self.stats['misses'] += 1
+
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        with self._lock:
+            self.stats['db_queries'] += 1
+            self._blacklisted.set(jti, blacklisted)
+        return blacklisted
+
+    def add_blacklisted(self, jti) -> None:
+        self._ensure_fresh()
+        with self._lock:
+            if self._bloom.count >= self._bloom.capacity:
+                # Фильтр переполнен, ложные срабатывания растут - пересобираем при следующем обращении
+                self._bloom = None
+            else:
+                self._bloom.add(jti)
+                self._blacklisted.set(jti, True)
+            self.stats['blacklisted'] += 1
+
+    def remove_blacklisted(self, jti) -> None:
+        with self._lock:
+            if self._blacklisted is not None:
+                self._blacklisted.set(jti, False)
+
+    def get_outstanding_id(self, jti):
+        self._ensure_fresh()
+        with self._lock:
+            return self._outstanding.get(jti)
+
+    def add_outstanding(self, jti, token_id) -> None:
+        self._ensure_fresh()
+        with self._lock:
+            self._outstanding.set(jti, token_id)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['lru_size'] = len(self._blacklisted) if self._blacklisted is not None else 0
+            stats['bloom_count'] = self._bloom.count if self._bloom is not None else 0
+        return stats
+
+    def _ensure_fresh(self) -> None:
+        if self._bloom is None:
+            self.warm()
+            return
+        if time.monotonic() - self._synced_at >= self.config['SYNC_INTERVAL']:
+            self._sync()
+
+    def _sync(self) -> None:
+        """
+            Подтянуть токены, заблокированные другими процессами после сохранённой отметки blacklisted_at
+        """
+        with self._lock:
+            watermark = self._watermark
+            # Другие потоки не ждут этого запроса, а отвечают по текущему фильтру
+            self._synced_at = time.monotonic()
+        if watermark is None:
+            self.warm()
+            return
+        rows = list(
+            BlacklistedToken.objects.filter(blacklisted_at__gt=watermark).values_list('blacklisted_at', 'token__jti')
+        )
+        with self._lock:
+            self.stats['db_queries'] += 1
+            if self._bloom is None:
+                return
+            for blacklisted_at, jti in rows:
+                if jti not in self._bloom:
+                    self._bloom.add(jti)
+                self._blacklisted.set(jti, True)
+                self._watermark = max(self._watermark, blacklisted_at)
+
+
+token_blacklist_cache = TokenBlacklistCache()
+
+
+def warm_token_blacklist_cache() -> None:
+    """
+        Прогреть кэш при старте воркера, чтобы первый запрос не загружал весь чёрный список
+    """
+    try:
+        token_blacklist_cache.warm()
+    except Exception as error:
+        # Таблиц ещё нет (до migrate) или БД недоступна - кэш прогреется при первом обращении
+        print(f'Error while warming token blacklist cache: {error}')
+
+
+class SlidingTokenDenylist:
+    """
+        Отозванные sliding-токены: JTI -> момент, после которого токен и так недействителен.
+        Записи живут в общем кэше SLIDING_TOKEN_DENYLIST['CACHE_ALIAS'] (Redis/Memcached в продакшене)
+        с таймаутом до этого момента и копируются в словарь процесса (не больше MAX_LOCAL_ENTRIES),
+        повторные проверки отозванного токена не ходят в кэш. БД не используется
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = {}
+        self._pruned_at = 0.0
+        self.stats = dict(revoked=0, denied=0, local_hits=0, shared_lookups=0, pruned=0)
+
+    @property
+    def config(self):
+        return settings.SLIDING_TOKEN_DENYLIST
+
+    @staticmethod
+    def _key(jti):
+        return f'denylist:{jti}'
+
+    def add(self, jti, expires_at) -> None:
+        """
+            Отозвать токен до expires_at (unix-время)
+        """
+        timeout = int(expires_at - time.time()) + 1
+        if timeout <= 0:
+            return
+        caches[self.config['CACHE_ALIAS']].set(self._key(jti), expires_at, timeout=timeout)
+        with self._lock:
+            self._remember(jti, expires_at)
+            self.stats['revoked'] += 1
+
+    def is_denied(self, jti) -> bool:
+        now = time.time()
+        with self._lock:
+            expires_at = self._local.get(jti)
+            if expires_at is not None and expires_at > now:
+                self.stats['local_hits'] += 1
+                self.stats['denied'] += 1
+                return True
+            self.stats['shared_lookups'] += 1
+
+        expires_at = caches[self.config['CACHE_ALIAS']].get(self._key(jti))
+        if expires_at is None or expires_at <= now:
+            return False
+        with self._lock:
+            self._remember(jti, expires_at)
+            self.stats['denied'] += 1
+        return True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['local_size'] = len(self._local)
+        return stats
+
+    def _remember(self, jti, expires_at) -> None:
+        self._local[jti] = expires_at
+        config = self.config
+        if (
+            len(self._local) > config['MAX_LOCAL_ENTRIES']
+            or time.monotonic() - self._pruned_at >= config['PRUNE_INTERVAL']
+        ):
+            self._prune()
+
+    def _prune(self) -> None:
+        now = time.time()
+        expired = [jti for jti, expires_at in self._local.items() if expires_at <= now]
+        for jti in expired:
+            del self._local[jti]
+        # Локальная копия - только ускорение: вытесненные записи остаются в общем кэше
+        overflow = len(self._local) - self.config['MAX_LOCAL_ENTRIES']
+        for jti in list(self._local)[:max(overflow, 0)]:
+            del self._local[jti]
+        self.stats['pruned'] += len(expired) + max(overflow, 0)
+        self._pruned_at = time.monotonic()
+
+
+sliding_token_denylist = SlidingTokenDenylist()
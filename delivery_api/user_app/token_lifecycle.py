@@ -0,0 +1,138 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .models import ArchivedToken
+from .token_cache import token_blacklist_cache
+
+# Счётчики очистки процесса (команда purge_tokens) для метрик
+purge_stats = dict(runs=0, chunks=0, deleted=0, archived=0, archive_deleted=0, last_run_seconds=0.0)
+
+
+class TokenPurger:
+    """
+        Очистка таблиц token_blacklist от истёкших токенов пачками по CHUNK_SIZE:
+        каждая пачка - короткая транзакция (выбор id по индексу expires_at и DELETE ... WHERE id IN),
+        между пачками пауза CHUNK_PAUSE, чтобы не держать блокировки и не забивать I/O.
+        MODE='archive' перед удалением переносит строки в ArchivedToken,
+        архив хранится ARCHIVE_RETENTION_DAYS дней
+    """
+    def __init__(self, chunk_size=None, mode=None):
+        self.config = settings.TOKEN_LIFECYCLE
+        self.chunk_size = chunk_size or self.config['CHUNK_SIZE']
+        self.mode = mode or self.config['MODE']
+
+    def run(self, max_chunks=None) -> dict:
+        started = time.perf_counter()
+        result = dict(deleted=self.purge_expired(max_chunks=max_chunks), archive_deleted=self.purge_archive())
+        purge_stats['runs'] += 1
+        purge_stats['last_run_seconds'] = round(time.perf_counter() - started, 3)
+        return result
+
+    def purge_expired(self, now=None, max_chunks=None) -> int:
+        cutoff = (now or timezone.now()) - timedelta(seconds=self.config['GRACE_SECONDS'])
+        deleted = self._chunked(lambda: self.purge_chunk(cutoff), max_chunks)
+        if deleted:
+            # Bloom-фильтр не умеет удалять - пересобираем без истёкших JTI
+            token_blacklist_cache.reset()
+        purge_stats['deleted'] += deleted
+        return deleted
+
+    def purge_chunk(self, cutoff) -> int:
+        rows = list(
+            OutstandingToken.objects.filter(expires_at__lte=cutoff).order_by('expires_at')
+            .values('pk', 'jti', 'user_id', 'created_at', 'expires_at', 'blacklistedtoken__blacklisted_at')
+            [:self.chunk_size]
+        )
+        if not rows:
+            return 0
+        ids = [row['pk'] for row in rows]
+        if self.mode == 'archive':
+            ArchivedToken.objects.bulk_create(
+                ArchivedToken(
+                    jti=row['jti'], user_id=row['user_id'], created_at=row['created_at'],
+                    expires_at=row['expires_at'], blacklisted_at=row['blacklistedtoken__blacklisted_at']
+                ) for row in rows
+            )
+            purge_stats['archived'] += len(rows)
+        BlacklistedToken.objects.filter(token_id__in=ids)._raw_delete(BlacklistedToken.objects.db)
+        return OutstandingToken.objects.filter(pk__in=ids)._raw_delete(OutstandingToken.objects.db)
+
+    def purge_archive(self, now=None) -> int:
+        retention = self.config['ARCHIVE_RETENTION_DAYS']
+        if not retention:
+            return 0
+        cutoff = (now or timezone.now()) - timedelta(days=retention)
+
+        def purge_chunk():
+            ids = list(
+                ArchivedToken.objects.filter(expires_at__lte=cutoff).order_by('expires_at')
+                .values_list('pk', flat=True)[:self.chunk_size]
+            )
+            return ArchivedToken.objects.filter(pk__in=ids)._raw_delete(ArchivedToken.objects.db) if ids else 0
+
+        deleted = self._chunked(purge_chunk)
+        purge_stats['archive_deleted'] += deleted
+        return deleted
+
+    def _chunked(self, purge_chunk, max_chunks=None) -> int:
+        total, chunks = 0, 0
+        while max_chunks is None or chunks < max_chunks:
+            with transaction.atomic():
+                deleted = purge_chunk()
+            total += deleted
+            chunks += 1
+            purge_stats['chunks'] += 1
+            if deleted < self.chunk_size:
+                break
+            time.sleep(self.config['CHUNK_PAUSE'])
+        return total
+
+
+def table_stats(model) -> dict:
+    """
+        Строки и размер таблицы. В PostgreSQL - оценка из pg_class (без COUNT(*) по большой таблице)
+    """
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint, pg_total_relation_size(oid) FROM pg_class WHERE oid = %s::regclass',
+                [model._meta.db_table]
+            )
+            rows, size = cursor.fetchone()
+        return dict(rows=max(rows, 0), bytes=size)
+    return dict(rows=model._base_manager.count())
+
+
+class TokenTableStats:
+    """
+        Размеры таблиц токенов для метрик, кэшируются на METRICS_TTL секунд.
+        Истёкшие строки считаются не дальше EXPIRED_COUNT_LIMIT: метрике нужен порядок величины
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = None
+        self._collected_at = 0.0
+
+    def get(self) -> dict:
+        with self._lock:
+            if self._stats is None or time.monotonic() - self._collected_at >= settings.TOKEN_LIFECYCLE['METRICS_TTL']:
+                self._stats = {
+                    model._meta.db_table: table_stats(model)
+                    for model in (OutstandingToken, BlacklistedToken, ArchivedToken)
+                }
+                # Подсчёт ограничен EXPIRED_COUNT_LIMIT строками индекса expires_at, а не COUNT(*) всей выборки
+                self._stats[OutstandingToken._meta.db_table]['expired_rows'] = OutstandingToken.objects.filter(
+                    expires_at__lte=timezone.now()
+                ).order_by().values('pk')[:settings.TOKEN_LIFECYCLE['EXPIRED_COUNT_LIMIT']].count()
+                self._collected_at = time.monotonic()
+            return self._stats
+
+
+token_table_stats = TokenTableStats()
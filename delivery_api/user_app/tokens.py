@@ -0,0 +1,152 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken as BaseRefreshToken, Token
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .instrumentation import timer
+from .token_cache import sliding_token_denylist, token_blacklist_cache
+
+
+class RefreshToken(BaseRefreshToken):
+    """
+        Refresh-токен, проверяющий чёрный список через token_blacklist_cache
+    """
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if token_blacklist_cache.is_blacklisted(jti):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        """
+            id OutstandingToken берётся из кэша процесса, но строку мог удалить другой процесс
+            (очистка истёкших токенов, удаление пользователя). Внешний ключ проверяется при коммите,
+            поэтому кэшированный id используется только в собственной транзакции: при IntegrityError
+            и внутри чужой транзакции токен ищется по jti
+        """
+        jti = self.payload[api_settings.JTI_CLAIM]
+        token_id = token_blacklist_cache.get_outstanding_id(jti)
+        if token_id is not None and not transaction.get_connection(BlacklistedToken.objects.db).in_atomic_block:
+            try:
+                with transaction.atomic(using=BlacklistedToken.objects.db):
+                    result = BlacklistedToken.objects.get_or_create(token_id=token_id)
+            except IntegrityError:
+                pass
+            else:
+                token_blacklist_cache.add_blacklisted(jti)
+                return result
+        token, _ = OutstandingToken.objects.get_or_create(
+            jti=jti,
+            defaults={
+                'token': str(self),
+                'expires_at': datetime_from_epoch(self.payload['exp']),
+            },
+        )
+        token_blacklist_cache.add_outstanding(jti, token.pk)
+        result = BlacklistedToken.objects.get_or_create(token_id=token.pk)
+        token_blacklist_cache.add_blacklisted(jti)
+        return result
+
+    def __str__(self):
+        with timer('jwt'):
+            return super().__str__()
+
+    @classmethod
+    def for_user(cls, user):
+        # BlacklistMixin.for_user не возвращает созданный OutstandingToken, поэтому создаём его сами
+        with timer('jwt'):
+            token = super(BlacklistMixin, cls).for_user(user)
+            encoded = str(token)
+        jti = token[api_settings.JTI_CLAIM]
+        outstanding = OutstandingToken.objects.create(
+            user=user,
+            jti=jti,
+            token=encoded,
+            created_at=token.current_time,
+            expires_at=datetime_from_epoch(token['exp']),
+        )
+        token_blacklist_cache.add_outstanding(jti, outstanding.pk)
+        return token
+
+    @classmethod
+    def for_users(cls, users):
+        """
+            Выпустить токены для списка пользователей одним bulk_create в OutstandingToken
+        """
+        tokens = [super(BlacklistMixin, cls).for_user(user) for user in users]
+        outstanding = OutstandingToken.objects.bulk_create([
+            OutstandingToken(
+                user=user,
+                jti=token[api_settings.JTI_CLAIM],
+                token=str(token),
+                created_at=token.current_time,
+                expires_at=datetime_from_epoch(token['exp']),
+            )
+            for user, token in zip(users, tokens)
+        ])
+        for item in outstanding:
+            if item.pk is not None:
+                token_blacklist_cache.add_outstanding(item.jti, item.pk)
+        return tokens
+
+
+class SlidingToken(Token):
+    """
+        Sliding-токен без строк в token_blacklist: выпуск и обновление (новые exp/iat, тот же jti)
+        не пишут в БД, отзыв - через sliding_token_denylist до истечения refresh_exp
+    """
+    token_type = 'sliding'
+    lifetime = api_settings.SLIDING_TOKEN_LIFETIME
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.token is None:
+            self.set_exp(
+                api_settings.SLIDING_TOKEN_REFRESH_EXP_CLAIM,
+                from_time=self.current_time,
+                lifetime=api_settings.SLIDING_TOKEN_REFRESH_LIFETIME,
+            )
+
+    def verify(self):
+        self.check_blacklist()
+        super().verify()
+
+    def check_blacklist(self):
+        if sliding_token_denylist.is_denied(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        # Последнее обновление до refresh_exp продлевает токен ещё на lifetime
+        expires_at = self.payload[api_settings.SLIDING_TOKEN_REFRESH_EXP_CLAIM] + self.lifetime.total_seconds()
+        sliding_token_denylist.add(self.payload[api_settings.JTI_CLAIM], expires_at)
+
+    def __str__(self):
+        with timer('jwt'):
+            return super().__str__()
+
+
+def issue_tokens(user) -> dict:
+    """
+        Токены для ответа login/register: пара refresh/access или sliding-токен по AUTH_TOKEN_MODE
+    """
+    if settings.AUTH_TOKEN_MODE == 'sliding':
+        return {'token': str(SlidingToken.for_user(user))}
+    token = RefreshToken.for_user(user=user)
+    return {'refresh': str(token), 'access': str(token.access_token)}
+
+
+def get_logout_token(data, auth):
+    """
+        Токен, отзываемый при выходе: refresh или sliding-токен из тела запроса,
+        иначе sliding-токен, которым аутентифицирован запрос
+    """
+    if refresh := data.get('refresh'):
+        return RefreshToken(token=refresh)
+    if token := data.get('token'):
+        return SlidingToken(token=token)
+    if isinstance(auth, SlidingToken):
+        return auth
+    raise TokenError(_('Token is invalid or expired'))
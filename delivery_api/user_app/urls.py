@@ -1,9 +1,10 @@
+from django.conf import settings
 from django.urls import path, include
 from .views import (
     UserRegistrationAPIView, UserLoginAPIView, UserLogoutAPIView, UserAddressAPIViewSet, UserResetPasswordAPIView,
-    UserDeleteAPIView, UserUpdateAPIView
+    UserDeleteAPIView, UserUpdateAPIView, UserProfileAPIView, UserListAPIView, UserBulkProvisionAPIView,
+    UserTokenRefreshAPIView, OrderEventIngestAPIView
 )
-from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework.routers import DefaultRouter
 
 app_name = "users"
@@ -11,17 +12,48 @@ app_name = "users"
 router = DefaultRouter(trailing_slash=False)
 router.register(r'addresses', UserAddressAPIViewSet, basename='addresses')
 
-urlpatterns = [
+registration_view = UserRegistrationAPIView.as_view()
+login_view = UserLoginAPIView.as_view()
+logout_view = UserLogoutAPIView.as_view()
+reset_password_view = UserResetPasswordAPIView.as_view()
+update_view = UserUpdateAPIView.as_view()
+async_address_urls = []
+
+# Для ASGI-развёртываний: нативные async-view с асинхронным ORM и хэшированием паролей в пуле.
+# Массовый импорт адресов остаётся на синхронном UserAddressAPIViewSet
+if settings.USER_API_ASYNC_VIEWS:
+    from .async_views import (
+        AsyncUserRegistrationAPIView, AsyncUserLoginAPIView, AsyncUserLogoutAPIView, AsyncUserResetPasswordAPIView,
+        AsyncUserUpdateAPIView, AsyncUserAddressAPIView
+    )
+
+    registration_view = AsyncUserRegistrationAPIView.as_view()
+    login_view = AsyncUserLoginAPIView.as_view()
+    logout_view = AsyncUserLogoutAPIView.as_view()
+    reset_password_view = AsyncUserResetPasswordAPIView.as_view()
+    update_view = AsyncUserUpdateAPIView.as_view()
+    async_address_urls = [
+        path('addresses', AsyncUserAddressAPIView.as_view(), name='addresses-list'),
+        path('addresses/<int:address_id>', AsyncUserAddressAPIView.as_view(), name='addresses-detail'),
+    ]
+
+urlpatterns = async_address_urls + [
     path('', include(router.urls)),
 
     # Авторизация
-    path('register', UserRegistrationAPIView.as_view(), name='register'),
-    path('login', UserLoginAPIView.as_view(), name='login'),
-    path('logout', UserLogoutAPIView.as_view(), name='logout'),
-    path('token/refresh', TokenRefreshView.as_view(), name='refresh_token'),
+    path('register', registration_view, name='register'),
+    path('login', login_view, name='login'),
+    path('logout', logout_view, name='logout'),
+    path('token/refresh', UserTokenRefreshAPIView.as_view(), name='refresh_token'),
 
     # Редактирование пользовательских данных
-    path('reset_password', UserResetPasswordAPIView.as_view(), name='reset_password'),
+    path('profile', UserProfileAPIView.as_view(), name='profile'),
+    path('reset_password', reset_password_view, name='reset_password'),
     path('delete', UserDeleteAPIView.as_view(), name='delete_user'),
-    path('update', UserUpdateAPIView.as_view(), name='update_user'),
+    path('update', update_view, name='update_user'),
+
+    # Администрирование
+    path('list', UserListAPIView.as_view(), name='user_list'),
+    path('provision', UserBulkProvisionAPIView.as_view(), name='provision_users'),
+    path('order-events', OrderEventIngestAPIView.as_view(), name='order_events'),
 ]
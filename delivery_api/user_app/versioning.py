@@ -0,0 +1,75 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .checks import cache_is_shared
+
+
+def _version_key(user_id):
+    return f'user-version:{user_id}'
+
+
+def get_user_version(user_id):
+    """
+        Версия данных пользователя (профиль и адреса): (номер, время изменения).
+        Хранится в строке пользователя, поэтому одна на все воркеры. Общий кэш (Redis/Memcached)
+        избавляет от запроса в БД; кэш в памяти процесса не используется - его не сбросить из других воркеров
+    """
+    from .models import User
+
+    cache = caches[settings.USER_VERSION_CACHE_ALIAS] if cache_is_shared(settings.USER_VERSION_CACHE_ALIAS) else None
+    key = _version_key(user_id)
+    if cache is not None:
+        stamp = cache.get(key)
+        if stamp is not None:
+            return stamp
+    row = User.objects.filter(pk=user_id).order_by('pk').values_list('data_version', 'data_updated_at').first()
+    stamp = (row[0], row[1].timestamp()) if row is not None else (0, time.time())
+    if cache is not None and row is not None:
+        # Конечный таймаут ограничивает жизнь значения, прочитанного до коммита параллельной записи
+        cache.add(key, stamp)
+    return stamp
+
+
+def next_user_version(version):
+    """
+        Номер и время следующей версии. Номер не меньше текущего времени в микросекундах: полное
+        сохранение экземпляра, загруженного до предыдущей смены, перезаписывает номер старым значением,
+        и простой +1 мог бы повторить уже выданную версию
+    """
+    now = timezone.now()
+    return max(version + 1, int(now.timestamp() * 1000000)), now
+
+
+def invalidate_user_version(*user_ids) -> None:
+    """
+        Сбросить версии в общем кэше сейчас и повторно после коммита - это закрывает окно,
+        в котором параллельный запрос успел прочитать из БД старую версию и положить её в кэш
+    """
+    if not user_ids or not cache_is_shared(settings.USER_VERSION_CACHE_ALIAS):
+        return
+    cache = caches[settings.USER_VERSION_CACHE_ALIAS]
+    keys = [_version_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def bump_user_version(*user_ids) -> None:
+    """
+        Сменить версию данных пользователей после записи адресов: UPDATE строк пользователей
+        в текущей транзакции. Сохранение самого пользователя меняет версию в своём UPDATE (User.save)
+    """
+    from .models import User
+
+    if not user_ids:
+        return
+    now = timezone.now()
+    User.objects.filter(pk__in=user_ids).update(
+        data_version=Greatest(F('data_version') + 1, Value(int(now.timestamp() * 1000000))), data_updated_at=now
+    )
+    invalidate_user_version(*user_ids)
@@ -1,17 +1,40 @@
+import secrets
+from itertools import islice
+
+from django.conf import settings
 from django.db import transaction
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import get_object_or_404
-from rest_framework.generics import GenericAPIView, UpdateAPIView, DestroyAPIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.utils.module_loading import import_string
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.generics import GenericAPIView, UpdateAPIView, DestroyAPIView, ListAPIView, RetrieveAPIView
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from .models import UserAddresses
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.views import TokenViewBase
+from .conditional import ConditionalGetMixin
+from .hashing import PasswordHashingUnavailable, password_hashing_pool
+from .instrumentation import registry
+from .list_cache import CachedListMixin, address_list_cache
+from .models import User, UserAddresses
+from .order_events import OrderEventIngestor
+from .pagination import UserKeysetPagination, UserAddressKeysetPagination
+from .parsers import JSONArrayStreamParser, NDJSONParser, CSVParser
+from .projections import ProjectionReadMixin
+from .provisioning import UserProvisioner
+from .ranking import get_preferred_addresses, invalidate_rankings
+from .search import get_limit, search
+from .throttling import LoginRateThrottle, RegistrationRateThrottle
 
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserSerializer, UserAddressCUDSerializer, UserAddressSerializer,
     UserResetPasswordSerializer
 )
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import get_logout_token, issue_tokens
+from .versioning import bump_user_version
 
 
 class UserRegistrationAPIView(GenericAPIView):
@@ -19,6 +42,7 @@ class UserRegistrationAPIView(GenericAPIView):
         Endpoint для регистрации пользователя
     """
     permission_classes = (AllowAny,)
+    throttle_classes = (RegistrationRateThrottle,)
     serializer_class = UserRegistrationSerializer
     http_method_names = ('post',)
 
@@ -26,9 +50,8 @@ class UserRegistrationAPIView(GenericAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        token = RefreshToken.for_user(user=user)
         resp_data = serializer.data
-        resp_data['tokens'] = {'refresh': str(token), 'access': str(token.access_token)}
+        resp_data['tokens'] = issue_tokens(user)
         return Response(data=resp_data, status=201)
 
 
@@ -37,6 +60,7 @@ class UserLoginAPIView(GenericAPIView):
         Endpoint для авторизации пользователя
     """
     permission_classes = (AllowAny,)
+    throttle_classes = (LoginRateThrottle,)
     serializer_class = UserLoginSerializer
     http_method_names = ('post',)
 
@@ -46,8 +70,7 @@ class UserLoginAPIView(GenericAPIView):
         user = serializer.validated_data
         serializer = UserSerializer(user)
         resp_data = serializer.data
-        token = RefreshToken.for_user(user=user)
-        resp_data['tokens'] = {'refresh': str(token), 'access': str(token.access_token)}
+        resp_data['tokens'] = issue_tokens(user)
         return Response(data=resp_data, status=200)
 
 
@@ -60,21 +83,33 @@ class UserLogoutAPIView(APIView):
 
     def post(self, request, *args, **kwargs):
         try:
-            refresh_token = request.data.get('refresh')
-            token = RefreshToken(token=refresh_token)
-            token.blacklist()
+            get_logout_token(request.data, request.auth).blacklist()
             return Response(status=205)
         except Exception as error:
             print(f'Error while user logout: {error}')
             return Response(status=400)
 
 
-class UserAddressAPIViewSet(ModelViewSet):
+class UserTokenRefreshAPIView(TokenViewBase):
+    """
+        Endpoint для обновления токенов: refresh -> пара токенов или sliding-токен по AUTH_TOKEN_MODE
+    """
+    def get_serializer_class(self):
+        if settings.AUTH_TOKEN_MODE == 'sliding':
+            return import_string(jwt_settings.SLIDING_TOKEN_REFRESH_SERIALIZER)
+        return import_string(jwt_settings.TOKEN_REFRESH_SERIALIZER)
+
+
+class UserAddressAPIViewSet(ConditionalGetMixin, CachedListMixin, ProjectionReadMixin, ModelViewSet):
     """
         Endpoint для адресов пользователя
     """
     permission_classes = (IsAuthenticated,)
     lookup_url_kwarg = 'address_id'
+    pagination_class = UserAddressKeysetPagination
+    projection_serializer_class = UserAddressSerializer
+    conditional_scope = 'addresses'
+    list_cache = address_list_cache
 
     def get_queryset(self):
         user_id = self.request.user.pk
@@ -84,10 +119,90 @@ class UserAddressAPIViewSet(ModelViewSet):
 
     def get_serializer_class(self):
         cur_action = self.action
-        if cur_action in ('create', 'update', 'partial_update', 'destroy'):
+        if cur_action in ('create', 'update', 'partial_update', 'destroy', 'bulk_create'):
             return UserAddressCUDSerializer
         return UserAddressSerializer
 
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        address_list_cache.invalidate(self.request.user.pk)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        address_list_cache.invalidate(self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        address_list_cache.invalidate(self.request.user.pk)
+
+    @action(detail=False, methods=['get'], url_path='search', url_name='search')
+    def search_addresses(self, request, *args, **kwargs):
+        """
+            Поиск/автодополнение адресов по городу и улице: ?q=<строка>&limit=<N>.
+            Самые используемые адреса первыми, не больше ADDRESS_SEARCH['MAX_RESULTS']
+        """
+        term = request.query_params.get('q', '').strip()
+        if len(term) < settings.ADDRESS_SEARCH['MIN_LENGTH']:
+            raise ValidationError({'q': [f'Минимальная длина запроса: {settings.ADDRESS_SEARCH["MIN_LENGTH"]}']})
+        queryset = search(self.get_queryset(), ('city', 'street'), term).order_by('-order_count', 'pk')
+        queryset = queryset[:get_limit(request.query_params.get('limit'))]
+        if settings.API_FAST_READ_PATH:
+            projection = self.get_projection()
+            return Response(projection.represent_many(projection.values(queryset)))
+        return Response(UserAddressSerializer(queryset, many=True, context=self.get_serializer_context()).data)
+
+    @action(detail=False, methods=['get'], url_path='preferred', url_name='preferred')
+    def preferred_addresses(self, request, *args, **kwargs):
+        """
+            Самые используемые адреса пользователя: ?limit=<N>, не больше PREFERRED_ADDRESSES['SIZE'].
+            Рейтинг хранится готовым и читается одним запросом по первичному ключу
+        """
+        limit = get_limit(request.query_params.get('limit'), settings.PREFERRED_ADDRESSES['SIZE'])
+        return Response(get_preferred_addresses(request.user.pk)[:limit])
+
+    @action(
+        detail=False, methods=['post'], url_path='bulk',
+        parser_classes=(JSONArrayStreamParser, NDJSONParser, CSVParser)
+    )
+    def bulk_create(self, request, *args, **kwargs):
+        """
+            Массовое создание адресов из JSON-массива, NDJSON или CSV.
+            Строки валидируются и сохраняются пачками, ошибки возвращаются построчно
+        """
+        chunk_size = settings.ADDRESS_BULK_CHUNK_SIZE
+        max_rows = settings.ADDRESS_BULK_MAX_ROWS
+        serializer = self.get_serializer()
+        source = iter(request.data) if not isinstance(request.data, dict) else iter(())
+        rows = islice(source, max_rows)
+        created_ids, errors, row_number, detail = [], [], 0, None
+        try:
+            while chunk := list(islice(rows, chunk_size)):
+                addresses = []
+                for row in chunk:
+                    row_number += 1
+                    try:
+                        addresses.append(UserAddresses(**serializer.run_validation(row)))
+                    except ValidationError as error:
+                        errors.append({'row': row_number, 'errors': error.detail})
+                with transaction.atomic():
+                    created = UserAddresses.objects.bulk_create(addresses, batch_size=chunk_size)
+                created_ids.extend(address.pk for address in created)
+                # bulk_create не отправляет post_save - версию и кэш списка сбрасываем сами
+                bump_user_version(request.user.pk)
+                address_list_cache.invalidate(request.user.pk)
+                invalidate_rankings(request.user.pk)
+            if next(source, None) is not None:
+                detail = f'Превышено максимальное количество строк: {max_rows}'
+        except ParseError as error:
+            detail = error.detail
+
+        resp_data = {'created': len(created_ids), 'ids': created_ids, 'errors': errors}
+        if detail is not None:
+            resp_data['detail'] = detail
+        if not created_ids and (errors or detail is not None):
+            return Response(data=resp_data, status=400)
+        return Response(data=resp_data, status=207 if errors or detail is not None else 201)
+
 
 class UserResetPasswordAPIView(UpdateAPIView):
     """
@@ -111,13 +226,17 @@ class UserResetPasswordAPIView(UpdateAPIView):
 
 class UserDeleteAPIView(DestroyAPIView):
     """
-        Endpoint для удаления пользователя
+        Endpoint для удаления пользователя. В режиме USER_DELETE_MODE='soft' пользователь только
+        деактивируется, данные удаляет фоновый воркер (manage.py purge_users)
     """
     permission_classes = (IsAuthenticated,)
 
     def delete(self, request, *args, **kwargs):
+        user = request.user
+        if settings.USER_DELETE_MODE == 'soft':
+            user.soft_delete()
+            return Response(status=204)
         with transaction.atomic():
-            user = request.user
             user.delete()
         return Response(status=204)
 
@@ -137,3 +256,94 @@ class UserUpdateAPIView(UpdateAPIView):
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(data=serializer.data, status=200)
+
+
+class UserProfileAPIView(ConditionalGetMixin, RetrieveAPIView):
+    """
+        Endpoint для получения данных пользователя (поддерживает ETag/Last-Modified)
+    """
+    serializer_class = UserSerializer
+    permission_classes = (IsAuthenticated,)
+    conditional_scope = 'profile'
+
+    def get_object(self):
+        return self.request.user
+
+
+class UserListAPIView(ProjectionReadMixin, ListAPIView):
+    """
+        Endpoint для списка пользователей (только для администраторов)
+    """
+    queryset = User.objects.filter(deleted_at__isnull=True)
+    serializer_class = UserSerializer
+    permission_classes = (IsAdminUser,)
+    pagination_class = UserKeysetPagination
+    projection_serializer_class = UserSerializer
+
+
+class UserBulkProvisionAPIView(APIView):
+    """
+        Endpoint для массового создания пользователей из JSON-массива, NDJSON или CSV (только для администраторов).
+        ?tokens=1 дополнительно выпускает refresh/access токены для созданных пользователей.
+        Не больше USER_PROVISIONING['MAX_ROWS'] строк, пароли хэширует общий пул процесса
+    """
+    permission_classes = (IsAdminUser,)
+    parser_classes = (JSONArrayStreamParser, NDJSONParser, CSVParser)
+    http_method_names = ('post',)
+
+    def post(self, request, *args, **kwargs):
+        issue_tokens = request.query_params.get('tokens') in ('1', 'true')
+        max_rows = settings.USER_PROVISIONING['MAX_ROWS']
+        source = iter(request.data) if not isinstance(request.data, dict) else iter(())
+        provisioner = UserProvisioner(issue_tokens=issue_tokens, hashing_pool=password_hashing_pool)
+        try:
+            resp_data = provisioner.run(islice(source, max_rows))
+            if next(source, None) is not None:
+                resp_data['detail'] = f'Превышено максимальное количество строк: {max_rows}'
+        except (ParseError, PasswordHashingUnavailable) as error:
+            # Уже созданные пачки остаются - отдаём отчёт по ним
+            resp_data = provisioner.report()
+            resp_data['detail'] = error.detail
+        if not resp_data['created'] and (resp_data['errors'] or 'detail' in resp_data):
+            return Response(data=resp_data, status=400)
+        return Response(data=resp_data, status=207 if resp_data['errors'] or 'detail' in resp_data else 201)
+
+
+class OrderEventIngestAPIView(APIView):
+    """
+        Endpoint для приёма событий заказов (event_id, address_id, ordered_at) из JSON-массива, NDJSON или CSV
+        (только для администраторов). Повторно доставленные event_id не учитываются
+    """
+    permission_classes = (IsAdminUser,)
+    parser_classes = (JSONArrayStreamParser, NDJSONParser, CSVParser)
+    http_method_names = ('post',)
+
+    def post(self, request, *args, **kwargs):
+        max_events = settings.ORDER_EVENTS['MAX_EVENTS']
+        source = iter(request.data) if not isinstance(request.data, dict) else iter(())
+        ingestor = OrderEventIngestor()
+        try:
+            resp_data = ingestor.run(islice(source, max_events))
+            if next(source, None) is not None:
+                resp_data['detail'] = f'Превышено максимальное количество событий: {max_events}'
+        except ParseError as error:
+            resp_data = ingestor.report()
+            resp_data['detail'] = error.detail
+        if not resp_data['received'] - len(resp_data['errors']) and (resp_data['errors'] or 'detail' in resp_data):
+            return Response(data=resp_data, status=400)
+        return Response(data=resp_data, status=207 if resp_data['errors'] or 'detail' in resp_data else 200)
+
+
+def metrics_view(request):
+    """
+        Метрики процесса в формате Prometheus. При заданном METRICS_TOKEN нужен заголовок
+        Authorization: Bearer <token>, без него endpoint доступен только с localhost или при DEBUG
+    """
+    token = settings.REQUEST_METRICS['TOKEN']
+    if token:
+        allowed = secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        allowed = settings.DEBUG or request.META.get('REMOTE_ADDR') in ('127.0.0.1', '::1')
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')